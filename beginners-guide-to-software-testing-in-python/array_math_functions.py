@@ -0,0 +1,84 @@
+import operator
+import numpy as np
+
+# dtype kinds accepted as numbers: signed ints, unsigned ints and floats.
+# Booleans ("b") are rejected, just like is_not_a_number(True) in test_math_functions.
+NUMBER_KINDS = frozenset("iuf")
+NUMBER_CLASSES = (int, float)
+
+
+class ArrayTypeError(TypeError):
+    def __init__(self, message, indices):
+        super().__init__(f"{message} Failed indices: {list(indices)}")
+        self.indices = indices
+
+
+class ArrayZeroDivisionError(ValueError):
+    def __init__(self, message, indices):
+        super().__init__(f"{message} Failed indices: {list(indices)}")
+        self.indices = indices
+
+
+def as_number_array(x):
+    # Accepts NumPy arrays, scalars and anything np.asarray understands
+    # (lists, array.array, memoryview and other buffer-protocol objects).
+    return np.asarray(x)
+
+
+def not_a_number_indices(x):
+    if x.dtype.kind in NUMBER_KINDS:
+        return np.empty(0, dtype=np.intp)
+    if x.dtype.kind != "O":
+        return np.arange(x.size)
+    # Object arrays hold arbitrary Python objects, so fall back to the scalar rule.
+    flat = x.ravel()
+    return np.fromiter((i for i in range(flat.size) if type(flat[i]) not in NUMBER_CLASSES), dtype=np.intp)
+
+
+def check_numbers(a, b):
+    a = as_number_array(a)
+    b = as_number_array(b)
+    for x in (a, b):
+        indices = not_a_number_indices(x)
+        if indices.size:
+            raise ArrayTypeError("Both values must be numbers.", indices)
+    return a, b
+
+
+# Integer arrays wrap around silently (2**62 + 2**62 is negative in int64), while the
+# scalar functions return exact Python ints. The extremes of a sum, difference or
+# product lie at the corners of the operand ranges, so those four Python-int results
+# tell whether any element can leave the result dtype; if one can, the operation is
+# redone on an object array of Python ints.
+def exact_integer_op(ufunc, python_op, a, b):
+    result = ufunc(a, b)
+    if result.dtype.kind in "iu" and result.size:
+        info = np.iinfo(result.dtype)
+        corners = [python_op(x, y) for x in (int(a.min()), int(a.max())) for y in (int(b.min()), int(b.max()))]
+        if min(corners) < info.min or max(corners) > info.max:
+            return ufunc(a.astype(object), b.astype(object))
+    return result
+
+
+def add(a, b):
+    a, b = check_numbers(a, b)
+    return exact_integer_op(np.add, operator.add, a, b)
+
+
+def subtract(a, b):
+    a, b = check_numbers(a, b)
+    return exact_integer_op(np.subtract, operator.sub, a, b)
+
+
+def multiply(a, b):
+    a, b = check_numbers(a, b)
+    return exact_integer_op(np.multiply, operator.mul, a, b)
+
+
+def divide(a, b):
+    a, b = check_numbers(a, b)
+    zero = b == 0
+    if zero.any():
+        zero = np.broadcast_to(zero, np.broadcast(a, b).shape)
+        raise ArrayZeroDivisionError("Cannot divide by zero", np.flatnonzero(zero))
+    return np.true_divide(a, b)
@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+import test_math_functions
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(HERE, "benchmark_math_functions.json")
+FUNCTIONS = ("is_not_a_number", "add", "subtract", "multiply", "divide")
+# One pair of operands per input type; bool and str take the TypeError path
+INPUTS = {"int": (7, 3), "float": (7.5, 2.5), "bool": (True, False), "str": ("Honey", "Badger")}
+
+
+# Define a function that returns what one call does, so a baseline is only
+# compared against runs that take the same path
+def describe(func, args):
+    try:
+        return repr(func(*args))
+    except (TypeError, ValueError) as exc:
+        return type(exc).__name__
+
+
+# Define the reference: a Python function that does nothing, timed with the same
+# statement as the functions. Timings are compared as multiples of it, which
+# cancels out most of the difference between a fast and a slow or busy machine.
+def reference(a, b=None):
+    return a
+
+
+# Define a function that returns a timer for one call and the number of loops
+# that takes about `seconds`
+def make_timer(func, args, seconds=0.05):
+    statement = "try:\n    func(*args)\nexcept (TypeError, ValueError):\n    pass"
+    timer = timeit.Timer(statement, globals={"func": func, "args": args})
+    elapsed = min(timer.repeat(3, 1000))
+    return timer, max(1, int(1000 * seconds / elapsed))
+
+
+# Define a function that measures every function on every input type. Each of the
+# `repeat` rounds times each case right after the reference on the same arguments;
+# the result is the median ns/op and the median ratio to the reference.
+def run_benchmarks(repeat=7):
+    cases = {}
+    for name in FUNCTIONS:
+        func = getattr(test_math_functions, name)
+        for kind, operands in INPUTS.items():
+            args = operands[:1] if name == "is_not_a_number" else operands
+            cases[name, kind] = (make_timer(reference, args), make_timer(func, args), describe(func, args))
+    samples = {case: [] for case in cases}
+    for _ in range(repeat):
+        for case, ((reference_timer, reference_number), (timer, number), _) in cases.items():
+            reference_ns = reference_timer.timeit(reference_number) / reference_number * 1e9
+            ns = timer.timeit(number) / number * 1e9
+            samples[case].append((ns, ns / reference_ns))
+    results = {name: {} for name in FUNCTIONS}
+    for (name, kind), (_, _, outcome) in cases.items():
+        ns, relative = zip(*samples[name, kind])
+        results[name][kind] = {"ns": round(statistics.median(ns), 1),
+                               "relative": round(statistics.median(relative), 3), "outcome": outcome}
+    return results
+
+
+# Define a function that compares a run against the baseline and returns the
+# cases that now behave differently or, unless timings is False, whose ratio to
+# the reference grew more than tolerance allows
+def compare(results, baseline, tolerance, timings=True):
+    problems = []
+    for name, kinds in results.items():
+        for kind, result in kinds.items():
+            expected = baseline.get(name, {}).get(kind)
+            if expected is None:
+                continue
+            if result["outcome"] != expected["outcome"]:
+                problems.append(f"{name}({kind}) returned {result['outcome']}, baseline {expected['outcome']}")
+            elif timings and result["relative"] > expected["relative"] * (1 + tolerance):
+                problems.append(f"{name}({kind}) took {result['relative']:.2f}x the reference call, "
+                                f"baseline {expected['relative']:.2f}x")
+    return problems
+
+
+# Define a function that returns why a stored baseline cannot be compared with
+# this interpreter, or None when it can
+def incompatible(stored):
+    if stored.get("python") != platform.python_version() or stored.get("machine") != platform.machine():
+        return f"it was recorded on Python {stored.get('python')} ({stored.get('machine')})"
+    if any("relative" not in result for kinds in stored["results"].values() for result in kinds.values()):
+        return "it has no timings relative to the reference call"
+    return None
+
+
+def main(args):
+    results = run_benchmarks(args.repeat)
+    baseline = {}
+    skipped = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            stored = json.load(file)
+        baseline = stored["results"]
+        skipped = incompatible(stored)
+
+    print(f"{'function':<18}{'input':<8}{'ns/op':>9}{'x ref':>8}{'baseline':>10}{'change':>9}  outcome")
+    for name, kinds in results.items():
+        for kind, result in kinds.items():
+            expected = baseline.get(name, {}).get(kind)
+            change = f"{expected['relative']:>10.2f}{result['relative'] / expected['relative'] - 1:>+9.0%}" \
+                if expected and skipped is None else ""
+            print(f"{name:<18}{kind:<8}{result['ns']:>9.1f}{result['relative']:>8.2f}{change:<19}  "
+                  f"{result['outcome']}")
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results},
+                      file, indent=2)
+            file.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if skipped is not None:
+        # Timings from another interpreter or CPU say nothing about a regression here,
+        # but the outcomes must still match
+        print(f"Skipped the timing comparison with {args.baseline}: {skipped}; record one with --save",
+              file=sys.stderr)
+    problems = compare(results, baseline, args.tolerance, timings=skipped is None)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="ns/op of test_math_functions by function and input type.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="JSON file with the stored baseline")
+    parser.add_argument("--save", action="store_true", help="record this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed growth of the ratio to the reference call before the run fails")
+    parser.add_argument("--repeat", type=int, default=7, help="interleaved rounds; the median is kept")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,73 @@
+import array
+import unittest
+import numpy as np
+import array_math_functions
+import test_math_functions
+
+
+class TestArrayMathOps(unittest.TestCase):
+    def test_number_check(self):
+        # test case 1
+        self.assertEqual(array_math_functions.not_a_number_indices(np.array([7, 7.1])).size, 0)
+        # test case 2
+        mixed = np.array([7, "HoneyBadger", 1.5], dtype=object)
+        self.assertEqual(list(array_math_functions.not_a_number_indices(mixed)), [1])
+        # test case 3
+        self.assertEqual(list(array_math_functions.not_a_number_indices(np.array([True, False]))), [0, 1])
+
+    def test_matches_scalar_functions(self):
+        a = [2, -2, 0, 3, 3.1, 9.1]
+        b = [3, 3, 1, 5, -5.7, -3.1]
+        for name in ("add", "subtract", "multiply", "divide"):
+            scalar = getattr(test_math_functions, name)
+            vectorized = getattr(array_math_functions, name)
+            self.assertEqual(list(vectorized(a, b)), [scalar(x, y) for x, y in zip(a, b)])
+
+    def test_result_types(self):
+        # test case 1
+        self.assertEqual(array_math_functions.add(np.array([3]), np.array([5])).dtype.kind, "i")
+        # test case 2
+        self.assertEqual(array_math_functions.add(np.array([3]), np.array([5.1])).dtype.kind, "f")
+        # test case 3
+        self.assertEqual(array_math_functions.divide(np.array([6]), np.array([3])).dtype.kind, "f")
+
+    def test_integer_overflow(self):
+        # test case 1: results beyond int64 are exact, like the scalar functions
+        for name, a, b in [("add", 2 ** 62, 2 ** 62), ("subtract", -2 ** 63, 1), ("multiply", 2 ** 32, 2 ** 32)]:
+            result = getattr(array_math_functions, name)(np.array([a, 1]), np.array([b, 1]))
+            self.assertEqual(list(result), [getattr(test_math_functions, name)(a, b),
+                                            getattr(test_math_functions, name)(1, 1)])
+        # test case 2: unsigned results below zero
+        one, two = np.array([1], dtype=np.uint8), np.array([2], dtype=np.uint8)
+        self.assertEqual(list(array_math_functions.subtract(one, two)), [-1])
+        # test case 3: results that fit keep the integer dtype
+        self.assertEqual(array_math_functions.multiply(np.array([2 ** 31]), np.array([2 ** 31])).dtype.kind, "i")
+
+    def test_buffer_protocol(self):
+        a = array.array("d", [1.5, 2.0])
+        b = memoryview(array.array("i", [2, 3]))
+        self.assertEqual(list(array_math_functions.multiply(a, b)), [3.0, 6.0])
+
+    def test_type_errors(self):
+        # test case 1
+        self.assertRaises(TypeError, array_math_functions.add, ["Honeybadger", "HB"], [1117, 1])
+        # test case 2
+        with self.assertRaises(array_math_functions.ArrayTypeError) as context:
+            array_math_functions.subtract(np.array([1, "Honeybadger", 2, None], dtype=object), [1, 2, 3, 4])
+        self.assertEqual(list(context.exception.indices), [1, 3])
+
+    def test_division_by_zero(self):
+        # test case 1
+        self.assertRaises(ValueError, array_math_functions.divide, [5, 1], [0, 1])
+        # test case 2
+        with self.assertRaises(array_math_functions.ArrayZeroDivisionError) as context:
+            array_math_functions.divide([5, 6, 7, 8], [1, 0, 2, 0])
+        self.assertEqual(list(context.exception.indices), [1, 3])
+        # test case 3
+        with self.assertRaises(array_math_functions.ArrayZeroDivisionError) as context:
+            array_math_functions.divide([5, 6, 7], 0)
+        self.assertEqual(list(context.exception.indices), [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import argparse
+import math
+import operator
+import os
+import random
+import sys
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from fractions import Fraction
+import test_math_functions
+
+FUNCTIONS = {
+    "add": (test_math_functions.add, operator.add),
+    "subtract": (test_math_functions.subtract, operator.sub),
+    "multiply": (test_math_functions.multiply, operator.mul),
+    "divide": (test_math_functions.divide, operator.truediv),
+}
+NUMBER_CLASSES = (int, float)
+SPECIAL_FLOATS = (0.0, -0.0, 1.0, -1.0, 0.1, 5e-324, 2.2250738585072014e-308, 1.7976931348623157e308,
+                  -1.7976931348623157e308, math.inf, -math.inf, math.nan)
+
+
+class IntSubclass(int):
+    def __repr__(self):
+        return f"IntSubclass({int(self)})"
+
+
+# Define the value generators. Numbers lean towards the edges (zero, huge ints,
+# subnormal and infinite floats) and the rest are values that look numeric but
+# must be rejected: bool, numeric strings, None, complex, Decimal, Fraction and
+# int subclasses.
+def small_int(rng):
+    return rng.randint(-1000, 1000)
+
+
+def big_int(rng):
+    return rng.choice((1, -1)) * rng.getrandbits(rng.randint(1, 4096))
+
+
+def zero(rng):
+    return rng.choice((0, 0.0, -0.0))
+
+
+def any_float(rng):
+    return rng.uniform(-1e6, 1e6)
+
+
+def wide_float(rng):
+    return math.ldexp(rng.random() * rng.choice((1, -1)), rng.randint(-1080, 1024))
+
+
+def special_float(rng):
+    return rng.choice(SPECIAL_FLOATS)
+
+
+def not_a_number(rng):
+    return rng.choice((
+        True, False, None, "7", "HoneyBadger", "", b"1", [1], (1,), {1: 1}, 1j, complex(2, 0),
+        Decimal("1.5"), Fraction(1, 3), IntSubclass(3), object(),
+    ))
+
+
+NUMBER_GENERATORS = (small_int, big_int, zero, any_float, wide_float, special_float)
+GENERATORS = NUMBER_GENERATORS + (not_a_number,)
+
+
+# Define a function that returns what a call did: its result or its exception type
+def outcome(func, a, b):
+    try:
+        return "ok", func(a, b)
+    except (TypeError, ValueError, OverflowError, ZeroDivisionError) as exc:
+        return "raised", type(exc)
+
+
+# Define a function that compares two results, treating NaN as equal to NaN and
+# telling 0.0 from -0.0 and 1 from 1.0
+def same_result(x, y):
+    if type(x) is not type(y):
+        return False
+    if type(x) is float and math.isnan(x):
+        return math.isnan(y)
+    if type(x) is float and x == 0:
+        return y == 0 and math.copysign(1, x) == math.copysign(1, y)
+    return x == y
+
+
+# Define a function that returns what test_math_functions is specified to do:
+# reject anything but int and float with TypeError, reject a zero divisor with
+# ValueError, otherwise behave exactly like the Python operator
+def expected_outcome(name, reference, a, b):
+    if type(a) not in NUMBER_CLASSES or type(b) not in NUMBER_CLASSES:
+        return "raised", TypeError
+    if name == "divide" and b == 0:
+        return "raised", ValueError
+    return outcome(reference, a, b)
+
+
+# Define a function that checks every property for one pair of inputs and
+# returns a description of each one that does not hold
+def check_case(a, b):
+    failures = []
+    for x in (a, b):
+        if test_math_functions.is_not_a_number(x) != (type(x) not in NUMBER_CLASSES):
+            failures.append(f"is_not_a_number({x!r}) returned {test_math_functions.is_not_a_number(x)!r}")
+    for name, (func, reference) in FUNCTIONS.items():
+        kind, value = outcome(func, a, b)
+        expected_kind, expected_value = expected_outcome(name, reference, a, b)
+        if kind != expected_kind or (kind == "ok" and not same_result(value, expected_value)) \
+                or (kind == "raised" and value is not expected_value):
+            failures.append(f"{name}({a!r}, {b!r}) -> {kind} {value!r}, expected {expected_kind} {expected_value!r}")
+    # add and multiply are commutative wherever they succeed
+    for name in ("add", "multiply"):
+        func = FUNCTIONS[name][0]
+        forward, backward = outcome(func, a, b), outcome(func, b, a)
+        if forward[0] == backward[0] == "ok" and not same_result(forward[1], backward[1]):
+            failures.append(f"{name}({a!r}, {b!r}) != {name}({b!r}, {a!r})")
+    return failures
+
+
+# Define a function that generates and checks `cases` input pairs from one seed.
+# Each pair is reproducible from (seed, index), which the failure report includes.
+def run_chunk(seed, cases, max_failures=10):
+    rng = random.Random(seed)
+    failures = []
+    for index in range(cases):
+        a = rng.choice(GENERATORS)(rng)
+        b = rng.choice(GENERATORS)(rng)
+        for failure in check_case(a, b):
+            if len(failures) < max_failures:
+                failures.append(f"seed={seed} case={index}: {failure}")
+    return cases, failures
+
+
+# Define a function that spreads `cases` generated pairs across a process pool,
+# one seed per chunk, and returns the number of cases checked and the failures
+def run_fuzz(cases, seed=0, workers=None, chunk_size=50000):
+    chunks = [(seed + number, min(chunk_size, cases - start))
+              for number, start in enumerate(range(0, cases, chunk_size))]
+    checked, failures = 0, []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_cases, chunk_failures in executor.map(run_chunk, *zip(*chunks)):
+            checked += chunk_cases
+            failures.extend(chunk_failures)
+    return checked, failures
+
+
+class TestMathProperties(unittest.TestCase):
+    def test_generated_cases(self):
+        # a quick serial run; use the command line for millions of cases
+        cases, failures = run_chunk(seed=1117, cases=20000)
+        self.assertEqual(failures, [])
+
+    def test_edge_cases(self):
+        values = list(SPECIAL_FLOATS) + [0, 1, -1, 2 ** 1024, True, False, "7", None, IntSubclass(3)]
+        for a in values:
+            for b in values:
+                self.assertEqual(check_case(a, b), [])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Property-based fuzzing of test_math_functions on a process pool.")
+    parser.add_argument("--cases", type=int, default=2000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+    start_time = time.perf_counter()
+    checked, failures = run_fuzz(args.cases, args.seed, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start_time
+    print(f"{checked} cases in {elapsed:.1f}s ({checked / elapsed:.0f}/s) on {args.workers} processes")
+    for failure in failures:
+        print(failure)
+    sys.exit(1 if failures else 0)
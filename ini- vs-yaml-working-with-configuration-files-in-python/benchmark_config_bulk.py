@@ -0,0 +1,46 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from config_bulk import PATTERNS, find_config_files, run_bulk
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# Define a function that fills a directory tree with copies of the sample config files, one directory per host
+def make_fleet(root, hosts):
+    samples = list(find_config_files(HERE, PATTERNS))
+    for host in range(hosts):
+        directory = os.path.join(root, f"host-{host:05d}")
+        os.makedirs(directory)
+        for sample in samples:
+            shutil.copy(sample, directory)
+    return hosts * len(samples)
+
+
+def main(hosts, worker_counts):
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "fleet")
+        files = make_fleet(source, hosts)
+        baseline = os.path.join(HERE, "web-server-details.yaml")
+        print(f"{files} files")
+        print(f"{'workers':<9}{'seconds':>9}{'files/s':>10}{'speedup':>9}")
+        first = None
+        for workers in worker_counts:
+            output = os.path.join(directory, f"out-{workers}")
+            start_time = time.perf_counter()
+            results = list(run_bulk(source, output, "ini", baseline, workers))
+            elapsed = time.perf_counter() - start_time
+            assert len(results) == files and not any("error" in result for result in results)
+            first = first or elapsed
+            print(f"{workers:<9}{elapsed:>9.2f}{files / elapsed:>10.0f}{first / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk convert-and-diff throughput by number of worker processes.")
+    parser.add_argument("--hosts", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+    main(args.hosts, args.workers)
@@ -0,0 +1,62 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from config_loader import parse_config
+from config_snapshot import build_snapshot, read_snapshot
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Each fresh worker times importing the loaders (dataclasses, configparser and hashlib,
+# which the web apps import anyway) and then the first load of the config, which for
+# .yaml includes importing PyYAML
+COLD_LOAD = """
+import time
+start = time.perf_counter()
+import config_loader, config_snapshot
+loaded = time.perf_counter()
+config = {function}({path!r})
+assert config is not None
+print(loaded - start, time.perf_counter() - loaded)
+"""
+
+
+def cold_load(function, path, runs):
+    code = COLD_LOAD.format(function=function, path=path)
+    imports, loads = [], []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+        import_time, load_time = map(float, output.stdout.split())
+        imports.append(import_time * 1000)
+        loads.append(load_time * 1000)
+    return statistics.median(imports), statistics.median(loads)
+
+
+def main(runs, number):
+    with tempfile.TemporaryDirectory() as directory:
+        ini = shutil.copy(os.path.join(HERE, "server-config.ini"), directory)
+        yaml = shutil.copy(os.path.join(HERE, "web-server-details.yaml"), directory)
+        build_snapshot(yaml)
+        assert read_snapshot(yaml) == parse_config(yaml)
+        paths = {
+            ".ini": ("config_loader.parse_config", parse_config, ini),
+            ".yaml": ("config_loader.parse_config", parse_config, yaml),
+            "snapshot": ("config_snapshot.read_snapshot", read_snapshot, yaml),
+        }
+        print(f"{'path':<10}{'import ms':>11}{'cold load ms':>14}{'warm load µs':>14}")
+        for name, (function, load, path) in paths.items():
+            import_time, load_time = cold_load(function, path, runs)
+            warm = timeit.timeit(lambda: load(path), number=number) / number * 1e6
+            print(f"{name:<10}{import_time:>11.2f}{load_time:>14.2f}{warm:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold and warm config load times for .ini, .yaml and snapshots.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.runs, args.number)
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+import yaml
+from config_bulk import diff_configs, find_config_files, run_bulk, to_ini
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestConfigBulk(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, "fleet")
+        os.makedirs(os.path.join(self.source, "host-1"))
+        for name in ("server-config.ini", "web-server-details.yaml", "web-server-details-updated.yaml"):
+            shutil.copy(os.path.join(HERE, name), os.path.join(self.source, "host-1", name))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_bulk(self, **kwargs):
+        return {result["path"]: result for result in run_bulk(self.source, **kwargs)}
+
+    def test_diff_against_baseline(self):
+        self.assertEqual(diff_configs({"a": {"b": 1, "c": 2}}, {"a": {"b": 1, "c": 3, "d": 4}}),
+                         {"added": {"a.d": 4}, "updated": {"a.c": [2, 3]}, "deleted": {}})
+        results = self.run_bulk(baseline_path=os.path.join(HERE, "web-server-details.yaml"), workers=1)
+        empty = {"added": {}, "updated": {}, "deleted": {}}
+        self.assertEqual(results[os.path.join("host-1", "server-config.ini")]["diff"], empty)
+        self.assertEqual(results[os.path.join("host-1", "web-server-details.yaml")]["diff"], empty)
+        updated = results[os.path.join("host-1", "web-server-details-updated.yaml")]["diff"]
+        self.assertEqual(updated["updated"], {"server.port": [8080, "8888"]})
+        self.assertIn("author", updated["added"])
+
+    def test_top_level_keys_match_across_formats(self):
+        with open(os.path.join(HERE, "web-server-details-updated.yaml")) as file:
+            data = yaml.safe_load(file)
+        with open(os.path.join(self.source, "host-1", "server-config-updated.ini"), "w") as file:
+            file.write(to_ini(data))
+        results = self.run_bulk(baseline_path=os.path.join(HERE, "web-server-details-updated.yaml"), workers=1)
+        self.assertEqual(results[os.path.join("host-1", "server-config-updated.ini")]["diff"],
+                         {"added": {}, "updated": {}, "deleted": {}})
+
+    def test_non_mapping_file_is_reported(self):
+        with open(os.path.join(self.source, "host-1", "web-server-details-bad.yaml"), "w") as file:
+            file.write("- a\n- b\n")
+        results = self.run_bulk(target_format="ini", output_root=os.path.join(self.directory, "out"), workers=1)
+        self.assertIn("error", results[os.path.join("host-1", "web-server-details-bad.yaml")])
+        self.assertEqual(sum("error" in result for result in results.values()), 1)
+
+    def test_pool_streams_every_file(self):
+        expected = {os.path.relpath(path, self.source) for path in find_config_files(self.source)}
+        results = self.run_bulk(target_format="yaml", output_root=os.path.join(self.directory, "out"), workers=2,
+                                chunksize=1)
+        self.assertEqual(set(results), expected)
+        self.assertTrue(all("error" not in result for result in results.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+from config_loader import ConfigLoader, parse_config
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestParseConfig(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def test_ini_and_yaml_agree(self):
+        ini = parse_config(os.path.join(HERE, "server-config.ini"))
+        yaml = parse_config(os.path.join(HERE, "web-server-details.yaml"))
+        self.assertEqual((ini.server, ini.logging, ini.database), (yaml.server, yaml.logging, yaml.database))
+        self.assertEqual(ini.server.port, 8080)
+        self.assertEqual(ini.database.pool, 100)
+
+    def test_types_are_cast(self):
+        config = parse_config(os.path.join(HERE, "web-server-details-updated.yaml"))
+        self.assertEqual(config.server.port, 8888)
+        self.assertEqual(config.extra["author"], "Aditya")
+        config = parse_config(self.write("cache.ini", "[cache]\nenabled = no\nttl = 0.5\n"))
+        self.assertEqual((config.cache.enabled, config.cache.ttl), (False, 0.5))
+
+    def test_non_mapping_documents(self):
+        # test case 1
+        self.assertRaises(ValueError, parse_config, self.write("list.yaml", "- 1\n- 2\n"))
+        # test case 2
+        self.assertRaises(ValueError, parse_config, self.write("scalar.yaml", "just text\n"))
+        # test case 3
+        self.assertRaises(ValueError, parse_config, self.write("section.yaml", "server: [1, 2]\n"))
+        # test case 4
+        self.assertRaises(ValueError, parse_config, self.write("value.yaml", "server:\n  port: [1, 2]\n"))
+        # test case 5
+        self.assertRaises(ValueError, parse_config, self.write("bad.ini", "[server]\nport = eighty\n"))
+
+
+class TestConfigLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "config.yaml")
+        self.write("server:\n  port: 8080\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        with open(self.path, "w") as file:
+            file.write(text)
+        # Make every write visible to the mtime/size/inode check
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+    def test_reload_notifies_subscribers(self):
+        loader = ConfigLoader(self.path, check_interval=0)
+        seen = []
+        loader.subscribe(lambda config, changes: seen.append(changes))
+        self.write("server:\n  port: 9090\n")
+        self.assertEqual(loader.reload_if_changed(), {"server.port": (8080, 9090)})
+        self.assertEqual(loader.get().server.port, 9090)
+        self.assertEqual(seen, [{"server.port": (8080, 9090)}])
+
+    def test_bad_reload_keeps_the_previous_config(self):
+        loader = ConfigLoader(self.path, check_interval=0)
+        for text in ("- not\n- a mapping\n", "server: 5\n", "server: [\n"):
+            self.write(text)
+            self.assertEqual(loader.reload_if_changed(), {})
+            self.assertEqual(loader.config.server.port, 8080)
+            self.assertIsInstance(loader.last_error, ValueError)
+        self.write("server:\n  port: 9090\n")
+        loader.reload_if_changed()
+        self.assertEqual(loader.config.server.port, 9090)
+        self.assertIsNone(loader.last_error)
+
+    def test_failing_subscriber(self):
+        loader = ConfigLoader(self.path, check_interval=0)
+        seen = []
+        loader.subscribe(lambda config, changes: 1 / 0)
+        loader.subscribe(lambda config, changes: seen.append(changes))
+        self.write("server:\n  port: 9090\n")
+        loader.reload_if_changed()
+        self.assertEqual(len(seen), 1)
+        self.assertIsInstance(loader.last_error, ZeroDivisionError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from config_loader import parse_config
+from config_snapshot import build_snapshot, load_config_snapshot, read_snapshot, snapshot_path, source_digest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestConfigSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, "web-server-details-updated.yaml")
+        shutil.copy(os.path.join(HERE, "web-server-details-updated.yaml"), self.source)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        self.assertIsNone(read_snapshot(self.source))
+        self.assertEqual(build_snapshot(self.source), snapshot_path(self.source))
+        self.assertEqual(read_snapshot(self.source), parse_config(self.source))
+
+    def test_stale_snapshot_is_ignored(self):
+        build_snapshot(self.source)
+        with open(self.source, "a") as file:
+            file.write("extra_key: 1\n")
+        self.assertIsNone(read_snapshot(self.source))
+        self.assertEqual(load_config_snapshot(self.source).extra["extra_key"], 1)
+        self.assertEqual(read_snapshot(self.source).extra["extra_key"], 1)
+
+    def test_unchanged_source_is_not_hashed(self):
+        build_snapshot(self.source)
+        with mock.patch("config_snapshot.source_digest", wraps=source_digest) as digest:
+            self.assertIsNotNone(read_snapshot(self.source))
+            digest.assert_not_called()
+            # test case 2: a touched but unchanged file is hashed and keeps its snapshot
+            stat = os.stat(self.source)
+            os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            self.assertIsNotNone(read_snapshot(self.source))
+            digest.assert_called_once_with(self.source)
+
+    def test_corrupt_snapshot_is_ignored(self):
+        build_snapshot(self.source)
+        with open(snapshot_path(self.source), "r+b") as file:
+            file.seek(-4, os.SEEK_END)
+            file.write(b"\xff\xff\xff\xff")
+        self.assertIsNone(read_snapshot(self.source))
+        with open(snapshot_path(self.source), "wb") as file:
+            file.write(b"HBCONFIG")
+        self.assertIsNone(read_snapshot(self.source))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+import argparse
+import configparser
+import fnmatch
+import io
+import itertools
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from config_loader import read_config_file
+
+PATTERNS = ("server-config*.ini", "web-server-details*.yaml")
+EXTENSIONS = {"ini": ".ini", "yaml": ".yaml"}
+# INI files only hold sections, so top-level YAML scalars such as author go in this section
+TOP_LEVEL_SECTION = "general"
+
+
+# Define a generator that walks a directory tree and yields the matching config files
+def find_config_files(root, patterns=PATTERNS):
+    with os.scandir(root) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.is_dir(follow_symlinks=False):
+                yield from find_config_files(entry.path, patterns)
+            elif any(fnmatch.fnmatch(entry.name, pattern) for pattern in patterns):
+                yield entry.path
+
+
+def file_format(path):
+    return "yaml" if path.endswith((".yaml", ".yml")) else "ini"
+
+
+# Define a function that renders a config dictionary as INI text
+def to_ini(data):
+    parser = configparser.ConfigParser(interpolation=None)
+    top_level = {key: value for key, value in data.items() if not isinstance(value, dict)}
+    if top_level:
+        parser[TOP_LEVEL_SECTION] = {key: str(value) for key, value in top_level.items()}
+    for section, values in data.items():
+        if isinstance(values, dict):
+            parser[section] = {key: json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+                               for key, value in values.items()}
+    stream = io.StringIO()
+    parser.write(stream)
+    return stream.getvalue()
+
+
+# INI values are untyped strings; turn integers back into numbers for YAML
+def infer_scalar(value):
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+# Define a function that renders a config dictionary as YAML text, in the sorted
+# block style of the existing web-server-details files
+def to_yaml(data, typed=True):
+    import yaml
+
+    if not typed:
+        data = {section: {key: infer_scalar(value) for key, value in values.items()}
+                for section, values in data.items()}
+    data = dict(data)
+    data.update(data.pop(TOP_LEVEL_SECTION, None) or {})
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    return yaml.dump(data, Dumper=dumper, default_flow_style=False, sort_keys=True)
+
+
+# Define a function that reads a config file and checks that it holds a mapping of
+# sections, so a list or scalar YAML document is reported instead of crashing
+def read_mapping(path):
+    data = read_config_file(path)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a mapping of sections, got {type(data).__name__}")
+    return data
+
+
+# Define a function that brings both formats to the same keys for diffing: the
+# [general] section of an INI file holds what YAML keeps at the top level
+def normalize_keys(data, fmt):
+    if fmt != "ini" or TOP_LEVEL_SECTION not in data:
+        return data
+    data = dict(data)
+    data.update(data.pop(TOP_LEVEL_SECTION))
+    return data
+
+
+# Define a function that flattens a config into {"section.key": value}
+def flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+# Define a function that computes the structural diff between two configs: the
+# added, updated and deleted keys, as in the -updated and -deleted variant files.
+# INI values are strings, so values are compared as strings across formats.
+def diff_configs(baseline, config, compare_as_text=False):
+    old, new = flatten(baseline), flatten(config)
+    normalize = str if compare_as_text else (lambda value: value)
+    return {
+        "added": {key: new[key] for key in sorted(new.keys() - old.keys())},
+        "updated": {key: [old[key], new[key]] for key in sorted(old.keys() & new.keys())
+                    if normalize(old[key]) != normalize(new[key])},
+        "deleted": {key: old[key] for key in sorted(old.keys() - new.keys())},
+    }
+
+
+# Per-worker state, set once by the pool initializer instead of being pickled with every task
+JOB = {}
+
+
+def init_job(source_root, output_root, target_format, baseline, baseline_format):
+    JOB.update(source_root=source_root, output_root=output_root, target_format=target_format,
+               baseline=baseline, baseline_format=baseline_format)
+
+
+# Define the worker: parse one file, write its converted copy in one write and
+# return its diff against the baseline
+def process_file(path):
+    result = {"path": os.path.relpath(path, JOB["source_root"])}
+    try:
+        data = read_mapping(path)
+        if JOB["target_format"]:
+            target = JOB["target_format"]
+            relative = os.path.splitext(result["path"])[0] + EXTENSIONS[target]
+            output = os.path.join(JOB["output_root"], relative)
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            with open(output, "w") as file:
+                if target == "yaml":
+                    file.write(to_yaml(data, typed=file_format(path) == "yaml"))
+                else:
+                    file.write(to_ini(data))
+            result["output"] = relative
+        if JOB["baseline"] is not None:
+            cross_format = JOB["baseline_format"] != file_format(path)
+            result["diff"] = diff_configs(JOB["baseline"], normalize_keys(data, file_format(path)),
+                                          compare_as_text=cross_format)
+    except (OSError, ValueError, configparser.Error) as exc:
+        result["error"] = str(exc)
+    return result
+
+
+def process_files(paths):
+    return [process_file(path) for path in paths]
+
+
+# Define the bulk runner: stream the files through a process pool (or inline for
+# workers=1) in chunks of chunksize paths and yield one result per file as soon as
+# its chunk is done. At most two chunks per worker are queued, so neither the file
+# list nor the results pile up in memory.
+def run_bulk(source_root, output_root=None, target_format=None, baseline_path=None, workers=None, chunksize=64):
+    baseline = None
+    if baseline_path:
+        baseline = normalize_keys(read_mapping(baseline_path), file_format(baseline_path))
+    job = (source_root, output_root, target_format, baseline, baseline_path and file_format(baseline_path))
+    paths = find_config_files(source_root)
+    if workers == 1:
+        init_job(*job)
+        yield from map(process_file, paths)
+        return
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_job, initargs=job) as executor:
+        pending = set()
+        while chunk := list(itertools.islice(paths, chunksize)):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            pending.add(executor.submit(process_files, chunk))
+        for future in as_completed(pending):
+            yield from future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert and diff trees of server-config*.ini and "
+                                                 "web-server-details*.yaml files in parallel.")
+    parser.add_argument("source", help="directory tree to scan")
+    parser.add_argument("--to", choices=sorted(EXTENSIONS), help="convert every file to this format")
+    parser.add_argument("--output", default="converted", help="directory for converted files")
+    parser.add_argument("--baseline", help="config file to diff every file against")
+    parser.add_argument("--report", help="write the results as JSON lines to this file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+    results = run_bulk(args.source, args.output, args.to, args.baseline, args.workers)
+    lines = [json.dumps(result, default=str) + "\n" for result in results]
+    if args.report:
+        # One write for the whole report
+        with open(args.report, "w") as file:
+            file.write("".join(lines))
+    else:
+        print("".join(lines), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import configparser
+import dataclasses
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+
+# Define the typed, immutable configuration sections
+@dataclass(frozen=True)
+class ServerConfig:
+    host: str = "0.0.0.0"
+    port: int = 8080
+    format: str = "IPv4"
+    # Validate /calculate/ bodies with the compiled validator instead of the Pydantic model (FastAPI app)
+    fast_validation: bool = False
+
+
+@dataclass(frozen=True)
+class LoggingConfig:
+    level: str = "info"
+    file: str = None
+
+
+@dataclass(frozen=True)
+class DatabaseConfig:
+    url: str = None
+    pool: int = 10
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    enabled: bool = True
+    maxsize: int = 4096
+    # Seconds; 0 keeps entries until they are evicted
+    ttl: float = 60.0
+
+
+@dataclass(frozen=True)
+class Config:
+    server: ServerConfig = field(default_factory=ServerConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    # Top-level keys without a typed section, such as credentials or author
+    extra: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+
+SECTIONS = {"server": ServerConfig, "logging": LoggingConfig, "database": DatabaseConfig, "cache": CacheConfig}
+
+
+# Define a function that reads a .ini or .yaml file into a plain dictionary
+def read_config_file(path):
+    if path.endswith((".yaml", ".yml")):
+        # Imported here so INI and snapshot loads do not pay for importing PyYAML
+        import yaml
+
+        # Use the libyaml parser when PyYAML was built with it
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        with open(path, "rb") as file:
+            try:
+                # Files such as web-server-details-1.yaml hold metadata in a second document
+                documents = list(yaml.load_all(file, Loader=loader))
+            except yaml.YAMLError as exc:
+                raise ValueError(f"{path}: {exc}") from exc
+        return (documents[0] if documents else None) or {}
+    parser = configparser.ConfigParser()
+    with open(path) as file:
+        parser.read_file(file)
+    return {section: dict(parser[section]) for section in parser.sections()}
+
+
+# Define a function that casts a value to a declared field type. INI values are
+# strings, so booleans accept the same words as ConfigParser.getboolean.
+def cast_value(field_type, value):
+    if field_type is bool:
+        if isinstance(value, bool):
+            return value
+        if str(value).lower() not in configparser.ConfigParser.BOOLEAN_STATES:
+            raise ValueError(f"Not a boolean: {value!r}")
+        return configparser.ConfigParser.BOOLEAN_STATES[str(value).lower()]
+    if field_type in (int, float):
+        return field_type(value)
+    return str(value)
+
+
+# Define a function that converts one section, casting values to the declared field types
+def build_section(section_class, values):
+    kwargs = {}
+    for section_field in dataclasses.fields(section_class):
+        if section_field.name in values and values[section_field.name] is not None:
+            try:
+                kwargs[section_field.name] = cast_value(section_field.type, values[section_field.name])
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"{section_field.name}: {exc}") from exc
+    return section_class(**kwargs)
+
+
+# Define a function that parses a .ini or .yaml file into a Config. Every problem
+# with the contents, including a document or section that is not a mapping, is
+# reported as ValueError.
+def parse_config(path):
+    data = read_config_file(path)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a mapping of sections, got {type(data).__name__}")
+    sections = {}
+    for name, section_class in SECTIONS.items():
+        values = data.get(name) or {}
+        if not isinstance(values, dict):
+            raise ValueError(f"{path}: section {name!r} must be a mapping, got {type(values).__name__}")
+        try:
+            sections[name] = build_section(section_class, values)
+        except ValueError as exc:
+            raise ValueError(f"{path}: section {name!r}: {exc}") from exc
+    extra = {key: value for key, value in data.items() if key not in SECTIONS}
+    return Config(**sections, extra=MappingProxyType(extra))
+
+
+# Define a function that lists the changed keys as {"section.key": (old, new)}
+def diff_config(old, new):
+    changes = {}
+    for name in SECTIONS:
+        old_section, new_section = getattr(old, name), getattr(new, name)
+        if old_section == new_section:
+            continue
+        for section_field in dataclasses.fields(old_section):
+            old_value = getattr(old_section, section_field.name)
+            new_value = getattr(new_section, section_field.name)
+            if old_value != new_value:
+                changes[f"{name}.{section_field.name}"] = (old_value, new_value)
+    for key in old.extra.keys() | new.extra.keys():
+        if old.extra.get(key) != new.extra.get(key):
+            changes[key] = (old.extra.get(key), new.extra.get(key))
+    return changes
+
+
+# Define a function that builds the new Config reusing every unchanged section
+# object, so consumers holding a section only see a new object when it changed
+def merge_config(old, new):
+    sections = {name: getattr(old, name) if getattr(old, name) == getattr(new, name) else getattr(new, name)
+                for name in SECTIONS}
+    extra = old.extra if old.extra == new.extra else new.extra
+    return Config(**sections, extra=extra)
+
+
+# Parses the file once and serves the cached Config. Reading .config is a plain
+# attribute access; the file is only stat()ed by reload_if_changed(), called at
+# most every check_interval seconds by get() or by the background watcher thread.
+# A reload parses into a new object and swaps the reference, so readers always see
+# either the old or the new Config. Files that fail to parse keep the old Config.
+class ConfigLoader:
+    def __init__(self, path, check_interval=1.0, parser=parse_config):
+        self.path = os.fspath(path)
+        self.check_interval = check_interval
+        self.parser = parser
+        self.listeners = []
+        self.reloads = 0
+        self.last_error = None
+        self.lock = threading.Lock()
+        self.watcher = None
+        self.stopped = threading.Event()
+        self.signature = self.file_signature()
+        self.config = parser(self.path)
+        self.next_check = time.monotonic() + check_interval
+
+    def file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def get(self):
+        if time.monotonic() >= self.next_check:
+            self.reload_if_changed()
+        return self.config
+
+    # Register callback(config, changes) to run after each reload that changed something
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+        return callback
+
+    def reload_if_changed(self):
+        with self.lock:
+            self.next_check = time.monotonic() + self.check_interval
+            try:
+                signature = self.file_signature()
+                if signature == self.signature:
+                    return {}
+                new_config = self.parser(self.path)
+            except (OSError, ValueError, configparser.Error) as exc:
+                # Editors replace files in several steps, and a broken edit must not
+                # take the old config away: keep it and try again on the next check
+                self.last_error = exc
+                return {}
+            self.signature = signature
+            self.last_error = None
+            changes = diff_config(self.config, new_config)
+            if not changes:
+                return {}
+            self.config = merge_config(self.config, new_config)
+            self.reloads += 1
+            config = self.config
+        for callback in self.listeners:
+            try:
+                callback(config, changes)
+            except Exception as exc:
+                # One failing subscriber must not stop the others or the watcher thread
+                self.last_error = exc
+        return changes
+
+    def start(self):
+        if self.watcher is None:
+            self.stopped.clear()
+            self.watcher = threading.Thread(target=self.watch, name="config-watcher", daemon=True)
+            self.watcher.start()
+        return self
+
+    def watch(self):
+        while not self.stopped.wait(self.check_interval):
+            self.reload_if_changed()
+
+    def stop(self):
+        self.stopped.set()
+        if self.watcher is not None:
+            self.watcher.join()
+            self.watcher = None
+
+
+# Shared loaders by absolute path
+LOADERS = {}
+
+
+# Define a function that returns one shared loader per file
+def load_config(path, check_interval=1.0, parser=parse_config):
+    path = os.path.abspath(path)
+    if path not in LOADERS:
+        LOADERS[path] = ConfigLoader(path, check_interval, parser)
+    return LOADERS[path]
+
+
+if __name__ == "__main__":
+    import sys
+
+    loader = load_config(sys.argv[1] if len(sys.argv) > 1 else "server-config.ini")
+    print(loader.config)
+    if "--watch" in sys.argv:
+        loader.subscribe(lambda config, changes: print("changed:", changes))
+        loader.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            loader.stop()
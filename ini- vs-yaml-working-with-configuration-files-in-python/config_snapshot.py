@@ -0,0 +1,102 @@
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+from types import MappingProxyType
+from config_loader import SECTIONS, Config, parse_config
+
+# Snapshot layout: magic, marshal format version, Python version, mtime and size
+# of the source file, its SHA-256, then the validated config as a marshalled
+# dictionary. The marshal format is only stable within one Python version, so
+# snapshots written by a different interpreter count as stale.
+MAGIC = b"HBCONFG2"
+HEADER = struct.Struct("<8sBBBqq32s")
+VERSION = (marshal.version, sys.version_info[0], sys.version_info[1])
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+# Define a function that returns where the snapshot of a config file lives
+def snapshot_path(source):
+    return os.fspath(source) + SNAPSHOT_SUFFIX
+
+
+def source_digest(source):
+    with open(source, "rb") as file:
+        return hashlib.sha256(file.read()).digest()
+
+
+# Define a function that converts a Config into marshal-friendly dictionaries
+def config_to_dict(config):
+    data = {name: dict(vars(getattr(config, name))) for name in SECTIONS}
+    data["extra"] = dict(config.extra)
+    return data
+
+
+def config_from_dict(data):
+    sections = {name: section_class(**data[name]) for name, section_class in SECTIONS.items()}
+    return Config(**sections, extra=MappingProxyType(data["extra"]))
+
+
+# Define the build step: parse and validate the source once, then write the
+# snapshot next to it (or to target) through a temporary file and an atomic rename
+def build_snapshot(source, target=None):
+    target = target or snapshot_path(source)
+    # stat() before reading, so an edit made in between leaves a stale mtime behind
+    stat = os.stat(source)
+    digest = source_digest(source)
+    try:
+        payload = marshal.dumps(config_to_dict(parse_config(os.fspath(source))))
+    except ValueError as exc:
+        # Values marshal cannot store, such as YAML timestamps in the extra keys
+        raise ValueError(f"{source}: cannot snapshot config: {exc}") from exc
+    temporary = f"{target}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(MAGIC, *VERSION, stat.st_mtime_ns, stat.st_size, digest))
+        file.write(payload)
+    os.replace(temporary, target)
+    return target
+
+
+# Define a function that memory-maps a snapshot and returns its Config, or None
+# when the snapshot is missing, corrupt, from another Python or older than the
+# source. Like .pyc files, an unchanged source mtime and size are trusted without
+# hashing the source; otherwise its SHA-256 decides, so a file that was only
+# touched keeps its snapshot.
+def read_snapshot(source, target=None):
+    target = target or snapshot_path(source)
+    try:
+        with open(target, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as snapshot:
+            if len(snapshot) <= HEADER.size:
+                return None
+            magic, marshal_version, major, minor, mtime_ns, size, digest = HEADER.unpack_from(snapshot)
+            if magic != MAGIC or (marshal_version, major, minor) != VERSION:
+                return None
+            stat = os.stat(source)
+            if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size) and digest != source_digest(source):
+                return None
+            return config_from_dict(marshal.loads(snapshot[HEADER.size:]))
+    except (OSError, ValueError, EOFError, TypeError, KeyError):
+        return None
+
+
+# Define the loader: use a fresh snapshot, otherwise parse the source and, when
+# rebuild is set, write a new snapshot for the next worker. Pass it as the parser
+# of a ConfigLoader to get hot reloading on top.
+def load_config_snapshot(source, rebuild=True):
+    config = read_snapshot(source)
+    if config is not None:
+        return config
+    config = parse_config(os.fspath(source))
+    if rebuild:
+        try:
+            build_snapshot(source)
+        except (OSError, ValueError):
+            pass
+    return config
+
+
+if __name__ == "__main__":
+    for source in sys.argv[1:]:
+        print(f"{source} -> {build_snapshot(source)}")
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from collections import deque
+from fast_json import dumps
+
+
+# Per-client token bucket: `rate` tokens per second, holding at most `burst`
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.updated_at = now
+
+    def take(self, rate, burst, now):
+        self.tokens = min(burst, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def rejection(status, reason):
+    body = dumps({"type": "FAILURE", "reason": reason})
+    start = {
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", b"1")],
+    }
+    return start, {"type": "http.response.body", "body": body}
+
+
+OVERLOADED = rejection(503, "Server is overloaded")
+RATE_LIMITED = rejection(429, "Rate limit exceeded")
+
+
+# Pure ASGI admission control. At most `max_concurrency` requests run at once and
+# at most `max_queue` more wait, each for up to `queue_timeout` seconds, for a slot;
+# anything beyond that is answered immediately with a prebuilt 503 so latency stays
+# bounded under overload. When `rate` is set, requests carrying an X-API-Key are
+# also limited per key with a token bucket and get a 429 once it is empty.
+class AdmissionControlMiddleware:
+    def __init__(self, app, max_concurrency=100, max_queue=100, queue_timeout=1.0, rate=None, burst=None,
+                 key_header="x-api-key", max_clients=10000, exempt_paths=()):
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.key_header = key_header.lower().encode("latin-1")
+        self.max_clients = max_clients
+        self.exempt_paths = frozenset(exempt_paths)
+        self.buckets = {}
+        self.active = 0
+        self.waiters = deque()
+        self.admitted = 0
+        self.rejected_overload = 0
+        self.rejected_rate = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        if self.rate is not None and not self.allow_client(scope):
+            self.rejected_rate += 1
+            await self.reject(send, RATE_LIMITED)
+            return
+        if not await self.acquire():
+            self.rejected_overload += 1
+            await self.reject(send, OVERLOADED)
+            return
+        self.admitted += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.release()
+
+    def allow_client(self, scope):
+        key = None
+        for name, value in scope["headers"]:
+            if name == self.key_header:
+                key = value
+                break
+        if key is None:
+            return True
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_clients:
+                # Forget the least recently created bucket
+                del self.buckets[next(iter(self.buckets))]
+            bucket = self.buckets[key] = TokenBucket(self.burst, now)
+        return bucket.take(self.rate, self.burst, now)
+
+    async def acquire(self):
+        if self.active < self.max_concurrency and not self.waiters:
+            self.active += 1
+            return True
+        if len(self.waiters) >= self.max_queue:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # release() handed over a slot just as this request gave up: pass it on
+                self.release()
+            else:
+                try:
+                    self.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return False
+        # The slot was handed over by release(), so self.active is already counted
+        return True
+
+    def release(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @staticmethod
+    async def reject(send, response):
+        start, body = response
+        await send({**start, "headers": list(start["headers"])})
+        await send(body)
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "queued": len(self.waiters),
+            "admitted": self.admitted,
+            "rejected_overload": self.rejected_overload,
+            "rejected_rate": self.rejected_rate,
+        }
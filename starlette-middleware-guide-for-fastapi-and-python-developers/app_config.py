@@ -0,0 +1,21 @@
+import os
+import sys
+
+# The config loader lives with the configuration article's files
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "ini- vs-yaml-working-with-configuration-files-in-python")
+if CONFIG_DIR not in sys.path:
+    sys.path.append(CONFIG_DIR)
+
+from config_loader import load_config  # noqa: E402
+from config_snapshot import load_config_snapshot  # noqa: E402
+
+# Point HONEYBADGER_CONFIG at another .ini or .yaml file to override the default
+CONFIG_FILE = os.environ.get("HONEYBADGER_CONFIG", os.path.join(CONFIG_DIR, "server-config.ini"))
+
+
+# Define a function that returns the shared, hot-reloading loader for the app config.
+# Each worker reads the config from its precompiled snapshot, which the first one to
+# start (or reload) after an edit rebuilds.
+def config_loader(path=CONFIG_FILE):
+    return load_config(path, parser=load_config_snapshot)
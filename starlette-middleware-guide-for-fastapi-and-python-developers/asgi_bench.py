@@ -0,0 +1,149 @@
+import asyncio
+import json
+import time
+
+
+# Build a minimal HTTP scope for calling an ASGI app in-process
+def make_scope(method, path, headers=()):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("latin-1"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": list(headers),
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+# Call an ASGI app once and return the status, headers and body of the response
+async def call_asgi(app, method, path, body=b"", headers=()):
+    if body:
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())] + list(headers)
+    scope = make_scope(method, path, headers)
+    request_messages = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {"status": None, "headers": [], "body": []}
+    disconnected = asyncio.Event()
+
+    async def receive():
+        if request_messages:
+            return request_messages.pop()
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body", False):
+                disconnected.set()
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], b"".join(response["body"])
+
+
+def encode_body(body):
+    if isinstance(body, (dict, list)):
+        return json.dumps(body).encode()
+    return body
+
+
+# Run `requests` calls against the app with `concurrency` concurrent clients.
+# `body` may also be a function of the request index, to send distinct bodies.
+async def run_load(app, method, path, body=b"", concurrency=1, requests=1000, headers=()):
+    latencies = []
+    statuses = {}
+    remaining = iter(range(requests))
+
+    async def client():
+        for index in remaining:
+            request_body = encode_body(body(index) if callable(body) else body)
+            start_time = time.perf_counter()
+            status, _, _ = await call_asgi(app, method, path, request_body, headers)
+            latencies.append(time.perf_counter() - start_time)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+    return summarize(latencies, elapsed, concurrency, statuses)
+
+
+# Send one HTTP/1.1 request over an open keep-alive connection and read the response
+async def http_request(reader, writer, host, method, path, body=b"", headers=()):
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}"]
+    if body:
+        lines.append("Content-Type: application/json")
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    status = int(status_line.split(" ", 2)[1])
+    length = 0
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+# Same as run_load, but against a real server over `concurrency` keep-alive connections
+async def run_http_load(host, port, method, path, body=b"", concurrency=1, requests=1000, headers=()):
+    latencies = []
+    statuses = {}
+    remaining = iter(range(requests))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for index in remaining:
+                request_body = encode_body(body(index) if callable(body) else body)
+                start_time = time.perf_counter()
+                try:
+                    status, _ = await http_request(reader, writer, host, method, path, request_body, headers)
+                except (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError):
+                    # The server closed the idle keep-alive connection (for example a worker
+                    # draining during a restart): reconnect and send the request again
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(host, port)
+                    status, _ = await http_request(reader, writer, host, method, path, request_body, headers)
+                latencies.append(time.perf_counter() - start_time)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+    return summarize(latencies, elapsed, concurrency, statuses)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# Reduce raw latencies to requests/sec and latency percentiles in milliseconds
+def summarize(latencies, elapsed, concurrency, statuses=None):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 4) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4) if latencies else 0.0,
+        "statuses": {str(status): count for status, count in sorted((statuses or {}).items())},
+    }
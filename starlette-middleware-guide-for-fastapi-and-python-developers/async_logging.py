@@ -0,0 +1,175 @@
+import atexit
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from itertools import groupby, repeat, starmap
+from operator import itemgetter
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40, "critical": 50}
+MILLISECONDS = [f"{millisecond:03d}" for millisecond in range(1000)]
+LEVEL_NAMES = {number: f" {name.upper()} " for name, number in LEVELS.items()}
+LEVEL_METHODS = {number: name for name, number in LEVELS.items()}
+# Loggers that have not been closed yet; a single atexit hook flushes them all
+OPEN_LOGGERS = weakref.WeakSet()
+
+
+@atexit.register
+def close_all():
+    for logger in list(OPEN_LOGGERS):
+        logger.close()
+
+
+def ignore(message):
+    pass
+
+
+# Define a function that opens the log file for buffered appends, falling back
+# to stderr when the configured file cannot be opened (for example /var/log
+# when not running as root)
+def open_log_file(path, buffer_size=1 << 16):
+    if path:
+        try:
+            return open(path, "a", buffering=buffer_size, encoding="utf-8")
+        except OSError as exc:
+            print(f"Cannot open log file {path}: {exc}; logging to stderr", file=sys.stderr)
+    return sys.stderr
+
+
+# Logger whose callers never block on I/O. log() only appends a (millisecond,
+# level, message) tuple to a deque, which is atomic without taking a lock; a
+# background writer thread wakes every flush_interval seconds, formats everything
+# queued and writes it with one buffered write and flush. Records beyond
+# max_queue are dropped and counted rather than slowing requests down.
+class BatchLogger:
+    def __init__(self, path=None, level="info", flush_interval=0.05, max_queue=100000):
+        self.file = open_log_file(path)
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.queue = deque()
+        self.dropped = 0
+        self.written = 0
+        self.set_level(level)
+        self.stopped = threading.Event()
+        self.writer = threading.Thread(target=self.run, name="log-writer", daemon=True)
+        self.writer.start()
+        OPEN_LOGGERS.add(self)
+
+    # Build a logger from the [logging] section and follow later level changes
+    @classmethod
+    def from_config(cls, loader, **kwargs):
+        logger = cls(loader.config.logging.file, loader.config.logging.level, **kwargs)
+
+        def update_level(config, changes):
+            if "logging.level" in changes:
+                logger.set_level(config.logging.level)
+
+        loader.subscribe(update_level)
+        return logger
+
+    # debug(), info() and the other level methods are set here: a recorder closure for
+    # the levels that are logged and a no-op for the rest, so a call from the request
+    # path is a single function call with no level lookup
+    def set_level(self, level):
+        self.level = LEVELS[level.lower()]
+        for name, number in LEVELS.items():
+            setattr(self, name, self.recorder(number) if number >= self.level else ignore)
+
+    def recorder(self, level):
+        queue, max_queue, now = self.queue, self.max_queue, time.time_ns
+
+        def record(message):
+            if len(queue) < max_queue:
+                queue.append((now() // 1000000, level, message))
+            else:
+                self.dropped += 1
+
+        return record
+
+    def log(self, level, message):
+        getattr(self, LEVEL_METHODS[level])(message)
+
+    def run(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        queue = self.queue
+        count = len(queue)
+        if not count:
+            return
+        parts = []
+        second, date = None, ""
+        # Records logged in one burst share a millisecond and a level, so each run of
+        # them gets one prefix and one join rather than a Python step per line
+        for (millisecond, level), group in groupby(starmap(queue.popleft, repeat((), count)), key=itemgetter(0, 1)):
+            if millisecond // 1000 != second:
+                second = millisecond // 1000
+                date = time.strftime("%Y-%m-%d %H:%M:%S.", time.localtime(second))
+            prefix = date + MILLISECONDS[millisecond % 1000] + LEVEL_NAMES[level]
+            parts.append(prefix)
+            parts.append(("\n" + prefix).join(map(itemgetter(2), group)))
+            parts.append("\n")
+        self.file.write("".join(parts))
+        self.file.flush()
+        self.written += count
+
+    def close(self):
+        if not self.stopped.is_set():
+            OPEN_LOGGERS.discard(self)
+            self.stopped.set()
+            self.writer.join()
+            if self.file is not sys.stderr:
+                self.file.close()
+
+    def stats(self):
+        return {"queued": len(self.queue), "written": self.written, "dropped": self.dropped}
+
+
+# Shared logger configured from the app's [logging] section, created on first use
+LOGGER = None
+
+
+def get_logger():
+    global LOGGER
+    if LOGGER is None:
+        from app_config import config_loader
+
+        loader = config_loader().start()
+        LOGGER = BatchLogger.from_config(loader)
+    return LOGGER
+
+
+# Pure ASGI middleware that writes one access log line per HTTP request: client,
+# request line, status and duration. Without a logger it uses get_logger() from the
+# first request on, so importing an app does not start the config watcher or the
+# writer thread.
+class AccessLogMiddleware:
+    def __init__(self, app, logger=None):
+        self.app = app
+        self.logger = logger
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.logger is None:
+            self.logger = get_logger()
+        start_time = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            client = scope.get("client")
+            self.logger.info(f'{f"{client[0]}:{client[1]}" if client else "-"} "{scope["method"]} {scope["path"]} '
+                             f'HTTP/{scope.get("http_version", "1.1")}" {status} '
+                             f'{(time.perf_counter() - start_time) * 1000:.2f}ms')
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import time
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from admission_control import AdmissionControlMiddleware
+from asgi_bench import call_asgi, summarize
+
+
+# A handler that yields once and then holds the event loop for `service_time`,
+# so the app can only serve about 1 / service_time requests per second
+def make_handler(service_time):
+    async def work(request: Request):
+        await asyncio.sleep(0)
+        deadline = time.perf_counter() + service_time
+        while time.perf_counter() < deadline:
+            pass
+        return PlainTextResponse("ok")
+
+    return work
+
+
+def build_app(service_time, admission):
+    app = Starlette(routes=[Route("/", make_handler(service_time))])
+    if admission is not None:
+        app.add_middleware(AdmissionControlMiddleware, **admission)
+    return app
+
+
+# Offer `clients` concurrent closed-loop clients for `duration` seconds and summarize
+# the latency of admitted (200) and rejected requests separately
+async def offer_load(app, clients, duration):
+    latencies = {}
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        while time.perf_counter() < deadline:
+            start_time = time.perf_counter()
+            status, _, _ = await call_asgi(app, "GET", "/")
+            latencies.setdefault(status, []).append(time.perf_counter() - start_time)
+            if status != 200:
+                # Back off a little like a real client would after a 503
+                await asyncio.sleep(0.001)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start_time
+    return {str(status): summarize(values, elapsed, clients) for status, values in sorted(latencies.items())}
+
+
+async def main(args):
+    variants = {
+        "unbounded": None,
+        "admission": {"max_concurrency": args.max_concurrency, "max_queue": args.max_queue,
+                      "queue_timeout": args.queue_timeout},
+    }
+    print(f"{'variant':<12}{'status':>8}{'count':>8}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, admission in variants.items():
+        app = build_app(args.service_time, admission)
+        for status, result in (await offer_load(app, args.clients, args.duration)).items():
+            print(f"{name:<12}{status:>8}{result['requests']:>8}{result['rps']:>10}{result['p50_ms']:>10.2f}"
+                  f"{result['p99_ms']:>10.2f}{result['max_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tail latency with and without admission control under overload.")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--service-time", type=float, default=0.0005)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
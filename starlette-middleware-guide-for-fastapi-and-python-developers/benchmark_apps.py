@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from asgi_bench import run_http_load, run_load
+
+# The calculator apps: bare FastAPI/Starlette and every way of adding middleware
+APPS = [
+    "calculator_app_fastapi",
+    "calculator_app_starlette",
+    "fastapiaddmiddleware",
+    "fastapiconstructormiddleware",
+    "fastapidecoratormiddleware",
+    "fastapimultiplemiddleware",
+    "starletteaddmiddleware",
+    "starletteaddmultiple",
+    "starletteconstructormiddleware",
+]
+
+
+# Each /calculate/ request gets different operands unless --repeat-body is given,
+# so that the response cache of the calculator apps does not hide the real cost
+def calculate_body(repeat_body):
+    if repeat_body:
+        return {"num1": 7, "num2": 3, "operation": "multiply"}
+    operands = itertools.count()
+    return lambda index: {"num1": next(operands), "num2": 3, "operation": "multiply"}
+
+
+def endpoints(repeat_body):
+    return {
+        "/": ("GET", "/", b""),
+        "/calculate/": ("POST", "/calculate/", calculate_body(repeat_body)),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+# Start a local uvicorn worker serving `module:app` from this directory
+def start_uvicorn(module, port):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    try:
+        wait_for_port(port)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process
+
+
+async def benchmark_app(module, args):
+    results = []
+    process = None
+    if args.uvicorn:
+        port = free_port()
+        process = start_uvicorn(module, port)
+    else:
+        app = importlib.import_module(module).app
+    try:
+        for name, (method, path, body) in endpoints(args.repeat_body).items():
+            if args.endpoints and name not in args.endpoints:
+                continue
+            for concurrency in args.concurrency:
+                if args.uvicorn:
+                    await run_http_load("127.0.0.1", port, method, path, body, concurrency, args.warmup)
+                    summary = await run_http_load("127.0.0.1", port, method, path, body, concurrency, args.requests)
+                else:
+                    await run_load(app, method, path, body, concurrency, args.warmup)
+                    summary = await run_load(app, method, path, body, concurrency, args.requests)
+                results.append({"app": module, "endpoint": name, **summary})
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return results
+
+
+# Compare requests/sec against a previous report and list every result that got
+# slower than the allowed tolerance
+def find_regressions(results, baseline, tolerance):
+    previous = {(item["app"], item["endpoint"], item["concurrency"]): item for item in baseline["results"]}
+    regressions = []
+    for item in results:
+        old = previous.get((item["app"], item["endpoint"], item["concurrency"]))
+        if old and item["rps"] < old["rps"] * (1 - tolerance):
+            regressions.append({"app": item["app"], "endpoint": item["endpoint"], "concurrency": item["concurrency"],
+                                "baseline_rps": old["rps"], "rps": item["rps"]})
+    return regressions
+
+
+async def main(args):
+    results = []
+    for module in args.apps:
+        results.extend(await benchmark_app(module, args))
+    report = {
+        "mode": "uvicorn" if args.uvicorn else "in-process",
+        "python": sys.version.split()[0],
+        "requests": args.requests,
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            report["regressions"] = find_regressions(results, json.load(baseline_file), args.tolerance)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the calculator apps and report JSON results.")
+    parser.add_argument("--apps", nargs="+", default=APPS, choices=APPS)
+    parser.add_argument("--endpoints", nargs="+", choices=["/", "/calculate/"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--uvicorn", action="store_true", help="run each app under a local uvicorn worker")
+    parser.add_argument("--repeat-body", action="store_true", help="send the same /calculate/ body every time")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="previous JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed requests/sec drop, as a fraction")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import timeit
+from history import CalculationHistory
+
+CONTENT = {"type": "SUCCESS", "output": 42.0}
+
+
+async def measure(url, batch_size, pool_size, records):
+    history = CalculationHistory(url, pool_size=pool_size, batch_size=batch_size, flush_interval=0.01)
+    start_time = time.perf_counter()
+    for index in range(records):
+        history.record("multiply", index, 6, 200, CONTENT)
+        # Give the flusher a turn now and then, as a server between requests would
+        if index % 1000 == 0:
+            await asyncio.sleep(0)
+    await history.close()
+    elapsed = time.perf_counter() - start_time
+    assert history.written == records, history.stats()
+    return records / elapsed
+
+
+# Cost of record() on the request path, with nothing being flushed
+def record_cost():
+    async def run():
+        history = CalculationHistory("sqlite://", flush_interval=3600)
+        history.record("add", 1, 2, 200, CONTENT)
+        seconds = timeit.timeit(lambda: history.record("add", 1, 2, 200, CONTENT), number=50000)
+        history.pending.clear()
+        await history.close()
+        return seconds / 50000 * 1e9
+
+    return asyncio.run(run())
+
+
+def main(records, batch_sizes, pool_size):
+    print(f"record(): {record_cost():.0f} ns per call")
+    print(f"{'batch size':<12}{'rows/s':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for batch_size in batch_sizes:
+            url = f"sqlite:///{os.path.join(directory, f'history-{batch_size}.db')}"
+            rate = asyncio.run(measure(url, batch_size, pool_size, records))
+            print(f"{batch_size:<12}{rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calculation history write throughput by batch size.")
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 500, 2000])
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+    main(args.records, args.batch_sizes, args.pool_size)
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from asgi_bench import run_http_load
+from benchmark_apps import free_port
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# Start serve.py and wait until it reports that every worker is accepting connections
+def start_launcher(app, port, workers, reuse_port, directory):
+    command = [sys.executable, os.path.join(HERE, "serve.py"), app, "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--cpu-affinity"]
+    if reuse_port:
+        command.append("--reuse-port")
+    # Keep the calculation history database in the scratch directory
+    env = dict(os.environ, HONEYBADGER_HISTORY_URL=f"sqlite:///{os.path.join(directory, 'calculation-history.db')}")
+    process = subprocess.Popen(command, cwd=directory, env=env, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Serving"):
+        process.kill()
+        raise RuntimeError(f"launcher did not start: {line!r}")
+    return process
+
+
+# One load-generating process: distinct operands per request so the response cache does not answer
+def client_load(port, client, concurrency, requests):
+    operands = itertools.count(client * 10 ** 9)
+    body = lambda index: {"num1": next(operands), "num2": 3, "operation": "multiply"}  # noqa: E731
+    return asyncio.run(run_http_load("127.0.0.1", port, "POST", "/calculate/", body, concurrency, requests))
+
+
+def offer_load(port, clients, concurrency, requests, on_start=None):
+    with ProcessPoolExecutor(max_workers=clients) as executor:
+        start_time = time.perf_counter()
+        futures = [executor.submit(client_load, port, client, concurrency, requests // clients)
+                   for client in range(clients)]
+        if on_start is not None:
+            on_start()
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start_time
+    statuses = {}
+    for result in results:
+        for status, count in result["statuses"].items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {
+        "rps": sum(result["requests"] for result in results) / elapsed,
+        "p99_ms": max(result["p99_ms"] for result in results),
+        "statuses": statuses,
+    }
+
+
+def main(args):
+    cpus = os.cpu_count() or 1
+    print(f"{cpus} CPUs, {args.clients} client processes x {args.concurrency} connections")
+    if max(args.workers) + args.clients > cpus:
+        # Workers and clients then compete for the same cores, so scaling says little about the launcher
+        print(f"Note: up to {max(args.workers)} workers and {args.clients} clients share {cpus} CPUs; "
+              f"scaling beyond {max(1, cpus - args.clients)} workers is not measured")
+    print(f"{'app':<28}{'workers':>8}{'rps':>10}{'scaling':>9}{'p99 ms':>9}  statuses")
+    with tempfile.TemporaryDirectory() as directory:
+        for app in args.apps:
+            single = None
+            for workers in args.workers:
+                port = free_port()
+                process = start_launcher(app, port, workers, args.reuse_port, directory)
+                try:
+                    offer_load(port, args.clients, args.concurrency, min(args.requests, 2000))  # warm up
+                    # With --rolling-restart, every worker is replaced while the measured load runs
+                    on_start = (lambda: process.send_signal(signal.SIGHUP)) if args.rolling_restart else None
+                    result = offer_load(port, args.clients, args.concurrency, args.requests, on_start)
+                finally:
+                    process.terminate()
+                    process.wait()
+                single = single or result["rps"] / workers
+                print(f"{app:<28}{workers:>8}{result['rps']:>10.0f}{result['rps'] / single / workers:>8.0%}"
+                      f"{result['p99_ms']:>9.2f}  {result['statuses']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Requests/sec of the calculator apps by number of serve.py workers.")
+    parser.add_argument("--apps", nargs="+", default=["calculator_app_fastapi:app", "calculator_app_starlette:app"])
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--clients", type=int, default=max(2, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--reuse-port", action="store_true")
+    parser.add_argument("--rolling-restart", action="store_true", help="send SIGHUP once the measured load starts")
+    main(parser.parse_args())
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from asgi_bench import call_asgi, run_load, summarize
+from async_logging import BatchLogger
+from middleware_chain import CompiledMiddleware, Tag
+
+
+async def root(request: Request):
+    return PlainTextResponse("ok")
+
+
+# Eight Tagger-style hooks, as in middleware_execution_order.py, each logging twice per request
+def build_app(log, depth):
+    app = Starlette(routes=[Route("/", root)])
+    app.add_middleware(CompiledMiddleware, hooks=[Tag(f"M{index}", log) for index in range(1, depth + 1)])
+    return app
+
+
+def print_to(file):
+    def log(message):
+        print(message, file=file)
+
+    return log
+
+
+# print() of the same "date time.ms LEVEL message" lines as BatchLogger
+def print_timestamped_to(file):
+    def log(message):
+        now = time.time()
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}.{int(now % 1 * 1000):03d} INFO {message}",
+              file=file)
+
+    return log
+
+
+# The standard library logger writing the same "date time.ms LEVEL message" lines as BatchLogger
+def logging_to(file):
+    handler = logging.StreamHandler(file)
+    handler.setFormatter(logging.Formatter("%(asctime)s.%(msecs)03d %(levelname)s %(message)s", "%Y-%m-%d %H:%M:%S"))
+    logger = logging.getLogger(f"benchmark-{id(file)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger.info
+
+
+# Define a function that sends one request every 1/rate seconds, so the event loop is idle between
+# requests the way a server below saturation is, and returns the latency summary
+async def run_paced(app, requests, rate):
+    latencies = []
+    start_time = time.perf_counter()
+    for index in range(requests):
+        await asyncio.sleep(max(0.0, start_time + index / rate - time.perf_counter()))
+        request_start = time.perf_counter()
+        await call_asgi(app, "GET", "/")
+        latencies.append(time.perf_counter() - request_start)
+    return summarize(latencies, time.perf_counter() - start_time, 1)
+
+
+async def measure(log, depth, requests, concurrency, rate):
+    app = build_app(log, depth)
+    await run_load(app, "GET", "/", concurrency=concurrency, requests=min(requests, 500))  # warm up
+    if rate:
+        return await run_paced(app, requests, rate)
+    return await run_load(app, "GET", "/", concurrency=concurrency, requests=requests)
+
+
+async def main(depth, requests, concurrency, rate, paced_requests):
+    with tempfile.TemporaryDirectory() as directory:
+        def log_file(name, **kwargs):
+            return open(os.path.join(directory, name), "w", encoding="utf-8", **kwargs)
+
+        variants = {
+            # print() to a terminal or under `python -u` flushes every line; redirected to a file it is block
+            # buffered. Neither writes a timestamp or a level, so they only bound what a log line can cost.
+            "print, line buffered": lambda: print_to(log_file("line.log", buffering=1)),
+            "print, block buffered": lambda: print_to(log_file("block.log")),
+            # Lines identical to BatchLogger's
+            "print + timestamp, block": lambda: print_timestamped_to(log_file("timestamped.log")),
+            # ... from a handler that flushes every record
+            "logging module": lambda: logging_to(log_file("logging.log")),
+            "BatchLogger": lambda: BatchLogger(os.path.join(directory, "batch.log")).info,
+        }
+        loads = [(f"{concurrency} back-to-back client(s), CPU saturated", requests, 0)]
+        if rate:
+            loads.append((f"one request every {1e6 / rate:.0f} µs, loop idle in between", paced_requests, rate))
+        for load, load_requests, load_rate in loads:
+            print(f"{depth * 2} log lines per request, {load}")
+            print(f"{'variant':<24}{'rps':>10}{'mean µs':>10}{'p50 µs':>10}{'p99 µs':>10}")
+            for name, make_log in variants.items():
+                result = await measure(make_log(), depth, load_requests, concurrency, load_rate)
+                print(f"{name:<24}{result['rps']:>10.0f}{result['mean_ms'] * 1000:>10.1f}"
+                      f"{result['p50_ms'] * 1000:>10.1f}{result['p99_ms'] * 1000:>10.1f}")
+            print()
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Request latency with print(), logging and BatchLogger "
+                                                 "middleware logging.")
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=20000, help="requests in the saturated run")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=1000,
+                        help="requests per second in the paced run; 0 skips it")
+    parser.add_argument("--paced-requests", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(main(args.depth, args.requests, args.concurrency, args.rate, args.paced_requests))
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from asgi_bench import run_load
+from middleware_chain import CompiledMiddleware
+
+
+# A silent hook doing a comparable amount of work to Tagger, without the print calls
+class CountingHook:
+    def __init__(self):
+        self.requests = 0
+        self.responses = 0
+
+    def on_request(self, scope):
+        self.requests += 1
+
+    def on_response(self, scope, message):
+        self.responses += 1
+
+
+# Tagger-style middleware running one hook: its own call frame and send wrapper
+class StackedMiddleware:
+    def __init__(self, app, hook):
+        self.app = app
+        self.hook = hook
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.hook.on_request(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                self.hook.on_response(scope, message)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+async def root(request: Request):
+    return PlainTextResponse("ok")
+
+
+def build_app(depth, compiled):
+    app = Starlette(routes=[Route("/", root)])
+    hooks = [CountingHook() for _ in range(depth)]
+    if compiled:
+        app.add_middleware(CompiledMiddleware, hooks=hooks)
+    else:
+        for hook in hooks:
+            app.add_middleware(StackedMiddleware, hook=hook)
+    return app
+
+
+async def main(max_depth, requests, concurrency):
+    baseline = await run_load(build_app(0, False), "GET", "/", concurrency=concurrency, requests=requests)
+    print(f"no middleware: {baseline['mean_ms'] * 1000:.2f} µs/request")
+    print(f"{'depth':<8}{'stacked µs':>12}{'compiled µs':>13}{'stacked overhead':>18}{'compiled overhead':>19}")
+    for depth in range(1, max_depth + 1):
+        timings = []
+        for compiled in (False, True):
+            app = build_app(depth, compiled)
+            await run_load(app, "GET", "/", concurrency=concurrency, requests=min(requests, 500))  # warm up
+            result = await run_load(app, "GET", "/", concurrency=concurrency, requests=requests)
+            timings.append(result["mean_ms"] * 1000)
+        stacked, compiled = timings
+        base = baseline["mean_ms"] * 1000
+        print(f"{depth:<8}{stacked:>12.2f}{compiled:>13.2f}{stacked - base:>18.2f}{compiled - base:>19.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-request cost of stacked vs compiled middleware chains.")
+    parser.add_argument("--max-depth", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.max_depth, args.requests, args.concurrency))
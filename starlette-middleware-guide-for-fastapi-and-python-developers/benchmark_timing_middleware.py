@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import time
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from asgi_bench import run_load
+from timing_middleware import TimingMiddleware
+
+
+# The original BaseHTTPMiddleware implementation, kept here as the baseline
+class BaseHTTPTimingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        duration = time.perf_counter() - start_time
+        response.headers["X-Process-Time"] = f"{duration:.4f}s"
+        return response
+
+
+async def root(request: Request):
+    return JSONResponse(
+        status_code=200,
+        content={"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."},
+    )
+
+
+def build_app(middleware_class=None):
+    app = Starlette(routes=[Route("/", root)])
+    if middleware_class is not None:
+        app.add_middleware(middleware_class)
+    return app
+
+
+VARIANTS = {
+    "none": None,
+    "basehttp": BaseHTTPTimingMiddleware,
+    "asgi": TimingMiddleware,
+}
+
+
+async def main(concurrency_levels, requests):
+    print(f"{'variant':<10}{'concurrency':>12}{'rps':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for concurrency in concurrency_levels:
+        for name, middleware_class in VARIANTS.items():
+            app = build_app(middleware_class)
+            await run_load(app, "GET", "/", concurrency=concurrency, requests=min(requests, 200))  # warm up
+            result = await run_load(app, "GET", "/", concurrency=concurrency, requests=requests)
+            print(f"{name:<10}{concurrency:>12}{result['rps']:>12}{result['p50_ms']:>10}"
+                  f"{result['p95_ms']:>10}{result['p99_ms']:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare BaseHTTPMiddleware and pure ASGI timing middleware.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests))
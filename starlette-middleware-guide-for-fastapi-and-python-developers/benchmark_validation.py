@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import timeit
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel
+from asgi_bench import run_load
+from fast_json import FastJSONResponse, FastJSONRoute, loads
+from fast_validation import CalculationValidator
+
+BODIES = {
+    "valid": b'{"num1": 12.5, "num2": 3, "operation": "multiply"}',
+    "string numbers": b'{"num1": "12.5", "num2": "3", "operation": "multiply"}',
+    "unknown operation": b'{"num1": 12.5, "num2": 3, "operation": "modulo"}',
+    "invalid": b'{"num1": "x", "num2": null}',
+}
+
+
+# Same model as the FastAPI calculator apps
+class InputData(BaseModel):
+    num1: float
+    num2: float
+    operation: str
+
+
+validator = CalculationValidator()
+
+
+# What FastAPI does for a body parameter: decode, then validate the dict
+def pydantic_validate(body):
+    return InputData.model_validate(loads(body))
+
+
+def pydantic_validate_json(body):
+    return InputData.model_validate_json(body)
+
+
+def compiled_validate(body):
+    return validator(body)
+
+
+def time_per_call(func, body, number):
+    def call():
+        try:
+            func(body)
+        except (ValueError, RequestValidationError, HTTPException):
+            pass
+
+    return min(timeit.repeat(call, number=number, repeat=5)) / number * 1e9
+
+
+def build_app():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.router.route_class = FastJSONRoute
+
+    @app.post("/pydantic/")
+    async def pydantic_calculation(input_data: InputData):
+        return {"type": "SUCCESS", "output": input_data.num1 * input_data.num2}
+
+    @app.post("/compiled/")
+    async def compiled_calculation(request: Request):
+        input_data = validator(await request.body())
+        return {"type": "SUCCESS", "output": input_data.num1 * input_data.num2}
+
+    return app
+
+
+async def end_to_end(requests):
+    app = build_app()
+    headers = [(b"content-type", b"application/json")]
+    results = {}
+    for path in ("/pydantic/", "/compiled/"):
+        await run_load(app, "POST", path, BODIES["valid"], concurrency=1, requests=500, headers=headers)  # warm up
+        result = await run_load(app, "POST", path, BODIES["valid"], concurrency=1, requests=requests, headers=headers)
+        results[path] = result["mean_ms"] * 1000
+    return results
+
+
+def main(number, requests):
+    variants = {
+        "pydantic (dict)": pydantic_validate,
+        "pydantic (json)": pydantic_validate_json,
+        "compiled": compiled_validate,
+    }
+    print(f"{'body':<20}" + "".join(f"{name + ' ns':>20}" for name in variants) + f"{'speedup':>10}")
+    for label, body in BODIES.items():
+        timings = [time_per_call(func, body, number) for func in variants.values()]
+        print(f"{label:<20}" + "".join(f"{value:>20.0f}" for value in timings) + f"{timings[0] / timings[-1]:>9.1f}x")
+    results = asyncio.run(end_to_end(requests))
+    print("end to end: " + ", ".join(f"{path.strip('/')} {value:.2f} µs/request" for path, value in results.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-request validation cost of InputData vs the compiled validator.")
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    main(args.number, args.requests)
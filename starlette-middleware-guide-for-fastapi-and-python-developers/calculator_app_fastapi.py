@@ -1,15 +1,63 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Union
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from response_cache import ResponseCache, ResponseCacheMiddleware
+from single_flight import SingleFlightMiddleware
+from streaming import NDJSONCalculator, websocket_endpoint
+from admission_control import AdmissionControlMiddleware
+from operations import evaluate
+from fast_validation import CalculationValidator
+from history import CalculationHistory, HistoryMiddleware
+from expressions import evaluate_expression
+from app_config import config_loader
+from async_logging import AccessLogMiddleware
+from fast_json import FastJSONResponse, FastJSONRoute, RawJSONResponse, dumps
 
-app = FastAPI()
+# Keep an audit trail of calculations, written in batches by a background task
+history = CalculationHistory.from_config(config_loader(), batch_size=500, flush_interval=0.1)
+
+
+# Open the history database and start watching the config file for changes when the
+# server starts; write the queued history records before it exits
+@asynccontextmanager
+async def lifespan(app):
+    config_loader().start()
+    await history.open()
+    yield
+    await history.close()
+
+
+app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan)
+app.router.route_class = FastJSONRoute
+
+# Let concurrent identical /calculate/ requests share one computation
+app.add_middleware(SingleFlightMiddleware)
+
+# Serve repeated /calculate/ requests from a bounded LRU cache that follows the [cache] section
+response_cache = ResponseCache.from_config(config_loader())
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+
+# Record /calculate/ calls outside the cache and single-flight layers, so cached and
+# coalesced responses are recorded too; batch, stream and WebSocket items are
+# recorded by calculate_item
+app.add_middleware(HistoryMiddleware, history=history)
+
+# Bound the number of concurrent requests and rate-limit each X-API-Key
+app.add_middleware(AdmissionControlMiddleware, max_concurrency=256, max_queue=1024, rate=1000, burst=2000)
+
+# Write one access log line per request through the batched logger of the [logging] section
+app.add_middleware(AccessLogMiddleware)
+
+
+# Encode the constant root API response once
+METADATA = dumps({"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
 
 
 # Define the root API endpoint
 @app.get("/")
 async def root():
-    return JSONResponse(status_code=200,
-                        content={"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
+    return RawJSONResponse(METADATA)
 
 
 # Define the input data model
@@ -19,23 +67,86 @@ class InputData(BaseModel):
     operation: str
 
 
-# Define the calculate API endpoint
-@app.post("/calculate/")
-async def calculation(input_data: InputData):
-    num1 = input_data.num1
-    num2 = input_data.num2
-    operation = input_data.operation
-    if operation == "add":
-        result = num1 + num2
-    elif operation == "subtract":
-        result = num1 - num2
-    elif operation == "multiply":
-        result = num1 * num2
-    elif operation == "divide":
-        result = num1 / num2
-    else:
-        result = None
-    if result is None:
-        raise HTTPException(status_code=404, detail={"type": "FAILURE", "reason": "Not a valid operation"})
+# Define a function that evaluates a validated calculate request
+def calculate(operation, num1, num2):
+    status_code, content = evaluate(operation, num1, num2)
+    if status_code != 200:
+        raise HTTPException(status_code=status_code, detail=content)
     else:
-        return JSONResponse(status_code=200, content={"type": "SUCCESS", "output": result})
+        return FastJSONResponse(status_code=200, content=content)
+
+
+# Define the calculate API endpoint validating the body with the InputData model
+async def model_calculation(input_data: InputData):
+    return calculate(input_data.operation, input_data.num1, input_data.num2)
+
+
+# Define the calculate API endpoint validating the raw body with the compiled
+# CalculationValidator; the 422 and 404 responses are the same as the model's
+calculation_validator = CalculationValidator()
+
+
+async def fast_calculation(request: Request):
+    input_data = calculation_validator(await request.body())
+    return calculate(input_data.operation.value, input_data.num1, input_data.num2)
+
+
+# Pick the calculate API endpoint with fast_validation in the [server] section
+if config_loader().config.server.fast_validation:
+    # The raw Request parameter hides the body from the OpenAPI schema: describe it explicitly
+    app.post("/calculate/", openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": InputData.model_json_schema()}}}})(fast_calculation)
+else:
+    app.post("/calculate/")(model_calculation)
+
+
+# Define the expression input data model
+class ExpressionInput(BaseModel):
+    expression: str
+    variables: Dict[str, Any] = {}
+
+
+# Define the evaluate API endpoint
+@app.post("/evaluate/")
+async def evaluation(input_data: ExpressionInput):
+    status_code, content = evaluate_expression(input_data.expression, input_data.variables)
+    if status_code != 200:
+        raise HTTPException(status_code=status_code, detail=content)
+    return FastJSONResponse(status_code=200, content=content)
+
+
+# Define the columnar input data model for batch calculations
+class BatchColumns(BaseModel):
+    num1: List[Any]
+    num2: List[Any]
+    operation: List[Any]
+
+
+# Define a function that evaluates a single item of a batch
+def calculate_item(item):
+    try:
+        input_data = InputData.model_validate(item)
+    except ValidationError:
+        return {"type": "FAILURE", "reason": "Invalid input"}
+    status_code, content = evaluate(input_data.operation, input_data.num1, input_data.num2)
+    history.record(input_data.operation, input_data.num1, input_data.num2, status_code, content)
+    return content
+
+
+# Define the batch calculate API endpoint. Items are validated one by one, so an item
+# that is not a calculation fails on its own instead of rejecting the whole batch.
+@app.post("/calculate/batch/")
+async def batch_calculation(input_data: Union[List[Any], BatchColumns]):
+    if isinstance(input_data, BatchColumns):
+        if not len(input_data.num1) == len(input_data.num2) == len(input_data.operation):
+            raise HTTPException(status_code=422,
+                                detail={"type": "FAILURE", "reason": "Columns must have the same length"})
+        input_data = [{"num1": num1, "num2": num2, "operation": operation}
+                      for num1, num2, operation in zip(input_data.num1, input_data.num2, input_data.operation)]
+    return FastJSONResponse(status_code=200,
+                            content={"type": "SUCCESS", "output": [calculate_item(item) for item in input_data]})
+
+
+# Define the streaming calculate API endpoints: NDJSON over HTTP and WebSocket
+app.add_route("/calculate/stream/", NDJSONCalculator(calculate_item), methods=["POST"])
+app.add_api_websocket_route("/calculate/ws", websocket_endpoint(calculate_item))
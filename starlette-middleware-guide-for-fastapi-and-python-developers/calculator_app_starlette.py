@@ -1,42 +1,140 @@
+from contextlib import asynccontextmanager
 from starlette.applications import Starlette
 from starlette.requests import Request
-from starlette.responses import JSONResponse
-from starlette.routing import Route
+from starlette.routing import Route, WebSocketRoute
+from response_cache import ResponseCache, ResponseCacheMiddleware
+from single_flight import SingleFlightMiddleware
+from streaming import NDJSONCalculator, websocket_endpoint
+from admission_control import AdmissionControlMiddleware
+from execution_policy import ExecutionPolicy
+from fast_json import FastJSONResponse, RawJSONResponse, dumps, loads
+from history import CalculationHistory, HistoryMiddleware
+from expressions import evaluate_expression
+from app_config import config_loader
+from async_logging import AccessLogMiddleware
+
+
+# Encode the constant root API response once
+METADATA = dumps({"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
 
 
 # Define a function for the root API endpoint
 async def root(request: Request):
-    return JSONResponse(
-        status_code=200,
-        content={"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."},
-    )
+    return RawJSONResponse(METADATA)
+
+
+# Run cheap calculations inline and send huge-integer ones to a process pool
+execution_policy = ExecutionPolicy()
+
+# Keep an audit trail of calculations, written in batches by a background task
+history = CalculationHistory.from_config(config_loader(), batch_size=500, flush_interval=0.1)
 
 
 # Define a function for the calculate API endpoint
 async def calculation(request: Request):
-    data = await request.json()
+    # The response cache middleware has usually decoded the body already
+    data = request.scope.get("state", {}).get("request_json")
+    if data is None:
+        data = loads(await request.body())
     num1, num2, operation = data["num1"], data["num2"], data["operation"]
-    if operation == "add":
-        result = num1 + num2
-    elif operation == "subtract":
-        result = num1 - num2
-    elif operation == "multiply":
-        result = num1 * num2
-    elif operation == "divide":
-        result = num1 / num2
-    else:
-        return JSONResponse(
-            status_code=404,
-            content={"type": "FAILURE", "reason": "Not a valid operation"},
+    status_code, content = await execution_policy.evaluate(operation, num1, num2)
+    return FastJSONResponse(status_code=status_code, content=content)
+
+
+# Define a function for the evaluate API endpoint
+async def evaluation(request: Request):
+    try:
+        data = loads(await request.body())
+    except ValueError:
+        # Malformed JSON is reported like any other body that is not an expression
+        data = None
+    expression = data.get("expression") if isinstance(data, dict) else None
+    variables = data.get("variables", {}) if isinstance(data, dict) else None
+    if not isinstance(expression, str) or not isinstance(variables, dict):
+        return FastJSONResponse(status_code=400, content={"type": "FAILURE", "reason": "Invalid input"})
+    status_code, content = evaluate_expression(expression, variables)
+    return FastJSONResponse(status_code=status_code, content=content)
+
+
+# Define a function that evaluates a single item of a batch
+async def calculate_item(item):
+    try:
+        num1, num2, operation = item["num1"], item["num2"], item["operation"]
+    except (KeyError, TypeError):
+        return {"type": "FAILURE", "reason": "Invalid input"}
+    status_code, content = await execution_policy.evaluate(operation, num1, num2)
+    history.record(operation, num1, num2, status_code, content)
+    return content
+
+
+# Define a function for the batch calculate API endpoint. Bodies that are not a list
+# of operations or same-length columns get 422, like the FastAPI app's validation.
+async def batch_calculation(request: Request):
+    try:
+        data = loads(await request.body())
+    except ValueError:
+        return FastJSONResponse(status_code=422, content={"type": "FAILURE", "reason": "Invalid JSON"})
+    if isinstance(data, dict):
+        try:
+            columns = data["num1"], data["num2"], data["operation"]
+        except KeyError:
+            columns = None
+        if columns is None or not all(isinstance(column, list) for column in columns) \
+                or not len(columns[0]) == len(columns[1]) == len(columns[2]):
+            return FastJSONResponse(
+                status_code=422,
+                content={"type": "FAILURE", "reason": "Columns must be lists of the same length"},
+            )
+        data = [{"num1": num1, "num2": num2, "operation": operation} for num1, num2, operation in zip(*columns)]
+    elif not isinstance(data, list):
+        return FastJSONResponse(
+            status_code=422,
+            content={"type": "FAILURE", "reason": "Expected a list of operations or columns"},
         )
-    return JSONResponse(status_code=200, content={"type": "SUCCESS", "output": result})
+    return FastJSONResponse(
+        status_code=200,
+        content={"type": "SUCCESS", "output": [await calculate_item(item) for item in data]},
+    )
 
 
 # Define the API endpoints
 routes = [
     Route("/", root),
     Route("/calculate/", calculation, methods=["POST"]),
+    Route("/calculate/batch/", batch_calculation, methods=["POST"]),
+    Route("/evaluate/", evaluation, methods=["POST"]),
+    Route("/calculate/stream/", NDJSONCalculator(calculate_item), methods=["POST"]),
+    WebSocketRoute("/calculate/ws", websocket_endpoint(calculate_item)),
 ]
 
+
+# Open the history database and start watching the config file for changes when the
+# server starts; write the queued history records before it exits
+@asynccontextmanager
+async def lifespan(app):
+    config_loader().start()
+    await history.open()
+    yield
+    await history.close()
+
+
 # Initialize the app
-app = Starlette(routes=routes)
+app = Starlette(routes=routes, lifespan=lifespan)
+
+# Let concurrent identical /calculate/ requests share one computation
+app.add_middleware(SingleFlightMiddleware)
+
+# Serve repeated /calculate/ requests from a bounded LRU cache that follows the [cache] section
+response_cache = ResponseCache.from_config(config_loader())
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+
+# Record /calculate/ calls outside the cache and single-flight layers, so cached and
+# coalesced responses are recorded too; batch, stream and WebSocket items are
+# recorded by calculate_item
+app.add_middleware(HistoryMiddleware, history=history)
+
+# Bound the number of concurrent requests and rate-limit each X-API-Key
+app.add_middleware(AdmissionControlMiddleware, max_concurrency=256, max_queue=1024, rate=1000, burst=2000)
+
+# Write one access log line per request through the batched logger of the [logging] section
+app.add_middleware(AccessLogMiddleware)
@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from unittest import mock
+from asgi_bench import call_asgi
+from admission_control import AdmissionControlMiddleware
+
+
+# An app that holds every request until `release` is set
+def make_app(release):
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+class TestAdmissionControl(unittest.IsolatedAsyncioTestCase):
+    async def test_overload_returns_503(self):
+        release = asyncio.Event()
+        middleware = AdmissionControlMiddleware(make_app(release), max_concurrency=1, max_queue=1)
+        running = asyncio.create_task(call_asgi(middleware, "GET", "/"))
+        queued = asyncio.create_task(call_asgi(middleware, "GET", "/"))
+        await asyncio.sleep(0.01)
+        status, headers, _ = await call_asgi(middleware, "GET", "/")
+        self.assertEqual(status, 503)
+        self.assertIn((b"retry-after", b"1"), headers)
+        release.set()
+        self.assertEqual([(await running)[0], (await queued)[0]], [200, 200])
+        self.assertEqual(middleware.stats()["active"], 0)
+
+    async def test_queue_timeout_returns_503(self):
+        release = asyncio.Event()
+        middleware = AdmissionControlMiddleware(make_app(release), max_concurrency=1, queue_timeout=0.01)
+        running = asyncio.create_task(call_asgi(middleware, "GET", "/"))
+        await asyncio.sleep(0)
+        self.assertEqual((await call_asgi(middleware, "GET", "/"))[0], 503)
+        release.set()
+        await running
+        self.assertEqual(middleware.stats(), {"active": 0, "queued": 0, "admitted": 1, "rejected_overload": 1,
+                                              "rejected_rate": 0})
+
+    async def test_rate_limit_returns_429(self):
+        release = asyncio.Event()
+        release.set()
+        middleware = AdmissionControlMiddleware(make_app(release), rate=1, burst=2)
+        statuses = [(await call_asgi(middleware, "GET", "/", headers=[(b"x-api-key", b"a")]))[0] for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual((await call_asgi(middleware, "GET", "/", headers=[(b"x-api-key", b"b")]))[0], 200)
+
+    async def test_cancelled_after_handover_releases_the_slot(self):
+        middleware = AdmissionControlMiddleware(None, max_concurrency=1)
+        self.assertTrue(await middleware.acquire())
+
+        # Python 3.12's wait_for can raise CancelledError after the waiter got its slot
+        async def cancelled_after_handover(waiter, timeout):
+            await waiter
+            raise asyncio.CancelledError
+
+        with mock.patch("admission_control.asyncio.wait_for", cancelled_after_handover):
+            waiting = asyncio.create_task(middleware.acquire())
+            await asyncio.sleep(0)
+            middleware.release()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiting
+        self.assertEqual(middleware.stats()["active"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
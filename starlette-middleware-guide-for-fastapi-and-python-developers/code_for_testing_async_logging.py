@@ -0,0 +1,98 @@
+import os
+import re
+import tempfile
+import types
+import unittest
+from asgi_bench import call_asgi
+from async_logging import OPEN_LOGGERS, AccessLogMiddleware, BatchLogger
+
+LINE = re.compile(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{3} (DEBUG|INFO|WARNING|ERROR) (.*)")
+
+
+class TestBatchLogger(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "test.log")
+
+    # The writer thread sleeps for an hour, so records are only written by flush() and close()
+    def make_logger(self, **kwargs):
+        logger = BatchLogger(self.path, flush_interval=3600, **kwargs)
+        self.addCleanup(logger.close)
+        return logger
+
+    def read_lines(self):
+        with open(self.path, encoding="utf-8") as file:
+            return [LINE.fullmatch(line).groups() for line in file.read().splitlines()]
+
+    def test_flush_writes_formatted_lines(self):
+        logger = self.make_logger()
+        logger.info("→ first")
+        logger.warning("second")
+        logger.info("third")
+        self.assertEqual(logger.stats(), {"queued": 3, "written": 0, "dropped": 0})
+        logger.flush()
+        self.assertEqual(self.read_lines(), [("INFO", "→ first"), ("WARNING", "second"), ("INFO", "third")])
+        self.assertEqual(logger.stats(), {"queued": 0, "written": 3, "dropped": 0})
+        # test case 2: an empty queue writes nothing
+        logger.flush()
+        self.assertEqual(logger.stats()["written"], 3)
+
+    def test_level_filtering(self):
+        logger = self.make_logger(level="warning")
+        logger.debug("debug")
+        logger.info("info")
+        logger.warning("warning")
+        logger.error("error")
+        logger.flush()
+        self.assertEqual(self.read_lines(), [("WARNING", "warning"), ("ERROR", "error")])
+
+    def test_set_level(self):
+        logger = self.make_logger()
+        logger.debug("hidden")
+        logger.set_level("DEBUG")
+        logger.debug("shown")
+        logger.flush()
+        self.assertEqual(self.read_lines(), [("DEBUG", "shown")])
+        with self.assertRaises(KeyError):
+            logger.set_level("verbose")
+
+    def test_log_by_level_number(self):
+        logger = self.make_logger(level="warning")
+        logger.log(20, "hidden")
+        logger.log(40, "shown")
+        logger.flush()
+        self.assertEqual(self.read_lines(), [("ERROR", "shown")])
+
+    def test_full_queue_drops_records(self):
+        logger = self.make_logger(max_queue=2)
+        for index in range(5):
+            logger.info(str(index))
+        self.assertEqual(logger.stats(), {"queued": 2, "written": 0, "dropped": 3})
+        logger.flush()
+        self.assertEqual(self.read_lines(), [("INFO", "0"), ("INFO", "1")])
+
+    def test_close_flushes_and_unregisters(self):
+        logger = self.make_logger()
+        self.assertIn(logger, OPEN_LOGGERS)
+        logger.info("last words")
+        logger.close()
+        self.assertEqual(self.read_lines(), [("INFO", "last words")])
+        self.assertNotIn(logger, OPEN_LOGGERS)
+
+
+class TestAccessLogMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def test_one_line_per_request(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 418, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        messages = []
+        middleware = AccessLogMiddleware(app, logger=types.SimpleNamespace(info=messages.append))
+        await call_asgi(middleware, "POST", "/calculate/")
+        self.assertEqual(len(messages), 1)
+        self.assertRegex(messages[0], r'^127\.0\.0\.1:50000 "POST /calculate/ HTTP/1\.1" 418 \d+\.\d\dms$')
+
+
+if __name__ == '__main__':
+    unittest.main()
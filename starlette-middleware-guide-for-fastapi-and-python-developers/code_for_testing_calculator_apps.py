@@ -0,0 +1,65 @@
+import types
+import unittest
+from unittest import mock
+from starlette.testclient import TestClient
+import calculator_app_fastapi
+import calculator_app_starlette
+
+ITEMS = [
+    {"num1": 1, "num2": 2, "operation": "add"},
+    5,
+    {"num1": 1, "num2": 0, "operation": "divide"},
+    {"num1": 1, "operation": "add"},
+]
+
+
+class CalculatorAppTests:
+    app = None
+
+    def setUp(self):
+        # Keep the access log of the test requests out of the [logging] file
+        self.enterContext(mock.patch("async_logging.LOGGER", types.SimpleNamespace(info=lambda message: None)))
+        self.client = self.enterContext(TestClient(self.app))
+
+    def post_batch(self, **kwargs):
+        response = self.client.post("/calculate/batch/", **kwargs)
+        return response.status_code, response.json()
+
+    def test_batch_items_fail_one_by_one(self):
+        status, content = self.post_batch(json=ITEMS)
+        self.assertEqual(status, 200)
+        self.assertEqual(content["type"], "SUCCESS")
+        self.assertEqual([item["type"] for item in content["output"]], ["SUCCESS", "FAILURE", "FAILURE", "FAILURE"])
+        self.assertEqual(content["output"][0]["output"], 3)
+        self.assertEqual(content["output"][1:], [{"type": "FAILURE", "reason": "Invalid input"},
+                                                 {"type": "FAILURE", "reason": "Cannot divide by zero"},
+                                                 {"type": "FAILURE", "reason": "Invalid input"}])
+
+    def test_batch_columns(self):
+        status, content = self.post_batch(json={"num1": [1, 2], "num2": [3, 4], "operation": ["add", "multiply"]})
+        self.assertEqual(status, 200)
+        self.assertEqual([item["output"] for item in content["output"]], [4, 8])
+        # test case 2: columns of different lengths
+        status, _ = self.post_batch(json={"num1": [1], "num2": [], "operation": []})
+        self.assertEqual(status, 422)
+
+    def test_batch_rejects_bad_shapes(self):
+        for kwargs in ({"json": "add"}, {"json": {"num1": 1}}, {"content": b"[{"}):
+            with self.subTest(**kwargs):
+                self.assertEqual(self.post_batch(**kwargs)[0], 422)
+
+
+class TestStarletteApp(CalculatorAppTests, unittest.TestCase):
+    app = calculator_app_starlette.app
+
+    def test_evaluate_rejects_malformed_json(self):
+        response = self.client.post("/evaluate/", content=b'{"expression": ')
+        self.assertEqual((response.status_code, response.json()), (400, {"type": "FAILURE", "reason": "Invalid input"}))
+
+
+class TestFastAPIApp(CalculatorAppTests, unittest.TestCase):
+    app = calculator_app_fastapi.app
+
+
+if __name__ == '__main__':
+    unittest.main()
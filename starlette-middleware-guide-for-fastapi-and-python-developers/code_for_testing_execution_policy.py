@@ -0,0 +1,62 @@
+import unittest
+from execution_policy import ExecutionPolicy, default_max_result_bits, estimate_cost
+
+
+class TestEstimateCost(unittest.TestCase):
+    def test_power_estimate(self):
+        max_result_bits = default_max_result_bits()
+        # test case 1: 3 ** 9000 has 4295 digits, under the default limit of 4300
+        self.assertLessEqual(estimate_cost("power", 3, 9000)[0], max_result_bits)
+        # test case 2
+        self.assertGreater(estimate_cost("power", 3, 9100)[0], max_result_bits)
+        # test case 3
+        for base in (0, 1, -1):
+            self.assertLessEqual(estimate_cost("power", base, 10 ** 400)[0], max_result_bits)
+        # test case 4
+        self.assertGreater(estimate_cost("power", 2, 10 ** 400)[0], max_result_bits)
+
+    def test_float_operands_are_constant_time(self):
+        self.assertEqual(estimate_cost("multiply", 10 ** 1000, 1.5), estimate_cost("multiply", 2, 3.0))
+
+
+class TestExecutionPolicy(unittest.IsolatedAsyncioTestCase):
+    async def test_inline(self):
+        policy = ExecutionPolicy()
+        num1 = 10 ** 2099
+        status, content = await policy.evaluate("multiply", num1, num1)
+        self.assertEqual((status, content["output"]), (200, num1 * num1))
+        self.assertEqual(policy.stats()["inline"], 1)
+
+    async def test_power_under_the_limit(self):
+        status, content = await ExecutionPolicy().evaluate("power", 3, 9000)
+        self.assertEqual((status, content["output"]), (200, 3 ** 9000))
+
+    async def test_too_large(self):
+        policy = ExecutionPolicy()
+        status, content = await policy.evaluate("power", 10, 5000)
+        self.assertEqual((status, content["reason"]), (413, "Operands are too large"))
+        self.assertEqual(policy.stats()["rejected_too_large"], 1)
+
+    async def test_overflow_with_float_operand(self):
+        for name in ("add", "subtract", "multiply", "divide", "floordiv", "mod"):
+            status, content = await ExecutionPolicy().evaluate(name, 10 ** 400, 1.5)
+            self.assertEqual((status, content["reason"]), (400, "Result is too large"), name)
+
+    async def test_busy(self):
+        policy = ExecutionPolicy(inline_cost=0, max_pending=0)
+        status, content = await policy.evaluate("multiply", 10 ** 100, 10 ** 100)
+        self.assertEqual((status, content["reason"]), (503, "Server is busy"))
+        self.assertEqual(policy.stats()["rejected_busy"], 1)
+
+    async def test_offload(self):
+        policy = ExecutionPolicy(inline_cost=0, max_workers=1)
+        try:
+            status, content = await policy.evaluate("multiply", 10 ** 100, 10 ** 100)
+        finally:
+            policy.shutdown()
+        self.assertEqual((status, content["output"]), (200, 10 ** 200))
+        self.assertEqual(policy.stats()["offloaded"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from expressions import MAX_DEPTH, compile_expression, evaluate_expression
+
+
+def failure(reason, status=400):
+    return status, {"type": "FAILURE", "reason": reason}
+
+
+class TestEvaluateExpression(unittest.TestCase):
+    def test_arithmetic(self):
+        # test case 1: precedence, left associativity and parentheses
+        self.assertEqual(evaluate_expression("a*b+c-d/2", {"a": 2, "b": 3, "c": 1, "d": 4}),
+                         (200, {"type": "SUCCESS", "output": 5.0}))
+        self.assertEqual(evaluate_expression("2-3-4"), (200, {"type": "SUCCESS", "output": -5}))
+        self.assertEqual(evaluate_expression("2-(3-4)"), (200, {"type": "SUCCESS", "output": 3}))
+        # test case 2: unary minus keeps the sign of -0.0
+        self.assertEqual(str(evaluate_expression("-x", {"x": 0.0})[1]["output"]), "-0.0")
+
+    def test_rejected_syntax(self):
+        self.assertEqual(evaluate_expression("2**8"), failure("Unsupported operator: Pow"))
+        self.assertEqual(evaluate_expression("__import__('os')"), failure("Unsupported syntax: Call"))
+        self.assertEqual(evaluate_expression("1 if x else 2"), failure("Unsupported syntax: IfExp"))
+        self.assertEqual(evaluate_expression("True + 1"), failure("Unsupported literal: True"))
+        self.assertEqual(evaluate_expression("1 +"), failure("Invalid expression"))
+        self.assertEqual(evaluate_expression("1" * 1001), failure("Expression is longer than 1000 characters"))
+
+    def test_unknown_and_invalid_variables(self):
+        self.assertEqual(evaluate_expression("x + y", {"x": 1}), failure("Unknown variable: y"))
+        self.assertEqual(evaluate_expression("x + 1", {"x": "1"}), failure("Both values must be numbers"))
+
+    def test_zero_division(self):
+        self.assertEqual(evaluate_expression("1 / (x - x)", {"x": 3}), failure("Cannot divide by zero"))
+
+    def test_nesting_depth(self):
+        # a long left-associative chain is not nesting
+        self.assertEqual(evaluate_expression("+".join(["1"] * 400)), (200, {"type": "SUCCESS", "output": 400}))
+        nested = "1+(" * MAX_DEPTH + "1" + ")" * MAX_DEPTH
+        self.assertEqual(evaluate_expression(nested), (200, {"type": "SUCCESS", "output": MAX_DEPTH + 1}))
+        nested = "1+(" * (MAX_DEPTH + 1) + "1" + ")" * (MAX_DEPTH + 1)
+        self.assertEqual(evaluate_expression(nested), failure("Expression is too deeply nested"))
+
+    def test_result_size(self):
+        # test case 1: an int result too large to encode is refused before it is computed
+        self.assertEqual(evaluate_expression("*".join(["a"] * 96), {"a": 10 ** 4000}),
+                         failure("Operands are too large", 413))
+        # test case 2: floats that overflow to inf
+        self.assertEqual(evaluate_expression("1e308 * 10"), failure("Result is too large"))
+        self.assertEqual(evaluate_expression("x - x * 10", {"x": -1e308}), failure("Result is too large"))
+        self.assertEqual(evaluate_expression("1e999"), failure("Result is too large"))
+
+    def test_compiled_expressions_are_reused(self):
+        compile_expression.cache_clear()
+        for value in range(3):
+            self.assertEqual(evaluate_expression("x * 2", {"x": value}),
+                             (200, {"type": "SUCCESS", "output": value * 2}))
+        info = compile_expression.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
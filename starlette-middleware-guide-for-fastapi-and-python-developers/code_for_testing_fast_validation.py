@@ -0,0 +1,48 @@
+import json
+import unittest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+from calculator_app_fastapi import fast_calculation, model_calculation
+from fast_json import FastJSONResponse, FastJSONRoute
+
+BODIES = [
+    # valid bodies
+    {"num1": 6, "num2": 3, "operation": "divide"},
+    {"num1": "1.5", "num2": True, "operation": "add"},
+    {"num1": 10 ** 30, "num2": 1, "operation": "multiply"},
+    {"num1": 1, "num2": 0, "operation": "divide"},
+    {"num1": 1, "num2": 2, "operation": "sqrt"},
+    # invalid bodies
+    {"num1": 1, "num2": 2},
+    {},
+    {"num1": "one", "num2": [2], "operation": 3},
+    {"num1": 10 ** 400, "num2": 1, "operation": "add"},
+    [1, 2, "add"],
+    "add",
+    None,
+]
+
+HEADERS = {"content-type": "application/json"}
+
+
+# Define a function that builds a FastAPI app like calculator_app_fastapi with one /calculate/ endpoint
+def make_client(endpoint):
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.router.route_class = FastJSONRoute
+    app.post("/calculate/")(endpoint)
+    return TestClient(app)
+
+
+class TestFastValidation(unittest.TestCase):
+    def test_same_responses_as_the_model(self):
+        model_client, fast_client = make_client(model_calculation), make_client(fast_calculation)
+        bodies = [json.dumps(body).encode() for body in BODIES] + [b"", b'{"num1": 1,']
+        for body in bodies:
+            with self.subTest(body=body):
+                expected = model_client.post("/calculate/", content=body, headers=HEADERS)
+                response = fast_client.post("/calculate/", content=body, headers=HEADERS)
+                self.assertEqual((response.status_code, response.json()), (expected.status_code, expected.json()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from asgi_bench import call_asgi
+from history import CalculationHistory, ConnectionPool, HistoryMiddleware, SQLiteBackend
+from response_cache import ResponseCacheMiddleware
+
+
+async def calculate(scope, receive, send):
+    message = await receive()
+    data = json.loads(message["body"])
+    if isinstance(data, dict):
+        status, content = 200, {"type": "SUCCESS", "output": data["num1"] + data["num2"]}
+    else:
+        status, content = 400, {"type": "FAILURE", "reason": "Invalid input"}
+    await send({"type": "http.response.start", "status": status, "headers": []})
+    await send({"type": "http.response.body", "body": json.dumps(content).encode()})
+
+
+class TestCalculationHistory(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.url = f"sqlite:///{os.path.join(directory.name, 'history.db')}"
+        self.path = os.path.join(directory.name, "history.db")
+
+    def read_rows(self):
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute("SELECT operation, num1, num2, status, response FROM calculation_history "
+                                      "ORDER BY id").fetchall()
+
+    async def test_close_flushes_pending_records(self):
+        history = CalculationHistory(self.url, flush_interval=3600)
+        history.record("add", 1, 2, 200, {"type": "SUCCESS", "output": 3})
+        history.record("divide", 1, 0, 400, {"type": "FAILURE", "reason": "Cannot divide by zero"})
+        self.assertEqual(history.stats()["pending"], 2)
+        await history.close()
+        self.assertEqual(self.read_rows(), [
+            ("add", "1", "2", 200, '{"type":"SUCCESS","output":3}'),
+            ("divide", "1", "0", 400, '{"type":"FAILURE","reason":"Cannot divide by zero"}'),
+        ])
+        self.assertEqual(history.stats(), {"pending": 0, "written": 2, "failed": 0, "dropped": 0, "connections": 0})
+
+    async def test_batch_size_wakes_the_flusher(self):
+        history = CalculationHistory(self.url, batch_size=2, flush_interval=3600)
+        for index in range(4):
+            history.record("add", index, 1, 200, None)
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if history.written == 4:
+                break
+        self.assertEqual(history.written, 4)
+        await history.close()
+
+    async def test_bad_row_does_not_lose_its_batch(self):
+        history = CalculationHistory(self.url, flush_interval=3600)
+        history.record("add", 1, 2, 200, None)
+        history.record("add", 1, 2, 200, {1j})  # cannot be encoded
+        history.record(["add"], 1, 2, 400, None)  # cannot be bound by sqlite3
+        history.record("add", 3, 4, 200, None)
+        await history.close()
+        self.assertEqual([row[1:3] for row in self.read_rows()], [("1", "2"), ("3", "4")])
+        self.assertEqual((history.written, history.failed), (2, 2))
+        self.assertIsNotNone(history.last_error)
+
+    async def test_full_queue_drops_records(self):
+        history = CalculationHistory(self.url, flush_interval=3600, max_queue=1)
+        history.record("add", 1, 2, 200, None)
+        history.record("add", 3, 4, 200, None)
+        await history.close()
+        self.assertEqual((history.written, history.dropped), (1, 1))
+
+    async def test_sqlite_uses_one_connection(self):
+        pool = ConnectionPool(SQLiteBackend(self.url), 100, timeout=0.05)
+        self.assertEqual(pool.size, 1)
+        connection = await pool.acquire()
+        # test case 2: a second caller gives up after the timeout and leaves no waiter behind
+        with self.assertRaises(asyncio.TimeoutError):
+            await pool.acquire()
+        self.assertEqual(len(pool.waiters), 0)
+        pool.release(connection)
+        self.assertIs(await pool.acquire(), connection)
+        pool.release(connection)
+        pool.close()
+
+    async def test_cancelled_connect_closes_its_connection(self):
+        backend = SQLiteBackend(self.url)
+        connect = backend.connect
+        started, finish = threading.Event(), threading.Event()
+        connections = []
+
+        def slow_connect():
+            started.set()
+            finish.wait(10)
+            connections.append(connect())
+            return connections[-1]
+
+        backend.connect = slow_connect
+        pool = ConnectionPool(backend, 1)
+        task = asyncio.create_task(pool.acquire())
+        await asyncio.to_thread(started.wait, 10)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(pool.created, 0)
+        finish.set()
+        pool.close()
+        await asyncio.sleep(0.01)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connections[0].execute("SELECT 1")
+
+    async def test_resize(self):
+        class Backend:
+            max_connections = 4
+
+            def connect(self):
+                return mock.Mock()
+
+        pool = ConnectionPool(Backend(), 2)
+        connections = [await pool.acquire() for _ in range(2)]
+        pool.resize(100)
+        self.assertEqual(pool.size, 4)
+        connections.append(await pool.acquire())
+        self.assertEqual(pool.executor_size, 4)
+        # test case 2: connections above the new size are closed as they come back
+        pool.resize(1)
+        for connection in connections:
+            pool.release(connection)
+        self.assertEqual((pool.created, pool.idle), (1, connections[2:]))
+        connections[0].close.assert_called_once_with()
+        connections[2].close.assert_not_called()
+        pool.close()
+
+    async def test_open_creates_the_database(self):
+        history = CalculationHistory(self.url)
+        self.assertFalse(os.path.exists(self.path))
+        await history.open()
+        self.assertEqual(self.read_rows(), [])
+        await history.close()
+
+    async def test_middleware_records_cache_hits(self):
+        history = CalculationHistory(self.url, flush_interval=3600)
+        app = HistoryMiddleware(ResponseCacheMiddleware(calculate), history=history)
+        body = json.dumps({"num1": 1, "num2": 2, "operation": "add"}).encode()
+        for _ in range(2):
+            status, _, _ = await call_asgi(app, "POST", "/calculate/", body)
+            self.assertEqual(status, 200)
+        # test case 2: bodies that are not a plain calculation are not recorded
+        await call_asgi(app, "POST", "/calculate/", b"[1, 2]")
+        await history.close()
+        self.assertEqual(self.read_rows(), [("add", "1", "2", 200, '{"type":"SUCCESS","output":3}')] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
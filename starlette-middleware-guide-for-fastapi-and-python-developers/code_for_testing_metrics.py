@@ -0,0 +1,74 @@
+import unittest
+from metrics import DEFAULT_BUCKETS, LatencyHistogram, MetricsStore
+
+NAME = "http_request_duration_seconds"
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_buckets(self):
+        histogram = LatencyHistogram()
+        # a value equal to a bound belongs to that bound's bucket, like Prometheus "le"
+        for value in (0.00005, 0.00006, 0.001, 10.0, 10.5):
+            histogram.record(value)
+        self.assertEqual(len(histogram.counts), len(DEFAULT_BUCKETS) + 1)
+        self.assertEqual([index for index, count in enumerate(histogram.counts) if count],
+                         [0, 1, DEFAULT_BUCKETS.index(0.001), len(DEFAULT_BUCKETS) - 1, len(DEFAULT_BUCKETS)])
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.total, 20.50111)
+
+    def test_quantiles(self):
+        histogram = LatencyHistogram(bounds=(1.0, 2.0, 4.0))
+        self.assertEqual(histogram.quantile(0.5), 0.0)
+        for value in (0.5, 0.5, 1.5, 1.5):
+            histogram.record(value)
+        # test case 1: linear interpolation inside the bucket holding the rank
+        self.assertEqual(histogram.quantile(0.25), 0.5)
+        self.assertEqual(histogram.quantile(0.5), 1.0)
+        self.assertEqual(histogram.quantile(0.75), 1.5)
+        self.assertEqual(histogram.quantile(1.0), 2.0)
+        # test case 2: a rank in the +Inf bucket reports the largest bound
+        for _ in range(4):
+            histogram.record(100.0)
+        self.assertEqual(histogram.quantile(0.99), 4.0)
+
+
+class TestRenderPrometheus(unittest.TestCase):
+    def test_exposition_text(self):
+        store = MetricsStore(bounds=(0.5, 1.0))
+        store.record("/calculate/", "add", 0.25)
+        store.record("/calculate/", "add", 0.75)
+        store.record('/say "hi"', None, 2.0)
+        self.assertEqual(store.render_prometheus(), "\n".join([
+            f"# HELP {NAME} Request latency in seconds by route and operation.",
+            f"# TYPE {NAME} histogram",
+            f'{NAME}_bucket{{route="/calculate/",operation="add",le="0.5"}} 1',
+            f'{NAME}_bucket{{route="/calculate/",operation="add",le="1.0"}} 2',
+            f'{NAME}_bucket{{route="/calculate/",operation="add",le="+Inf"}} 2',
+            f'{NAME}_sum{{route="/calculate/",operation="add"}} 1.0',
+            f'{NAME}_count{{route="/calculate/",operation="add"}} 2',
+            f'{NAME}_bucket{{route="/say \\"hi\\"",operation="",le="0.5"}} 0',
+            f'{NAME}_bucket{{route="/say \\"hi\\"",operation="",le="1.0"}} 0',
+            f'{NAME}_bucket{{route="/say \\"hi\\"",operation="",le="+Inf"}} 1',
+            f'{NAME}_sum{{route="/say \\"hi\\"",operation=""}} 2.0',
+            f'{NAME}_count{{route="/say \\"hi\\"",operation=""}} 1',
+            f"# HELP {NAME}_quantile Estimated request latency quantiles in seconds.",
+            f"# TYPE {NAME}_quantile gauge",
+            f'{NAME}_quantile{{route="/calculate/",operation="add",quantile="0.5"}} 0.5',
+            f'{NAME}_quantile{{route="/calculate/",operation="add",quantile="0.95"}} 0.95',
+            f'{NAME}_quantile{{route="/calculate/",operation="add",quantile="0.99"}} 0.99',
+            f'{NAME}_quantile{{route="/say \\"hi\\"",operation="",quantile="0.5"}} 1.0',
+            f'{NAME}_quantile{{route="/say \\"hi\\"",operation="",quantile="0.95"}} 1.0',
+            f'{NAME}_quantile{{route="/say \\"hi\\"",operation="",quantile="0.99"}} 1.0',
+        ]) + "\n")
+
+    def test_empty_store(self):
+        self.assertEqual(MetricsStore().render_prometheus().splitlines(), [
+            f"# HELP {NAME} Request latency in seconds by route and operation.",
+            f"# TYPE {NAME} histogram",
+            f"# HELP {NAME}_quantile Estimated request latency quantiles in seconds.",
+            f"# TYPE {NAME}_quantile gauge",
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
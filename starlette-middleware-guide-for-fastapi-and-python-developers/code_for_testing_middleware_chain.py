@@ -0,0 +1,26 @@
+import contextlib
+import io
+import unittest
+from starlette.testclient import TestClient
+from middleware_execution_order import app, compiled_app
+
+TRACE = [f"→ Processing request: M{index}" for index in (8, 6, 5, 7, 4, 1, 2, 3)] + ["   [route handler]"] + \
+        [f"← Processing response:  M{index}" for index in (3, 2, 1, 4, 7, 5, 6, 8)]
+
+
+# Define a function that returns the lines an app prints while answering GET /
+def trace(asgi_app):
+    output = io.StringIO()
+    with TestClient(asgi_app) as client, contextlib.redirect_stdout(output):
+        response = client.get("/")
+    return response.json(), output.getvalue().splitlines()
+
+
+class TestCompiledMiddleware(unittest.TestCase):
+    def test_same_order_as_the_middleware_stack(self):
+        self.assertEqual(trace(app), ({"ok": True}, TRACE))
+        self.assertEqual(trace(compiled_app), ({"ok": True}, TRACE))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import decimal
+import unittest
+from operations import OPERATIONS, evaluate, register
+
+
+class TestOperations(unittest.TestCase):
+    def test_success(self):
+        self.assertEqual(evaluate("add", 2, 3), (200, {"type": "SUCCESS", "output": 5}))
+        self.assertEqual(evaluate("divide", 6, 3), (200, {"type": "SUCCESS", "output": 2.0}))
+        self.assertEqual(evaluate("power", 2, 10), (200, {"type": "SUCCESS", "output": 1024}))
+
+    def test_failures(self):
+        # test case 1
+        self.assertEqual(evaluate("sqrt", 2, 3), (404, {"type": "FAILURE", "reason": "Not a valid operation"}))
+        # test case 2
+        self.assertEqual(evaluate("add", "2", 3), (400, {"type": "FAILURE", "reason": "Both values must be numbers"}))
+        # test case 3
+        self.assertEqual(evaluate("divide", 1, 0), (400, {"type": "FAILURE", "reason": "Cannot divide by zero"}))
+        # test case 4
+        self.assertEqual(evaluate("power", -8, 0.5),
+                         (400, {"type": "FAILURE", "reason": "Result is not a real number"}))
+
+    def test_error_subclasses(self):
+        def checked_divide(a, b):
+            return decimal.Decimal(a) / decimal.Decimal(b)
+
+        register("test_divide", checked_divide, errors={ZeroDivisionError: "Cannot divide by zero"})
+        try:
+            # decimal.DivisionByZero is a subclass of ZeroDivisionError
+            self.assertEqual(evaluate("test_divide", 1, 0),
+                             (400, {"type": "FAILURE", "reason": "Cannot divide by zero"}))
+        finally:
+            del OPERATIONS["test_divide"]
+
+    def test_non_finite_results(self):
+        for name, num1, num2 in [("multiply", 1e308, 10), ("add", 1e308, 1e308), ("subtract", -1e308, 1e308)]:
+            self.assertEqual(evaluate(name, num1, num2), (400, {"type": "FAILURE", "reason": "Result is too large"}))
+
+    def test_register(self):
+        register("test_max", max)
+        try:
+            self.assertEqual(evaluate("test_max", 2, 7), (200, {"type": "SUCCESS", "output": 7}))
+        finally:
+            del OPERATIONS["test_max"]
+
+
+if __name__ == '__main__':
+    unittest.main()
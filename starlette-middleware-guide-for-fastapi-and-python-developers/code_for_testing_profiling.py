@@ -0,0 +1,61 @@
+import unittest
+from unittest import mock
+from starlette.testclient import TestClient
+from asgi_bench import call_asgi
+from profiling import ProfileStore, ProfilingMiddleware, token_matches
+import fastapimultiplemiddleware
+import starletteaddmultiple
+
+
+async def hello(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"hello"})
+
+
+class TestProfilingMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def test_token_required(self):
+        store = ProfileStore()
+        app = ProfilingMiddleware(hello, profiles=store, token="secret")
+        await call_asgi(app, "GET", "/")
+        await call_asgi(app, "GET", "/", headers=[(b"x-profile", b"1")])
+        self.assertEqual(store.profiled, 0)
+        await call_asgi(app, "GET", "/", headers=[(b"x-profile", b"secret")])
+        self.assertEqual(store.profiled, 1)
+
+    async def test_header_ignored_without_token(self):
+        store = ProfileStore()
+        app = ProfilingMiddleware(hello, profiles=store)
+        await call_asgi(app, "GET", "/", headers=[(b"x-profile", b"1")])
+        self.assertEqual(store.profiled, 0)
+
+    async def test_report(self):
+        store = ProfileStore()
+        app = ProfilingMiddleware(hello, profiles=store, sample_rate=1.0)
+        await call_asgi(app, "GET", "/")
+        self.assertIn("1 requests profiled", store.report("time", 5))
+        self.assertRaises(ValueError, store.report, "foo")
+
+    def test_token_matches(self):
+        self.assertTrue(token_matches(b"secret", "secret"))
+        self.assertTrue(token_matches("secret", b"secret"))
+        self.assertFalse(token_matches(None, "secret"))
+        self.assertFalse(token_matches(b"secret", None))
+
+
+class TestDebugProfileEndpoint(unittest.TestCase):
+    def test_endpoints(self):
+        for module in (starletteaddmultiple, fastapimultiplemiddleware):
+            client = TestClient(module.app)
+            with mock.patch.object(module, "PROFILE_TOKEN", None):
+                self.assertEqual(client.get("/debug/profile").status_code, 404)
+            with mock.patch.object(module, "PROFILE_TOKEN", "secret"):
+                self.assertEqual(client.get("/debug/profile").status_code, 403)
+                headers = {"X-Profile": "secret"}
+                self.assertEqual(client.get("/debug/profile", headers=headers).status_code, 200)
+                self.assertEqual(client.get("/debug/profile?sort=foo", headers=headers).status_code, 400)
+                self.assertIn(client.get("/debug/profile?limit=x", headers=headers).status_code, (400, 422))
+                self.assertEqual(client.get("/debug/profile?reset=1", headers=headers).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from app_config import load_config
+from asgi_bench import call_asgi, make_scope
+from response_cache import ResponseCache, ResponseCacheMiddleware, calculation_key, read_body
+
+
+# A /calculate/ stand-in that counts how often it runs and echoes the body it received
+def make_app(status=200):
+    calls = []
+
+    async def app(scope, receive, send):
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        calls.append(body)
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": body})
+
+    return app, calls
+
+
+def calculate_body(num1=1, num2=2, operation="add"):
+    return json.dumps({"num1": num1, "num2": num2, "operation": operation}).encode()
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(ttl=60)
+        with mock.patch("response_cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with mock.patch("response_cache.time.monotonic", return_value=159.0):
+            self.assertEqual(cache.get("a"), 1)
+        with mock.patch("response_cache.time.monotonic", return_value=161.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_calculation_key(self):
+        # test case 1
+        self.assertNotEqual(calculation_key({"num1": 1, "num2": 2, "operation": "add"}),
+                            calculation_key({"num1": 1.0, "num2": 2, "operation": "add"}))
+        # test case 2
+        self.assertIsNone(calculation_key({"num1": True, "num2": 2, "operation": "add"}))
+        # test case 3
+        self.assertIsNone(calculation_key({"num1": 1, "num2": 2, "operation": "add", "extra": 1}))
+        # test case 4: -0.0 == 0.0, but the sign can change the result
+        self.assertNotEqual(calculation_key({"num1": 1, "num2": 0.0, "operation": "multiply"}),
+                            calculation_key({"num1": 1, "num2": -0.0, "operation": "multiply"}))
+
+    def test_follows_the_cache_section(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "config.ini")
+        with open(path, "w") as file:
+            file.write("[cache]\nmaxsize = 2\nttl = 0\n")
+        loader = load_config(path)
+        cache = ResponseCache.from_config(loader)
+        self.assertEqual((cache.maxsize, cache.ttl, cache.enabled), (2, None, True))
+        cache.set("a", 1)
+        with open(path, "w") as file:
+            file.write("[cache]\nmaxsize = 100\nttl = 30\nenabled = no\n")
+        loader.reload_if_changed()
+        self.assertEqual((cache.maxsize, cache.ttl, cache.enabled), (100, 30.0, False))
+        self.assertEqual(cache.stats()["size"], 0)
+
+
+class TestResponseCacheMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def test_cache_hit(self):
+        app, calls = make_app()
+        cache = ResponseCache()
+        middleware = ResponseCacheMiddleware(app, cache=cache)
+        first = await call_asgi(middleware, "POST", "/calculate/", calculate_body())
+        second = await call_asgi(middleware, "POST", "/calculate/", calculate_body())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first, second)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    async def test_expired_entry_runs_the_app_again(self):
+        app, calls = make_app()
+        middleware = ResponseCacheMiddleware(app, cache=ResponseCache(ttl=60))
+        with mock.patch("response_cache.time.monotonic", return_value=100.0):
+            await call_asgi(middleware, "POST", "/calculate/", calculate_body())
+        with mock.patch("response_cache.time.monotonic", return_value=200.0):
+            await call_asgi(middleware, "POST", "/calculate/", calculate_body())
+        self.assertEqual(len(calls), 2)
+
+    async def test_errors_and_other_paths_are_not_cached(self):
+        app, calls = make_app(status=400)
+        middleware = ResponseCacheMiddleware(app)
+        for _ in range(2):
+            await call_asgi(middleware, "POST", "/calculate/", calculate_body(operation="divide"))
+            await call_asgi(middleware, "POST", "/other/", calculate_body())
+        self.assertEqual(len(calls), 4)
+
+    async def test_disabled_cache_is_skipped(self):
+        app, calls = make_app()
+        middleware = ResponseCacheMiddleware(app, cache=ResponseCache(enabled=False))
+        for _ in range(2):
+            await call_asgi(middleware, "POST", "/calculate/", calculate_body())
+        self.assertEqual((len(calls), middleware.cache.stats()["size"]), (2, 0))
+
+    async def test_large_chunked_body_passes_through(self):
+        app, calls = make_app()
+        middleware = ResponseCacheMiddleware(app, max_body_size=10)
+        chunks = [b"x" * 8] * 5
+        messages = [{"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+                    for index, chunk in enumerate(chunks)]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            pass
+
+        await middleware(make_scope("POST", "/calculate/"), receive, send)
+        self.assertEqual(calls, [b"x" * 40])
+
+    async def test_read_body_stops_after_max_size(self):
+        messages = [{"type": "http.request", "body": b"abc", "more_body": True}] * 3
+
+        async def receive():
+            return messages.pop(0)
+
+        body, complete = await read_body(receive, max_size=5)
+        self.assertEqual((body, complete), (b"abcabc", False))
+        self.assertEqual(len(messages), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
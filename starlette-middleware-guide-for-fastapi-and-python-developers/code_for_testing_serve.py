@@ -0,0 +1,93 @@
+import contextlib
+import io
+import os
+import signal
+import time
+import unittest
+import urllib.request
+from unittest import mock
+from benchmark_apps import free_port
+from serve import Launcher
+
+
+async def hello(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"hello from " + str(os.getpid()).encode()})
+
+
+# reuse_port=True so that the launcher does not bind a socket until a worker starts
+def make_launcher(**kwargs):
+    return Launcher("code_for_testing_serve:hello", "127.0.0.1", free_port(), 2, reuse_port=True, **kwargs)
+
+
+class TestLauncher(unittest.TestCase):
+    def setUp(self):
+        # Keep the launcher's restart messages out of the test output
+        self.enterContext(contextlib.redirect_stderr(io.StringIO()))
+
+    def test_failed_replacement_keeps_the_old_worker(self):
+        launcher = make_launcher()
+        launcher.children = {100: 0, 101: 1}
+        launcher.restart_queue = list(launcher.children.items())
+        with mock.patch.object(launcher, "spawn", side_effect=RuntimeError("worker 0 did not start")), \
+                mock.patch.object(launcher, "stop_worker") as stop_worker:
+            self.assertFalse(launcher.rolling_restart())
+        stop_worker.assert_not_called()
+        self.assertEqual(launcher.children, {100: 0, 101: 1})
+        self.assertEqual(launcher.restart_queue, [(100, 0), (101, 1)])
+        self.assertEqual(launcher.backoff, 1)
+        self.assertGreater(launcher.retry_at, time.monotonic())
+
+        # test case 2: the retry replaces both workers and resets the backoff
+        def spawn(index):
+            launcher.children[200 + index] = index
+
+        def stop(pid):
+            launcher.children.pop(pid)
+
+        with mock.patch.object(launcher, "spawn", side_effect=spawn), \
+                mock.patch.object(launcher, "stop_worker", side_effect=stop):
+            self.assertTrue(launcher.rolling_restart())
+        self.assertEqual(launcher.children, {200: 0, 201: 1})
+        self.assertEqual((launcher.restart_queue, launcher.backoff), ([], 0))
+
+    def test_dead_worker_is_respawned_with_backoff(self):
+        launcher = make_launcher(max_backoff=2)
+        launcher.children = {100: 0, 101: 1}
+        with mock.patch("serve.os.waitpid", side_effect=[(100, 0), (0, 0)]):
+            launcher.reap()
+        self.assertEqual(launcher.missing, {0})
+        with mock.patch.object(launcher, "spawn", side_effect=OSError("fork failed")):
+            for expected_backoff in (1, 2, 2):
+                self.assertFalse(launcher.respawn_missing())
+                self.assertEqual(launcher.backoff, expected_backoff)
+        with mock.patch.object(launcher, "spawn") as spawn:
+            self.assertTrue(launcher.respawn_missing())
+        spawn.assert_called_once_with(0)
+        self.assertEqual((launcher.missing, launcher.backoff), (set(), 0))
+
+    def test_worker_resets_signal_handlers(self):
+        launcher = make_launcher()
+        with mock.patch("serve.signal.signal") as set_handler, mock.patch("serve.listen_socket"), \
+                mock.patch("serve.NotifyingServer"):
+            launcher.run_worker(0, ready_fd=-1)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            set_handler.assert_any_call(signum, signal.SIG_DFL)
+
+    def test_spawned_worker_serves_and_stops(self):
+        launcher = make_launcher()
+        pid = launcher.spawn(0)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{launcher.port}/", timeout=10) as response:
+                self.assertEqual(response.read(), f"hello from {pid}".encode())
+        finally:
+            launcher.stop_worker(pid)
+        self.assertEqual(launcher.children, {})
+        with self.assertRaises(ChildProcessError):
+            os.waitpid(pid, os.WNOHANG)
+
+
+if __name__ == '__main__':
+    unittest.main()
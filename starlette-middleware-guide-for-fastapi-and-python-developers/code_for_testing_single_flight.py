@@ -0,0 +1,89 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+import response_cache
+from asgi_bench import call_asgi
+from response_cache import ResponseCacheMiddleware
+from single_flight import SingleFlightMiddleware
+
+BODY = json.dumps({"num1": 6, "num2": 3, "operation": "divide"}).encode()
+
+
+# A /calculate/ stand-in that holds every request until `release` is set
+def make_app(release, fail=False):
+    calls = []
+
+    async def app(scope, receive, send):
+        await receive()
+        calls.append(scope["path"])
+        await release.wait()
+        if fail and len(calls) == 1:
+            raise RuntimeError("handler failed")
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"type":"SUCCESS","output":2.0}'})
+
+    return app, calls
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_requests_share_one_call(self):
+        release = asyncio.Event()
+        app, calls = make_app(release)
+        middleware = SingleFlightMiddleware(app)
+        requests = [asyncio.create_task(call_asgi(middleware, "POST", "/calculate/", BODY)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        release.set()
+        responses = await asyncio.gather(*requests)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({response[2] for response in responses}, {b'{"type":"SUCCESS","output":2.0}'})
+        self.assertEqual(middleware.stats(), {"in_flight": 0, "leaders": 1, "coalesced": 4})
+
+    async def test_different_requests_run_separately(self):
+        release = asyncio.Event()
+        release.set()
+        app, calls = make_app(release)
+        middleware = SingleFlightMiddleware(app)
+        other = json.dumps({"num1": 6, "num2": 2, "operation": "divide"}).encode()
+        await asyncio.gather(call_asgi(middleware, "POST", "/calculate/", BODY),
+                             call_asgi(middleware, "POST", "/calculate/", other))
+        self.assertEqual(len(calls), 2)
+
+    async def test_signed_zeros_are_not_coalesced(self):
+        release = asyncio.Event()
+        app, calls = make_app(release)
+        middleware = SingleFlightMiddleware(app)
+        requests = [asyncio.create_task(call_asgi(middleware, "POST", "/calculate/", json.dumps(
+            {"num1": 6, "num2": zero, "operation": "multiply"}).encode())) for zero in (0.0, -0.0)]
+        await asyncio.sleep(0.01)
+        self.assertEqual(len(calls), 2)
+        release.set()
+        await asyncio.gather(*requests)
+        self.assertEqual(middleware.stats()["coalesced"], 0)
+
+    async def test_followers_run_when_the_leader_fails(self):
+        release = asyncio.Event()
+        app, calls = make_app(release, fail=True)
+        middleware = SingleFlightMiddleware(app)
+        leader = asyncio.create_task(call_asgi(middleware, "POST", "/calculate/", BODY))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(call_asgi(middleware, "POST", "/calculate/", BODY))
+        await asyncio.sleep(0.01)
+        release.set()
+        with self.assertRaises(RuntimeError):
+            await leader
+        self.assertEqual((await follower)[0], 200)
+        self.assertEqual(len(calls), 2)
+
+    async def test_body_is_decoded_once_behind_the_cache(self):
+        release = asyncio.Event()
+        release.set()
+        app, _ = make_app(release)
+        stack = ResponseCacheMiddleware(SingleFlightMiddleware(app))
+        with mock.patch("response_cache.loads", wraps=response_cache.loads) as loads:
+            await call_asgi(stack, "POST", "/calculate/", BODY)
+        self.assertEqual(loads.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from starlette.middleware.cors import CORSMiddleware
+from asgi_bench import call_asgi
+from static_cors import StaticCORSMiddleware
+
+# The configuration of the article's apps
+OPTIONS = {"allow_origins": ["*"], "allow_methods": ["GET", "POST"], "allow_headers": ["Content-Type", "X-API-Key"],
+           "expose_headers": ["X-Request-ID"], "allow_credentials": False}
+ORIGIN = (b"origin", b"https://example.com")
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"text/plain"), (b"vary", b"Accept-Encoding")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class TestStaticCORSMiddleware(unittest.IsolatedAsyncioTestCase):
+    # Send the same request through StaticCORSMiddleware and CORSMiddleware and
+    # expect the same status, body and headers (in any order)
+    async def assertSameResponse(self, method, headers, static=None, **options):
+        static = static or StaticCORSMiddleware(app, **{**OPTIONS, **options})
+        status, response_headers, body = await call_asgi(static, method, "/", headers=headers)
+        expected_status, expected_headers, expected_body = await call_asgi(
+            CORSMiddleware(app, **{**OPTIONS, **options}), method, "/", headers=headers)
+        self.assertEqual((status, sorted(response_headers), body),
+                         (expected_status, sorted(expected_headers), expected_body))
+        return static, status
+
+    async def test_simple_requests(self):
+        await self.assertSameResponse("GET", [ORIGIN])
+        await self.assertSameResponse("POST", [ORIGIN, (b"content-type", b"application/json")])
+        # test case 2: without an Origin only Vary is added
+        await self.assertSameResponse("GET", [])
+        # test case 3: an OPTIONS request that is not a preflight
+        await self.assertSameResponse("OPTIONS", [ORIGIN])
+
+    async def test_cookie_requests(self):
+        await self.assertSameResponse("GET", [ORIGIN, (b"cookie", b"session=1")])
+        # test case 2: with credentials the origin is mirrored by the generic implementation
+        static, _ = await self.assertSameResponse("GET", [ORIGIN, (b"cookie", b"session=1")], allow_credentials=True)
+        self.assertFalse(static.static)
+
+    async def test_preflight(self):
+        preflight = [ORIGIN, (b"access-control-request-method", b"POST"),
+                     (b"access-control-request-headers", b"content-type, X-API-Key")]
+        static, status = await self.assertSameResponse("OPTIONS", preflight)
+        self.assertEqual(status, 200)
+        # test case 2: the remembered answer is sent again
+        await self.assertSameResponse("OPTIONS", preflight, static)
+        self.assertEqual(len(static.preflight_checks), 1)
+        # test case 3: without requested headers
+        await self.assertSameResponse("OPTIONS", preflight[:2])
+
+    async def test_bad_method(self):
+        _, status = await self.assertSameResponse("OPTIONS", [ORIGIN, (b"access-control-request-method", b"DELETE")])
+        self.assertEqual(status, 400)
+
+    async def test_bad_header(self):
+        _, status = await self.assertSameResponse("OPTIONS", [ORIGIN, (b"access-control-request-method", b"GET"),
+                                                              (b"access-control-request-headers", b"X-Secret")])
+        self.assertEqual(status, 400)
+
+    async def test_empty_header(self):
+        await self.assertSameResponse("OPTIONS", [ORIGIN, (b"access-control-request-method", b"GET"),
+                                                  (b"access-control-request-headers", b"")])
+        await self.assertSameResponse("GET", [(b"origin", b"")])
+
+
+if __name__ == '__main__':
+    unittest.main()
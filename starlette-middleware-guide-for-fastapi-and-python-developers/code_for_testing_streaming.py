@@ -0,0 +1,70 @@
+import json
+import unittest
+from starlette.applications import Starlette
+from starlette.routing import WebSocketRoute
+from starlette.testclient import TestClient
+from asgi_bench import make_scope
+from operations import evaluate
+from streaming import NDJSONCalculator, websocket_endpoint
+
+
+def calculate_item(item):
+    return evaluate(item["operation"], item["num1"], item["num2"])[1]
+
+
+# Send the chunks to the endpoint and return the response status and NDJSON lines
+async def stream(endpoint, chunks):
+    messages = [{"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+                for index, chunk in enumerate(chunks)]
+    response = {"status": None, "body": b""}
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        else:
+            response["body"] += message.get("body", b"")
+
+    await endpoint(make_scope("POST", "/calculate/stream/"), receive, send)
+    return response["status"], [json.loads(line) for line in response["body"].splitlines()]
+
+
+class TestNDJSONCalculator(unittest.IsolatedAsyncioTestCase):
+    async def test_lines_split_across_chunks(self):
+        chunks = [b'{"num1": 1, "num2": 2, "operation": "add"}\n{"num1": 6, "num2"', b': 3, "operation": ',
+                  b'"divide"}\nnot json\n', b'{"num1": 1, "num2": 0, "operation": "divide"}']
+        status, lines = await stream(NDJSONCalculator(calculate_item), chunks)
+        self.assertEqual(status, 200)
+        self.assertEqual([line.get("output", line.get("reason")) for line in lines],
+                         [3, 2.0, "Invalid JSON", "Cannot divide by zero"])
+
+    async def test_empty_body(self):
+        self.assertEqual(await stream(NDJSONCalculator(calculate_item), [b""]), (200, []))
+
+    async def test_long_line_before_any_output(self):
+        status, lines = await stream(NDJSONCalculator(calculate_item, max_line_size=100), [b"1" * 60] * 3)
+        self.assertEqual((status, lines), (413, [{"type": "FAILURE", "reason": "Line is too long"}]))
+
+    async def test_long_line_after_output(self):
+        chunks = [b'{"num1": 1, "num2": 2, "operation": "add"}\n', b"1" * 150, b"\n"]
+        status, lines = await stream(NDJSONCalculator(calculate_item, max_line_size=100), chunks)
+        self.assertEqual(status, 200)
+        self.assertEqual(lines, [{"type": "SUCCESS", "output": 3}, {"type": "FAILURE", "reason": "Line is too long"}])
+
+
+class TestWebSocket(unittest.TestCase):
+    def test_single_and_list_messages(self):
+        app = Starlette(routes=[WebSocketRoute("/calculate/ws", websocket_endpoint(calculate_item))])
+        with TestClient(app).websocket_connect("/calculate/ws") as websocket:
+            websocket.send_text(json.dumps({"num1": 2, "num2": 3, "operation": "multiply"}))
+            self.assertEqual(websocket.receive_json(), {"type": "SUCCESS", "output": 6})
+            websocket.send_text(json.dumps([{"num1": 2, "num2": 3, "operation": "subtract"}]))
+            self.assertEqual(websocket.receive_json(), [{"type": "SUCCESS", "output": -1}])
+            websocket.send_text("{")
+            self.assertEqual(websocket.receive_json(), {"type": "FAILURE", "reason": "Invalid JSON"})
+
+
+if __name__ == '__main__':
+    unittest.main()
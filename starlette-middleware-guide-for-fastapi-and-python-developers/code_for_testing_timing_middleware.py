@@ -0,0 +1,68 @@
+import asyncio
+import re
+import unittest
+from asgi_bench import call_asgi, make_scope
+from metrics import MetricsStore
+from timing_middleware import TimingMiddleware
+
+CHUNKS = [b"first\n", b"second\n", b""]
+
+
+async def hello(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"hello"})
+
+
+class TestTimingMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def test_process_time_header(self):
+        metrics = MetricsStore()
+        status, headers, body = await call_asgi(TimingMiddleware(hello, metrics=metrics), "GET", "/")
+        self.assertEqual((status, body), (200, b"hello"))
+        self.assertEqual(headers[0], (b"content-type", b"text/plain"))
+        self.assertEqual([name for name, _ in headers].count(b"x-process-time"), 1)
+        self.assertRegex(dict(headers)[b"x-process-time"].decode(), r"^\d+\.\d{4}s$")
+        self.assertEqual(metrics.histograms[("<unmatched>", None)].count, 1)
+
+    async def test_streaming_passes_through(self):
+        sent = []
+        chunk_sent = asyncio.Event()
+        resume = asyncio.Event()
+
+        # Streams CHUNKS, pausing after the first one until the test has seen it
+        async def stream(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            for index, chunk in enumerate(CHUNKS):
+                await send({"type": "http.response.body", "body": chunk, "more_body": index < len(CHUNKS) - 1})
+                if index == 0:
+                    chunk_sent.set()
+                    await resume.wait()
+
+        async def send(message):
+            sent.append(message)
+
+        task = asyncio.create_task(TimingMiddleware(stream)(make_scope("GET", "/"), None, send))
+        await chunk_sent.wait()
+        # test case 1: the first chunk reached the client before the response finished
+        self.assertEqual(sent[1], {"type": "http.response.body", "body": b"first\n", "more_body": True})
+        resume.set()
+        await task
+        # test case 2: body messages are passed on unchanged and in order
+        self.assertEqual(sent[1:], [{"type": "http.response.body", "body": chunk, "more_body": index < 2}
+                                    for index, chunk in enumerate(CHUNKS)])
+        self.assertTrue(re.fullmatch(rb"\d+\.\d{4}s", dict(sent[0]["headers"])[b"x-process-time"]))
+
+    async def test_non_http_scopes_are_untouched(self):
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append((scope["type"], send))
+
+        async def send(message):
+            pass
+
+        await TimingMiddleware(app)({"type": "lifespan"}, None, send)
+        self.assertEqual(calls, [("lifespan", send)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from starlette.testclient import TestClient
+from asgi_bench import call_asgi
+from tracing import RequestIDMiddleware, TraceBuffer, TraceSpan
+import starletteaddmultiple
+
+
+async def hello(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"hello"})
+
+
+class TestTraceBuffer(unittest.TestCase):
+    def test_snapshot_limits(self):
+        buffer = TraceBuffer(maxsize=3)
+        for index in range(5):
+            buffer.add(index)
+        self.assertEqual(buffer.snapshot(), [2, 3, 4])
+        self.assertEqual(buffer.snapshot(2), [3, 4])
+        self.assertEqual(buffer.snapshot(10), [2, 3, 4])
+        self.assertEqual(buffer.snapshot(0), [])
+        self.assertEqual(buffer.snapshot(-1), [])
+
+
+class TestRequestID(unittest.IsolatedAsyncioTestCase):
+    async def test_trace_and_request_id(self):
+        buffer = TraceBuffer()
+        app = RequestIDMiddleware(TraceSpan(TraceSpan(hello, name="router"), name="timing"), traces=buffer)
+        # test case 1: a valid incoming ID is reused
+        _, headers, _ = await call_asgi(app, "GET", "/", headers=[(b"x-request-id", b"abc-123")])
+        self.assertIn((b"x-request-id", b"abc-123"), headers)
+        # test case 2: anything else is replaced
+        _, headers, _ = await call_asgi(app, "GET", "/", headers=[(b"x-request-id", b"bad id\n")])
+        request_id = dict(headers)[b"x-request-id"]
+        self.assertEqual(len(request_id), 32)
+        traces = buffer.snapshot()
+        self.assertEqual([trace["request_id"] for trace in traces], ["abc-123", request_id.decode()])
+        self.assertEqual([span["name"] for span in traces[0]["spans"]], ["timing", "router"])
+        self.assertEqual(traces[0]["status"], 200)
+
+
+class TestDebugTracesEndpoint(unittest.TestCase):
+    def test_limit_parameter(self):
+        client = TestClient(starletteaddmultiple.app)
+        client.get("/")
+        self.assertEqual(client.get("/debug/traces", params={"limit": "x"}).status_code, 400)
+        self.assertEqual(client.get("/debug/traces", params={"limit": "-5"}).json(), {"traces": []})
+        self.assertEqual(len(client.get("/debug/traces", params={"limit": "1"}).json()["traces"]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import asyncio
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from operations import evaluate
+
+WORD_BITS = 64
+
+
+# Largest result that can still be encoded as a JSON integer: CPython refuses to
+# convert ints with more than sys.get_int_max_str_digits() digits to str
+def default_max_result_bits():
+    max_digits = sys.get_int_max_str_digits() if hasattr(sys, "get_int_max_str_digits") else 0
+    return int(max_digits * math.log2(10)) if max_digits else 1 << 20
+
+
+def bit_length(x):
+    return x.bit_length() if type(x) is int else WORD_BITS
+
+
+# Estimate the size of the result in bits and the work in 64-bit word operations.
+# Float arithmetic is constant time; only Python ints grow with their operands.
+def estimate_cost(name, num1, num2):
+    if type(num1) is not int or type(num2) is not int:
+        return WORD_BITS, 1
+    bits1, bits2 = bit_length(num1), bit_length(num2)
+    words1, words2 = bits1 // WORD_BITS + 1, bits2 // WORD_BITS + 1
+    if name in ("add", "subtract"):
+        return max(bits1, bits2) + 1, max(words1, words2)
+    if name == "multiply":
+        return bits1 + bits2, words1 * words2
+    if name == "power":
+        # 0, 1 and -1 stay small, and negative exponents give a float
+        if num2 < 0 or abs(num1) <= 1:
+            return WORD_BITS, words1
+        # log2 of the result, close enough to compare against the digit limit; exponents
+        # beyond 64 bits only need to be recognised as too large
+        if bits2 > WORD_BITS:
+            return (bits1 - 1) * num2, (bits1 - 1) * num2
+        result_bits = int(num2 * math.log2(abs(num1))) + 1
+        return result_bits, int((result_bits // WORD_BITS + 1) ** 1.585)
+    if name == "mod":
+        return bits2, words1 * words2
+    # divide and floordiv
+    return max(bits1 - bits2, WORD_BITS), words1 * words2
+
+
+# Decides where a calculation runs: cheap ones inline on the event loop, expensive
+# ones in a bounded process pool, and ones whose result would be too large not at all.
+# A pool round trip costs about 85 us, as much as a multiply of about 50,000 word
+# products, so inline_cost sits just above that. Under the default digit limit
+# every accepted calculation runs inline; the pool only takes work when the limit is raised.
+class ExecutionPolicy:
+    def __init__(self, inline_cost=65536, max_result_bits=None, max_workers=None, max_pending=32):
+        self.inline_cost = inline_cost
+        self.max_result_bits = max_result_bits or default_max_result_bits()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.executor = None
+        # Queue-depth metrics
+        self.pending = 0
+        self.peak_pending = 0
+        self.inline = 0
+        self.offloaded = 0
+        self.rejected_too_large = 0
+        self.rejected_busy = 0
+
+    async def evaluate(self, name, num1, num2):
+        result_bits, cost = estimate_cost(name, num1, num2)
+        if result_bits > self.max_result_bits:
+            self.rejected_too_large += 1
+            return 413, {"type": "FAILURE", "reason": "Operands are too large"}
+        if cost <= self.inline_cost:
+            self.inline += 1
+            return evaluate(name, num1, num2)
+        if self.pending >= self.max_pending:
+            self.rejected_busy += 1
+            return 503, {"type": "FAILURE", "reason": "Server is busy"}
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        self.offloaded += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, evaluate, name, num1, num2)
+        finally:
+            self.pending -= 1
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "rejected_too_large": self.rejected_too_large,
+            "rejected_busy": self.rejected_busy,
+        }
+
+    def render_prometheus(self, name="calculation_executor"):
+        stats = self.stats()
+        return "".join(f"# TYPE {name}_{key} {'gauge' if 'pending' in key else 'counter'}\n{name}_{key} {value}\n"
+                       for key, value in stats.items())
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,133 @@
+import ast
+import math
+from functools import lru_cache
+from execution_policy import default_max_result_bits, estimate_cost
+from operations import NUMBER_TYPES, OPERATIONS, RESULT_TOO_LARGE, error_reason
+
+# Each operator with the name of its /calculate/ operation, which is also the
+# execution_policy name used to estimate the size of its result
+BINARY_OPERATORS = {node: (name, OPERATIONS[name].func) for node, name in (
+    (ast.Add, "add"), (ast.Sub, "subtract"), (ast.Mult, "multiply"), (ast.Div, "divide"))}
+# Unary minus and plus multiply by -1 and 1, so they keep the operand's type and the sign of -0.0
+SIGNS = {ast.USub: -1, ast.UAdd: 1}
+MAX_LENGTH = 1000
+MAX_DEPTH = 100
+# The same result size limit as /calculate/: larger ints could not be encoded as JSON
+MAX_RESULT_BITS = default_max_result_bits()
+# Reason reported for each exception type an expression can raise
+ERRORS = {
+    TypeError: "Both values must be numbers",
+    ZeroDivisionError: "Cannot divide by zero",
+    OverflowError: RESULT_TOO_LARGE,
+}
+
+
+# Raised for expressions that cannot be compiled; the message is the failure reason
+class ExpressionError(ValueError):
+    pass
+
+
+# Raised before an operation whose int result would exceed MAX_RESULT_BITS
+class OperandsTooLarge(Exception):
+    pass
+
+
+# Define a function that applies one binary operation. The size of an int result is
+# estimated before it is computed, and a float that overflows to inf or nan is
+# reported like an int overflow rather than returned.
+def apply(name, func, num1, num2):
+    if estimate_cost(name, num1, num2)[0] > MAX_RESULT_BITS:
+        raise OperandsTooLarge
+    result = func(num1, num2)
+    if type(result) is float and not math.isfinite(result):
+        raise OverflowError
+    return result
+
+
+# Define a function that turns an AST node into a closure taking the variable bindings
+def build(node, depth=0):
+    if depth > MAX_DEPTH:
+        raise ExpressionError("Expression is too deeply nested")
+    if isinstance(node, ast.BinOp):
+        # A left-associative chain such as a*b+c-d is one loop over its operations,
+        # so only real nesting (parentheses, right operands, unary operators) counts
+        # towards MAX_DEPTH and evaluation does not recurse once per term
+        steps = []
+        while isinstance(node, ast.BinOp):
+            operator = BINARY_OPERATORS.get(type(node.op))
+            if operator is None:
+                raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+            steps.append((*operator, build(node.right, depth + 1)))
+            node = node.left
+        steps.reverse()
+        first = build(node, depth + 1)
+
+        def chain(variables):
+            value = first(variables)
+            for name, func, right in steps:
+                value = apply(name, func, value, right(variables))
+            return value
+
+        return chain
+    if isinstance(node, ast.UnaryOp):
+        sign = SIGNS.get(type(node.op))
+        if sign is None:
+            raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        if isinstance(node.operand, ast.Constant) and type(node.operand.value) in NUMBER_TYPES:
+            value = sign * node.operand.value
+            return lambda variables: value
+        operand = build(node.operand, depth + 1)
+        return lambda variables: sign * operand(variables)
+    if isinstance(node, ast.Constant):
+        # bool, str, complex and None literals fail the same check as bad operands
+        if type(node.value) not in NUMBER_TYPES:
+            raise ExpressionError(f"Unsupported literal: {node.value!r}")
+        value = node.value
+        return lambda variables: value
+    if isinstance(node, ast.Name):
+        name = node.id
+
+        def load(variables):
+            value = variables[name]
+            if type(value) not in NUMBER_TYPES:
+                raise TypeError("Both values must be numbers")
+            return value
+
+        return load
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+# Parse an expression made of numbers, variables, + - * / and parentheses into a
+# closure. The AST is only walked, never compiled to Python bytecode, so nothing
+# but the add, subtract, multiply and divide operations can run. Compiled
+# expressions are kept in a bounded LRU keyed by the expression text, so evaluating
+# the same expression with new variable bindings skips parsing entirely.
+@lru_cache(maxsize=1024)
+def compile_expression(text):
+    if len(text) > MAX_LENGTH:
+        raise ExpressionError(f"Expression is longer than {MAX_LENGTH} characters")
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except (SyntaxError, ValueError, MemoryError, RecursionError):
+        raise ExpressionError("Invalid expression") from None
+    return build(tree.body)
+
+
+# Evaluate an expression and return the status code and the response content
+def evaluate_expression(text, variables=None):
+    try:
+        expression = compile_expression(text)
+    except ExpressionError as exc:
+        return 400, {"type": "FAILURE", "reason": str(exc)}
+    try:
+        result = expression(variables or {})
+    except KeyError as exc:
+        return 400, {"type": "FAILURE", "reason": f"Unknown variable: {exc.args[0]}"}
+    except OperandsTooLarge:
+        return 413, {"type": "FAILURE", "reason": "Operands are too large"}
+    except tuple(ERRORS) as exc:
+        return 400, {"type": "FAILURE", "reason": error_reason(ERRORS, exc)}
+    # A constant such as 1e999 is already inf
+    if type(result) is float and not math.isfinite(result):
+        return 400, {"type": "FAILURE", "reason": RESULT_TOO_LARGE}
+    return 200, {"type": "SUCCESS", "output": result}
@@ -0,0 +1,79 @@
+import json
+import re
+from fastapi import Request
+from fastapi.routing import APIRoute
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson parses integers outside the 64-bit range as floats, so bodies that
+# contain such long digit runs go through the stdlib parser to keep them exact
+LONG_INTEGER = re.compile(rb"\d{19}")
+
+
+def stdlib_dumps(content):
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+if orjson is not None:
+    def loads(body):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if LONG_INTEGER.search(body):
+            return json.loads(body)
+        return orjson.loads(body)
+
+    # For callers that convert every number to float anyway (such as the validators):
+    # skips the long-integer scan, falling back to the stdlib only when orjson fails
+    def loads_floats(body):
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            if LONG_INTEGER.search(body):
+                return json.loads(body)
+            raise
+
+    def dumps(content):
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            # Integers outside the 64-bit range and other types orjson refuses
+            return stdlib_dumps(content)
+else:
+    loads = loads_floats = json.loads
+    dumps = stdlib_dumps
+
+
+# JSONResponse that encodes with orjson when it is installed
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        return dumps(content)
+
+
+# Response for JSON bodies that were encoded ahead of time, such as constant payloads
+class RawJSONResponse(Response):
+    media_type = "application/json"
+
+
+# Request whose json() uses the fast decoder. FastAPI parses bodies through request.json().
+class FastJSONRequest(Request):
+    async def json(self):
+        if not hasattr(self, "_json"):
+            self._json = loads(await self.body())
+        return self._json
+
+
+# APIRoute that hands FastJSONRequest objects to FastAPI's request handling
+class FastJSONRoute(APIRoute):
+    def get_route_handler(self):
+        route_handler = super().get_route_handler()
+
+        async def fast_json_route_handler(request):
+            return await route_handler(FastJSONRequest(request.scope, request.receive))
+
+        return fast_json_route_handler
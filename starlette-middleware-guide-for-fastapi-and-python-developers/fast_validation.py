@@ -0,0 +1,107 @@
+from enum import Enum
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from operations import OPERATIONS
+from fast_json import loads_floats
+
+MISSING = object()
+FIELDS = ("num1", "num2", "operation")
+NOT_A_VALID_OPERATION = {"type": "FAILURE", "reason": "Not a valid operation"}
+
+
+# Validated /calculate/ body: the same fields as the Pydantic InputData model,
+# without the per-instance __dict__ and model machinery
+class CalculationInput:
+    __slots__ = ("num1", "num2", "operation")
+
+    def __init__(self, num1, num2, operation):
+        self.num1 = num1
+        self.num2 = num2
+        self.operation = operation
+
+    def __repr__(self):
+        return f"CalculationInput(num1={self.num1!r}, num2={self.num2!r}, operation={self.operation.value!r})"
+
+
+# Error entries in the format FastAPI reports Pydantic failures in
+def error(kind, loc, msg, value):
+    return {"type": kind, "loc": ("body", *loc), "msg": msg, "input": value}
+
+
+# Coerce a number field the way Pydantic's lax float validation does: JSON
+# numbers and booleans directly, strings through float(), everything else fails
+def as_float(value, name, errors):
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int or value_type is bool:
+        try:
+            return float(value)
+        except OverflowError:
+            # Integers beyond the float range
+            errors.append(error("float_type", (name,), "Input should be a valid number", value))
+            return None
+    if value_type is str:
+        try:
+            return float(value)
+        except ValueError:
+            errors.append(error("float_parsing", (name,),
+                                "Input should be a valid number, unable to parse string as a number", value))
+            return None
+    errors.append(error("float_type", (name,), "Input should be a valid number", value))
+    return None
+
+
+# Decodes and validates a raw /calculate/ body in one pass. The operation enum is
+# built from the operations registry when the validator is created, so register
+# custom operations before creating it. Invalid bodies raise the same
+# RequestValidationError (422) as the Pydantic model, valid bodies naming an
+# unknown operation raise the same 404 as the handlers. Call it from a handler that
+# takes the raw Request: a Depends() wrapper costs more than the validation saves.
+class CalculationValidator:
+    def __init__(self, operations=OPERATIONS):
+        self.Operation = Enum("Operation", {name.upper(): name for name in operations}, type=str)
+        self.members = {member.value: member for member in self.Operation}
+
+    def __call__(self, body):
+        if not body:
+            raise RequestValidationError([error("missing", (), "Field required", None)])
+        try:
+            data = loads_floats(body)
+        except ValueError as exc:
+            raise RequestValidationError([{"type": "json_invalid", "loc": ("body", getattr(exc, "pos", 0)),
+                                           "msg": "JSON decode error", "input": {},
+                                           "ctx": {"error": getattr(exc, "msg", str(exc))}}])
+        if data is None:
+            # FastAPI treats a null body like an empty one
+            raise RequestValidationError([error("missing", (), "Field required", None)])
+        if type(data) is not dict:
+            raise RequestValidationError([error("model_attributes_type", (),
+                                                "Input should be a valid dictionary or object to extract fields from",
+                                                data)])
+        num1 = data.get("num1", MISSING)
+        num2 = data.get("num2", MISSING)
+        operation = data.get("operation", MISSING)
+        # Fast path: two JSON numbers and a known operation name
+        member = self.members.get(operation) if type(operation) is str else None
+        if member is not None and type(num1) in (int, float) and type(num2) in (int, float):
+            try:
+                return CalculationInput(float(num1), float(num2), member)
+            except OverflowError:
+                pass
+        errors = []
+        for name, value in zip(FIELDS, (num1, num2, operation)):
+            if value is MISSING:
+                errors.append(error("missing", (name,), "Field required", data))
+        if num1 is not MISSING:
+            num1 = as_float(num1, "num1", errors)
+        if num2 is not MISSING:
+            num2 = as_float(num2, "num2", errors)
+        if operation is not MISSING and type(operation) is not str:
+            errors.append(error("string_type", ("operation",), "Input should be a valid string", operation))
+        if errors:
+            errors.sort(key=lambda entry: FIELDS.index(entry["loc"][1]))
+            raise RequestValidationError(errors)
+        if member is None:
+            raise HTTPException(status_code=404, detail=NOT_A_VALID_OPERATION)
+        return CalculationInput(num1, num2, member)
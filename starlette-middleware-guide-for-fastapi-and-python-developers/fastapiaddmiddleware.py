@@ -1,10 +1,12 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
-from starlette.middleware.cors import CORSMiddleware
+from static_cors import StaticCORSMiddleware
+from operations import evaluate
+from fast_json import FastJSONResponse, FastJSONRoute, RawJSONResponse, dumps
 
-app = FastAPI()
-app.add_middleware(CORSMiddleware,
+app = FastAPI(default_response_class=FastJSONResponse)
+app.router.route_class = FastJSONRoute
+app.add_middleware(StaticCORSMiddleware,
                    allow_origins=["*"],
                    allow_methods=["GET", "POST"],
                    allow_headers=["Content-Type", "X-API-Key"],
@@ -14,11 +16,14 @@ app.add_middleware(CORSMiddleware,
                    )
 
 
+# Encode the constant root API response once
+METADATA = dumps({"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
+
+
 # Define the root API endpoint
 @app.get("/")
 async def root():
-    return JSONResponse(status_code=200,
-                        content={"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
+    return RawJSONResponse(METADATA)
 
 
 # Define the input data model
@@ -31,20 +36,9 @@ class InputData(BaseModel):
 # Define the calculator API endpoint
 @app.post("/calculate/")
 async def calculation(input_data: InputData):
-    num1 = input_data.num1
-    num2 = input_data.num2
     operation = input_data.operation
-    if operation == "add":
-        result = num1 + num2
-    elif operation == "subtract":
-        result = num1 - num2
-    elif operation == "multiply":
-        result = num1 * num2
-    elif operation == "divide":
-        result = num1 / num2
-    else:
-        result = None
-    if result is None:
-        raise HTTPException(status_code=404, detail={"type": "FAILURE", "reason": "Not a valid operation"})
+    status_code, content = evaluate(operation, input_data.num1, input_data.num2)
+    if status_code != 200:
+        raise HTTPException(status_code=status_code, detail=content)
     else:
-        return JSONResponse(status_code=200, content={"type": "SUCCESS", "output": result})
+        return FastJSONResponse(status_code=200, content=content)
@@ -1,23 +1,15 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
-from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from fastapi.responses import PlainTextResponse
+from static_cors import StaticCORSMiddleware
 from starlette.middleware import Middleware
-import time
+from timing_middleware import TimingMiddleware
+import metrics as prometheus
+from operations import evaluate
+from fast_json import FastJSONResponse, FastJSONRoute, RawJSONResponse, dumps
 
 
-class TimingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.perf_counter()
-        response = await call_next(request)
-        duration = time.perf_counter() - start_time
-        response.headers["X-Process-Time"] = f"{duration:.4f}s"
-        return response
-
-
-cors_middleware = Middleware(CORSMiddleware,
+cors_middleware = Middleware(StaticCORSMiddleware,
                              allow_origins=["*"],
                              allow_methods=["GET", "POST"],
                              allow_headers=["Content-Type", "X-API-Key"],
@@ -25,16 +17,27 @@ cors_middleware = Middleware(CORSMiddleware,
                              allow_credentials=False,
                              max_age=3600)
 
-timing_middleware = Middleware(TimingMiddleware)
+metrics_store = prometheus.MetricsStore()
+timing_middleware = Middleware(TimingMiddleware, metrics=metrics_store)
+
+app = FastAPI(middleware=[cors_middleware, timing_middleware], default_response_class=FastJSONResponse)
+app.router.route_class = FastJSONRoute
+
 
-app = FastAPI(middleware=[cors_middleware, timing_middleware])
+# Define the metrics API endpoint
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(metrics_store.render_prometheus(), media_type=prometheus.CONTENT_TYPE)
+
+
+# Encode the constant root API response once
+METADATA = dumps({"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
 
 
 # Define the root API endpoint
 @app.get("/")
 async def root():
-    return JSONResponse(status_code=200,
-                        content={"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
+    return RawJSONResponse(METADATA)
 
 
 # Define the input data model
@@ -46,21 +49,11 @@ class InputData(BaseModel):
 
 # Define the calculator API endpoint
 @app.post("/calculate/")
-async def calculation(input_data: InputData):
-    num1 = input_data.num1
-    num2 = input_data.num2
+async def calculation(input_data: InputData, request: Request):
     operation = input_data.operation
-    if operation == "add":
-        result = num1 + num2
-    elif operation == "subtract":
-        result = num1 - num2
-    elif operation == "multiply":
-        result = num1 * num2
-    elif operation == "divide":
-        result = num1 / num2
-    else:
-        result = None
-    if result is None:
-        raise HTTPException(status_code=404, detail={"type": "FAILURE", "reason": "Not a valid operation"})
+    status_code, content = evaluate(operation, input_data.num1, input_data.num2)
+    if status_code != 200:
+        raise HTTPException(status_code=status_code, detail=content)
     else:
-        return JSONResponse(status_code=200, content={"type": "SUCCESS", "output": result})
+        request.state.operation = operation
+        return FastJSONResponse(status_code=200, content=content)
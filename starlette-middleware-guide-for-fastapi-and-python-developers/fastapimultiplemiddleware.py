@@ -1,24 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
-from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-import time
+from fastapi.responses import PlainTextResponse
+from static_cors import StaticCORSMiddleware
+from timing_middleware import TimingMiddleware
+from profiling import PROFILE_TOKEN, ProfileStore, ProfilingMiddleware, token_matches
+from tracing import RequestIDMiddleware, TraceBuffer, TraceSpan
+import metrics as prometheus
+from operations import evaluate
+from fast_json import FastJSONResponse, FastJSONRoute, RawJSONResponse, dumps
 
 
-class TimingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.perf_counter()
-        response = await call_next(request)
-        duration = time.perf_counter() - start_time
-        response.headers["X-Process-Time"] = f"{duration:.4f}s"
-        return response
+metrics_store = prometheus.MetricsStore()
+trace_buffer = TraceBuffer(maxsize=1000)
+profile_store = ProfileStore()
+app = FastAPI(default_response_class=FastJSONResponse)
+app.router.route_class = FastJSONRoute
 
-
-app = FastAPI()
-
-app.add_middleware(CORSMiddleware,
+# Each TraceSpan records the time spent in the layer added right after it and below
+app.add_middleware(TraceSpan, name="router")
+app.add_middleware(StaticCORSMiddleware,
                    allow_origins=["*"],
                    allow_methods=["GET", "POST"],
                    allow_headers=["Content-Type", "X-API-Key"],
@@ -26,14 +26,54 @@ app.add_middleware(CORSMiddleware,
                    allow_credentials=False,
                    max_age=3600
                    )
-app.add_middleware(TimingMiddleware)
+app.add_middleware(TraceSpan, name="cors")
+app.add_middleware(TimingMiddleware, metrics=metrics_store)
+app.add_middleware(TraceSpan, name="timing")
+app.add_middleware(RequestIDMiddleware, traces=trace_buffer)
+# Profile requests sent with "X-Profile: <token>" once HONEYBADGER_PROFILE_TOKEN is set;
+# raise sample_rate to also profile random requests
+if PROFILE_TOKEN is not None:
+    app.add_middleware(ProfilingMiddleware, profiles=profile_store, sample_rate=0.0, token=PROFILE_TOKEN)
+
+
+# Define the metrics API endpoint
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(metrics_store.render_prometheus(), media_type=prometheus.CONTENT_TYPE)
+
+
+# Define the debug API endpoint listing the most recent request traces
+@app.get("/debug/traces")
+async def debug_traces(limit: int = Query(100, ge=0)):
+    return FastJSONResponse(status_code=200, content={"traces": trace_buffer.snapshot(limit)})
+
+
+# Define the debug API endpoint printing the aggregated request profiles. It needs
+# the profiling token in X-Profile and does not exist while no token is set.
+@app.get("/debug/profile")
+async def debug_profile(request: Request, sort: str = "cumulative", limit: int = Query(40, ge=0),
+                        reset: bool = False):
+    if PROFILE_TOKEN is None:
+        raise HTTPException(status_code=404)
+    if not token_matches(request.headers.get("x-profile"), PROFILE_TOKEN):
+        raise HTTPException(status_code=403, detail={"type": "FAILURE", "reason": "Invalid profiling token"})
+    try:
+        report = profile_store.report(sort, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail={"type": "FAILURE", "reason": str(exc)})
+    if reset:
+        profile_store.reset()
+    return PlainTextResponse(report)
+
+
+# Encode the constant root API response once
+METADATA = dumps({"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
 
 
 # Define the root API endpoint
 @app.get("/")
 async def root():
-    return JSONResponse(status_code=200,
-                        content={"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
+    return RawJSONResponse(METADATA)
 
 
 # Define the input data model
@@ -45,21 +85,11 @@ class InputData(BaseModel):
 
 # Define the calculator API endpoint
 @app.post("/calculate/")
-async def calculation(input_data: InputData):
-    num1 = input_data.num1
-    num2 = input_data.num2
+async def calculation(input_data: InputData, request: Request):
     operation = input_data.operation
-    if operation == "add":
-        result = num1 + num2
-    elif operation == "subtract":
-        result = num1 - num2
-    elif operation == "multiply":
-        result = num1 * num2
-    elif operation == "divide":
-        result = num1 / num2
-    else:
-        result = None
-    if result is None:
-        raise HTTPException(status_code=404, detail={"type": "FAILURE", "reason": "Not a valid operation"})
+    status_code, content = evaluate(operation, input_data.num1, input_data.num2)
+    if status_code != 200:
+        raise HTTPException(status_code=status_code, detail=content)
     else:
-        return JSONResponse(status_code=200, content={"type": "SUCCESS", "output": result})
+        request.state.operation = operation
+        return FastJSONResponse(status_code=200, content=content)
@@ -0,0 +1,338 @@
+import asyncio
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from fast_json import dumps, loads
+from response_cache import calculation_key, request_key
+
+COLUMNS = ("created", "operation", "num1", "num2", "status", "response")
+# An in-memory database, so running an app leaves no file behind; keep the history
+# by setting the [database] url or HONEYBADGER_HISTORY_URL to a sqlite:/// file
+DEFAULT_URL = os.environ.get("HONEYBADGER_HISTORY_URL") or "sqlite://"
+
+
+# SQLite backend: WAL journal so readers do not block the writer, and multi-row
+# INSERT statements sized to the variable limit. SQLite runs one write transaction
+# at a time, so more connections would only wait on each other's locks.
+class SQLiteBackend:
+    max_connections = 1
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        # sqlite:///relative.db, sqlite:////absolute.db, or sqlite:// for a shared in-memory database
+        path = parts.path[1:] if parts.path.startswith("/") else parts.path
+        self.path = path or "file:calculation-history?mode=memory&cache=shared"
+        self.uri = self.path.startswith("file:")
+        self.statements = {}
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, uri=self.uri, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS calculation_history ("
+                           "id INTEGER PRIMARY KEY, created REAL, operation TEXT, num1 TEXT, num2 TEXT, "
+                           "status INTEGER, response TEXT)")
+        return connection
+
+    def statement(self, rows):
+        if rows not in self.statements:
+            values = ",".join(["(" + ",".join("?" * len(COLUMNS)) + ")"] * rows)
+            self.statements[rows] = f"INSERT INTO calculation_history ({','.join(COLUMNS)}) VALUES {values}"
+        return self.statements[rows]
+
+    def insert(self, connection, rows):
+        try:
+            max_variables = connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        except AttributeError:
+            max_variables = 999
+        chunk = max(1, max_variables // len(COLUMNS))
+        connection.execute("BEGIN")
+        try:
+            for start in range(0, len(rows), chunk):
+                part = rows[start:start + chunk]
+                connection.execute(self.statement(len(part)), [value for row in part for value in row])
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+
+BACKENDS = {"sqlite": SQLiteBackend}
+
+
+# Define a function that picks the backend for a database URL
+def open_backend(url):
+    scheme = urlsplit(url).scheme
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unsupported database URL scheme: {scheme!r}")
+    return BACKENDS[scheme](url)
+
+
+# Define a function that closes the connection of a finished connect() future
+def close_connection(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+# Up to size connections (no more than the backend allows), opened on first use.
+# Blocking database calls run in a thread pool of the same size so they never run
+# on the event loop. acquire() raises TimeoutError after waiting timeout seconds
+# for a connection.
+class ConnectionPool:
+    def __init__(self, backend, size, timeout=30.0):
+        self.backend = backend
+        self.size = max(1, min(size, backend.max_connections))
+        self.timeout = timeout
+        self.created = 0
+        self.idle = []
+        self.waiters = deque()
+        self.executor = None
+        self.executor_size = 0
+
+    # Change the number of connections; safe to call from another thread, such as the
+    # config watcher. Extra connections are closed as they are released, and the
+    # thread pool is replaced on the next database call.
+    def resize(self, size):
+        self.size = max(1, min(size, self.backend.max_connections))
+
+    def run(self, func, *args):
+        if self.executor_size != self.size:
+            if self.executor is not None:
+                # Calls already running on the old threads finish there
+                self.executor.shutdown(wait=False)
+            self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="history-db")
+            self.executor_size = self.size
+        return asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def acquire(self):
+        if self.idle:
+            return self.idle.pop()
+        if self.created < self.size:
+            self.created += 1
+            future = self.run(self.backend.connect)
+            try:
+                return await asyncio.shield(future)
+            except BaseException:
+                self.created -= 1
+                # Cancelling the caller does not stop connect() in its thread: close what it opens
+                future.add_done_callback(close_connection)
+                raise
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if waiter.done() and not waiter.cancelled():
+                # release() handed over a connection just as this caller gave up: pass it on
+                self.release(waiter.result())
+            else:
+                try:
+                    self.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self, connection):
+        if self.created > self.size:
+            connection.close()
+            self.created -= 1
+            return
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(connection)
+                return
+        self.idle.append(connection)
+
+    def close(self):
+        for connection in self.idle:
+            connection.close()
+        self.created -= len(self.idle)
+        self.idle.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            self.executor_size = 0
+
+
+# Audit trail of calculations. record() only appends to an in-memory queue; a
+# background task started on first use flushes the queue every flush_interval
+# seconds (or as soon as batch_size records are waiting) with multi-row INSERTs,
+# running up to pool_size batches at once (one for SQLite). Records beyond
+# max_queue are dropped and counted instead of slowing requests down.
+class CalculationHistory:
+    def __init__(self, url=DEFAULT_URL, pool_size=10, batch_size=500, flush_interval=0.1, max_queue=100000):
+        self.pool = ConnectionPool(open_backend(url), pool_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.pending = deque()
+        self.wakeup = asyncio.Event()
+        self.flusher = None
+        self.writes = set()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_error = None
+
+    # Build the history from the [database] section of a ConfigLoader; URL schemes
+    # without a backend (such as the postgres:// placeholder in the sample files) fall
+    # back to SQLite. The URL is only read here, but a new pool size is applied while
+    # the server runs.
+    @classmethod
+    def from_config(cls, loader, fallback_url=DEFAULT_URL, **kwargs):
+        url = loader.config.database.url
+        if not url or urlsplit(url).scheme not in BACKENDS:
+            url = fallback_url
+        history = cls(url, pool_size=loader.config.database.pool, **kwargs)
+
+        def update_pool_size(config, changes):
+            if "database.pool" in changes:
+                history.pool.resize(config.database.pool)
+
+        loader.subscribe(update_pool_size)
+        return history
+
+    # Open the first connection, so a bad database URL fails when the app starts
+    # rather than on the first flush
+    async def open(self):
+        self.pool.release(await self.pool.acquire())
+
+    def record(self, operation, num1, num2, status, content):
+        if len(self.pending) >= self.max_queue:
+            self.dropped += 1
+            return
+        self.pending.append((time.time(), operation, num1, num2, status, content))
+        if self.flusher is None:
+            self.flusher = asyncio.get_running_loop().create_task(self.run())
+        elif len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        while self.pending:
+            try:
+                connection = await self.pool.acquire()
+            except asyncio.TimeoutError as exc:
+                # Every connection is stuck on a slow write: keep the records for the next flush
+                self.last_error = exc
+                break
+            batch = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+            if not batch:
+                self.pool.release(connection)
+                break
+            task = asyncio.get_running_loop().create_task(self.write(connection, batch))
+            self.writes.add(task)
+            task.add_done_callback(self.writes.discard)
+
+    async def write(self, connection, batch):
+        try:
+            written, error = await self.pool.run(self.insert, connection, batch)
+        except Exception as exc:
+            written, error = 0, exc
+        finally:
+            self.pool.release(connection)
+        self.written += written
+        self.failed += len(batch) - written
+        if error is not None:
+            self.last_error = error
+
+    # Runs in a pool thread: encode the operands and responses, then insert the batch.
+    # A row that cannot be encoded or inserted is skipped rather than failing the
+    # rest of its batch. Returns the number of rows written and the last error.
+    def insert(self, connection, batch):
+        rows = []
+        error = None
+        for created, operation, num1, num2, status, content in batch:
+            try:
+                rows.append((created, operation, dumps(num1).decode(), dumps(num2).decode(), status,
+                             dumps(content).decode()))
+            except Exception as exc:
+                error = exc
+        if not rows:
+            return 0, error
+        try:
+            self.pool.backend.insert(connection, rows)
+            return len(rows), error
+        except Exception as exc:
+            error = exc
+        # The multi-row insert was rolled back: insert row by row to find the bad ones
+        written = 0
+        for row in rows:
+            try:
+                self.pool.backend.insert(connection, [row])
+                written += 1
+            except Exception as exc:
+                error = exc
+        return written, error
+
+    # Write everything still queued and release the connections
+    async def close(self):
+        if self.flusher is not None:
+            self.flusher.cancel()
+            self.flusher = None
+        await self.flush()
+        if self.writes:
+            await asyncio.gather(*self.writes)
+        self.pool.close()
+
+    def stats(self):
+        return {"pending": len(self.pending), "written": self.written, "failed": self.failed,
+                "dropped": self.dropped, "connections": self.pool.created}
+
+
+# Pure ASGI middleware that records every POST to `path` in a CalculationHistory.
+# Installed outside the response cache and single-flight middlewares, it also sees
+# the requests those layers answer without running the handler. Only plain
+# {num1, num2, operation} bodies are recorded, with the status and decoded body of
+# the response the client was sent.
+class HistoryMiddleware:
+    def __init__(self, app, history, path="/calculate/", max_body_size=4096):
+        self.app = app
+        self.history = history
+        self.path = path
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        key, replay_receive = await request_key(scope, receive, calculation_key, self.max_body_size)
+        if replay_receive is None:
+            return
+        if key is None:
+            await self.app(scope, replay_receive, send)
+            return
+
+        data = scope["state"]["request_json"]
+        status = None
+        body_parts = []
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    try:
+                        content = loads(b"".join(body_parts))
+                    except ValueError:
+                        content = None
+                    self.history.record(data["operation"], data["num1"], data["num2"], status, content)
+            await send(message)
+
+        await self.app(scope, replay_receive, send_wrapper)
@@ -0,0 +1,108 @@
+from bisect import bisect_left
+
+# Upper bounds (in seconds) of the fixed latency buckets, from 50µs to 10s
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+# Fixed-bucket latency histogram. Recording is a bisect plus two additions,
+# with no locks: each worker process keeps its own store and the event loop
+# records samples from a single thread.
+class LatencyHistogram:
+    __slots__ = ("bounds", "counts", "total")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        # One counter per bucket plus a final +Inf bucket
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    # Estimate a quantile by linear interpolation inside the bucket that holds it
+    def quantile(self, q):
+        count = self.count
+        if not count:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                if index == len(self.bounds):
+                    return lower
+                upper = self.bounds[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.bounds[-1]
+
+
+# Latency histograms keyed on (route, operation)
+class MetricsStore:
+    def __init__(self, bounds=DEFAULT_BUCKETS, name="http_request_duration_seconds"):
+        self.bounds = bounds
+        self.name = name
+        self.histograms = {}
+
+    def record(self, route, operation, duration):
+        key = (route, operation)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram(self.bounds)
+        histogram.record(duration)
+
+    # Render every histogram in the Prometheus text exposition format, followed by
+    # the p50/p95/p99 estimates so they can be read without histogram_quantile()
+    def render_prometheus(self):
+        name = self.name
+        lines = [
+            f"# HELP {name} Request latency in seconds by route and operation.",
+            f"# TYPE {name} histogram",
+        ]
+        quantile_lines = [
+            f"# HELP {name}_quantile Estimated request latency quantiles in seconds.",
+            f"# TYPE {name}_quantile gauge",
+        ]
+        for (route, operation), histogram in sorted(self.histograms.items(), key=lambda item: str(item[0])):
+            labels = f'route="{escape_label(route)}",operation="{escape_label(operation or "")}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.bounds, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += histogram.counts[-1]
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+            for q in QUANTILES:
+                quantile_lines.append(f'{name}_quantile{{{labels},quantile="{q}"}} {histogram.quantile(q)}')
+        return "\n".join(lines + quantile_lines) + "\n"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Label for the route that served the request. Unmatched paths share one label
+# so that scanners cannot blow up the number of histograms.
+def route_label(scope):
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+# Label for the calculator operation, stored by the handler in request.state
+def operation_label(scope):
+    state = scope.get("state")
+    return state.get("operation") if state else None
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,45 @@
+# Runs several lightweight middlewares as one ASGI layer. Each middleware is a
+# hook object with an optional on_request(scope) and/or on_response(scope, message)
+# method; on_response may return a replacement message. Hooks are listed
+# outermost first, so request hooks run in list order and response hooks in
+# reverse order - the same order nested middlewares would produce - but with a
+# single call frame and a single send wrapper for the whole chain.
+class CompiledMiddleware:
+    def __init__(self, app, hooks):
+        self.app = app
+        self.hooks = list(hooks)
+        self.request_hooks = [hook.on_request for hook in self.hooks if hasattr(hook, "on_request")]
+        self.response_hooks = [hook.on_response for hook in reversed(self.hooks) if hasattr(hook, "on_response")]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        for on_request in self.request_hooks:
+            on_request(scope)
+        if not self.response_hooks:
+            await self.app(scope, receive, send)
+            return
+        response_hooks = self.response_hooks
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                for on_response in response_hooks:
+                    message = on_response(scope, message) or message
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# Hook version of the Tagger middleware from middleware_execution_order.py;
+# log is any one-argument callable, such as print or BatchLogger.info
+class Tag:
+    def __init__(self, name, log=print):
+        self.name = name
+        self.log = log
+
+    def on_request(self, scope):
+        self.log(f"→ Processing request: {self.name}")
+
+    def on_response(self, scope, message):
+        self.log(f"← Processing response:  {self.name}")
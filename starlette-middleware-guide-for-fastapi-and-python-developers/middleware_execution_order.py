@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request
 from starlette.middleware import Middleware
+from middleware_chain import CompiledMiddleware, Tag
 
 
 class Tagger:
@@ -59,3 +60,12 @@ async def m8(request: Request, call_next):
 async def root():
     print("   [route handler]")
     return {"ok": True}
+
+
+# The same eight middlewares compiled into a single ASGI layer, listed in the
+# order the stack above ends up in: decorators and add_middleware() calls are
+# inserted on the outside, constructor middlewares keep their order inside.
+compiled_app = FastAPI(middleware=[
+    Middleware(CompiledMiddleware, hooks=[Tag(name) for name in ("M8", "M6", "M5", "M7", "M4", "M1", "M2", "M3")]),
+])
+compiled_app.get("/")(root)
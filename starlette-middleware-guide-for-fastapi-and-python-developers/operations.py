@@ -0,0 +1,81 @@
+import math
+import operator
+
+NUMBER_TYPES = (int, float)
+RESULT_TOO_LARGE = "Result is too large"
+
+
+# A calculator operator: the callable, how many operands it takes and the
+# reason reported for each exception type it is allowed to raise
+class Operation:
+    __slots__ = ("name", "func", "arity", "errors", "error_types")
+
+    def __init__(self, name, func, arity=2, errors=None):
+        self.name = name
+        self.func = func
+        self.arity = arity
+        self.errors = dict(errors or {})
+        self.error_types = tuple(self.errors)
+
+
+# Define a function that returns the reason for an exception from an errors mapping.
+# The exception's base classes are looked up too, so a subclass of a declared type
+# (such as decimal.DivisionByZero for ZeroDivisionError) gets its parent's reason.
+def error_reason(errors, exc):
+    for exc_type in type(exc).__mro__:
+        if exc_type in errors:
+            return errors[exc_type]
+    raise exc
+
+
+# Registry of operation name -> Operation, shared by the Starlette and FastAPI apps
+OPERATIONS = {}
+
+
+def register(name, func, arity=2, errors=None):
+    OPERATIONS[name] = Operation(name, func, arity, errors)
+    return func
+
+
+def power(a, b):
+    result = a ** b
+    if type(result) is complex:
+        raise ValueError("Result is not a real number")
+    return result
+
+
+ZERO_DIVISION = {ZeroDivisionError: "Cannot divide by zero"}
+# Mixing a huge int with a float converts the int and can overflow
+OVERFLOW = {OverflowError: RESULT_TOO_LARGE}
+
+register("add", operator.add, errors=OVERFLOW)
+register("subtract", operator.sub, errors=OVERFLOW)
+register("multiply", operator.mul, errors=OVERFLOW)
+register("divide", operator.truediv, errors={**ZERO_DIVISION, **OVERFLOW})
+register("floordiv", operator.floordiv, errors={**ZERO_DIVISION, **OVERFLOW})
+register("mod", operator.mod, errors={**ZERO_DIVISION, **OVERFLOW})
+register("power", power, errors={
+    ZeroDivisionError: "Cannot raise zero to a negative power",
+    OverflowError: RESULT_TOO_LARGE,
+    ValueError: "Result is not a real number",
+})
+
+
+# Run an operation by name and return the status code and the response content
+def evaluate(name, num1, num2):
+    operation = OPERATIONS.get(name)
+    if operation is None:
+        return 404, {"type": "FAILURE", "reason": "Not a valid operation"}
+    if type(num1) not in NUMBER_TYPES or type(num2) not in NUMBER_TYPES:
+        return 400, {"type": "FAILURE", "reason": "Both values must be numbers"}
+    try:
+        if operation.arity == 2:
+            result = operation.func(num1, num2)
+        else:
+            result = operation.func(num1)
+    except operation.error_types as exc:
+        return 400, {"type": "FAILURE", "reason": error_reason(operation.errors, exc)}
+    # Float overflow gives inf (or nan from inf - inf), which JSON cannot represent
+    if type(result) is float and not math.isfinite(result):
+        return 400, {"type": "FAILURE", "reason": RESULT_TOO_LARGE}
+    return 200, {"type": "SUCCESS", "output": result}
@@ -0,0 +1,112 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import time
+
+# Shared secret for profiling: requests must send it in X-Profile, and the debug
+# endpoint only answers requests that do. Profiling stays off while it is unset.
+PROFILE_TOKEN = os.environ.get("HONEYBADGER_PROFILE_TOKEN") or None
+SORT_KEYS = frozenset(key.value for key in pstats.SortKey)
+
+
+# Define a function that checks a header value against the token in constant time
+def token_matches(value, token):
+    if not token or value is None:
+        return False
+    if isinstance(value, str):
+        value = value.encode("latin-1")
+    if isinstance(token, str):
+        token = token.encode("latin-1")
+    return hmac.compare_digest(value, token)
+
+
+# Merges finished cProfile runs into one pstats aggregate that a debug endpoint can
+# print or dump to a file
+class ProfileStore:
+    def __init__(self):
+        self.aggregate = None
+        self.profiled = 0
+        self.skipped = 0
+        self.profiled_seconds = 0.0
+
+    def add(self, profile, duration):
+        self.profiled += 1
+        self.profiled_seconds += duration
+        if self.aggregate is None:
+            self.aggregate = pstats.Stats(profile)
+        else:
+            self.aggregate.add(profile)
+
+    def report(self, sort="cumulative", limit=40):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(sorted(SORT_KEYS))}")
+        if self.aggregate is None:
+            return "No requests profiled yet.\n"
+        stream = io.StringIO()
+        self.aggregate.stream = stream
+        self.aggregate.sort_stats(sort).print_stats(limit)
+        return f"# {self.profiled} requests profiled, {self.profiled_seconds:.4f}s total\n" + stream.getvalue()
+
+    def dump(self, path):
+        # Binary pstats file for snakeviz, gprof2dot or pstats.Stats(path)
+        if self.aggregate is not None:
+            self.aggregate.dump_stats(path)
+
+    def reset(self):
+        self.aggregate = None
+        self.profiled = 0
+        self.skipped = 0
+        self.profiled_seconds = 0.0
+
+
+# Profiles a sampled fraction of HTTP requests, plus every request whose debug header
+# carries the token, with cProfile and adds the results to a ProfileStore. Without a
+# token the header is ignored, so clients cannot switch the profiler on. Only one
+# request is profiled at a time (cProfile hooks the whole interpreter), so a profile
+# covers everything the event loop ran while that request was in flight. With
+# sample_rate=0 and no debug header the cost is a header scan per request.
+class ProfilingMiddleware:
+    def __init__(self, app, profiles, sample_rate=0.0, header="X-Profile", token=None):
+        self.app = app
+        self.profiles = profiles
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode("latin-1") if header else None
+        self.token = token.encode("latin-1") if token else None
+        self.active = False
+
+    def wants_profile(self, scope):
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.header is not None:
+            for name, value in scope["headers"]:
+                if name == self.header:
+                    return token_matches(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if self.active:
+            self.profiles.skipped += 1
+            await self.app(scope, receive, send)
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage) already owns the interpreter hook
+            self.profiles.skipped += 1
+            await self.app(scope, receive, send)
+            return
+        self.active = True
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profile.disable()
+            self.active = False
+            self.profiles.add(profile, time.perf_counter() - start_time)
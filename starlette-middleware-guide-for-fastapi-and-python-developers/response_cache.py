@@ -0,0 +1,183 @@
+import math
+import time
+from collections import OrderedDict
+from fast_json import loads
+
+
+# Bounded LRU cache with an optional time-to-live and hit/miss counters. A disabled
+# cache is skipped by ResponseCacheMiddleware.
+class ResponseCache:
+    def __init__(self, maxsize=1024, ttl=None, enabled=True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    # Build the cache from the [cache] section of a ConfigLoader and follow later
+    # changes to it. The watcher thread only swaps the settings (and empties a disabled
+    # cache); a smaller maxsize evicts entries on the next set().
+    @classmethod
+    def from_config(cls, loader):
+        config = loader.config.cache
+        cache = cls(maxsize=config.maxsize, ttl=config.ttl or None, enabled=config.enabled)
+
+        def update(config, changes):
+            if any(key.startswith("cache.") for key in changes):
+                cache.maxsize = config.cache.maxsize
+                cache.ttl = config.cache.ttl or None
+                cache.enabled = config.cache.enabled
+                if not cache.enabled:
+                    cache.clear()
+
+        loader.subscribe(update)
+        return cache
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {"size": len(self.entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+# Normalize a /calculate/ body into a cache key. The number types are part of
+# the key because 1 and 1.0 hash the same but do not always produce the same
+# output, and so is the sign of zero: -0.0 == 0.0 but 1 * -0.0 is -0.0.
+# Anything that is not a plain {num1, num2, operation} is not cached.
+def calculation_key(data):
+    if not isinstance(data, dict) or len(data) != 3:
+        return None
+    try:
+        num1, num2, operation = data["num1"], data["num2"], data["operation"]
+    except KeyError:
+        return None
+    if type(num1) not in (int, float) or type(num2) not in (int, float) or type(operation) is not str:
+        return None
+    return type(num1), num1, math.copysign(1, num1), type(num2), num2, math.copysign(1, num2), operation
+
+
+# Read the request body, keeping the chunks in a list. Stops early once more than
+# max_size bytes have arrived and returns (body, complete): complete is False when
+# the rest of the body is still unread. body is None if the client disconnected.
+async def read_body(receive, max_size=None):
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] != "http.request":
+            return None, False
+        chunk = message.get("body", b"")
+        chunks.append(chunk)
+        size += len(chunk)
+        more_body = message.get("more_body", False)
+        if more_body and max_size is not None and size > max_size:
+            break
+    return b"".join(chunks), not more_body
+
+
+# A receive callable that hands an already read body to the app again, followed by
+# whatever is still unread when more_body is set
+def replay_body(body, receive, more_body=False):
+    replayed = False
+
+    async def replay_receive():
+        nonlocal replayed
+        if replayed:
+            return await receive()
+        replayed = True
+        return {"type": "http.request", "body": body, "more_body": more_body}
+
+    return replay_receive
+
+
+# Read a POST body and compute its key once per request. The key and the decoded
+# body are kept in scope["state"], so later layers with the same key_func (the
+# single-flight middleware, then the handler) do not decode the body again.
+# Returns the key (None when the body cannot be cached) and a receive callable
+# that replays the body, or (None, None) when the client disconnected.
+async def request_key(scope, receive, key_func=calculation_key, max_body_size=4096):
+    state = scope.setdefault("state", {})
+    shared = state.get("request_key")
+    if shared is not None and shared[0] is key_func:
+        return shared[1], receive
+    body, complete = await read_body(receive, max_body_size)
+    if body is None:
+        return None, None
+    key = None
+    if complete and len(body) <= max_body_size:
+        try:
+            state["request_json"] = loads(body)
+        except ValueError:
+            pass
+        else:
+            key = key_func(state["request_json"])
+    state["request_key"] = (key_func, key)
+    return key, replay_body(body, receive, more_body=not complete)
+
+
+# Pure ASGI middleware that answers repeated POSTs to `path` from the cache.
+# A hit replays the stored status, headers and encoded body, so the request never
+# reaches validation, the handler or JSON encoding. Only 200 responses are stored.
+class ResponseCacheMiddleware:
+    def __init__(self, app, cache=None, path="/calculate/", key_func=calculation_key, max_body_size=4096):
+        self.app = app
+        self.cache = cache if cache is not None else ResponseCache()
+        self.path = path
+        self.key_func = key_func
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path \
+                or not self.cache.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        key, replay_receive = await request_key(scope, receive, self.key_func, self.max_body_size)
+        if replay_receive is None:
+            return
+        if key is None:
+            await self.app(scope, replay_receive, send)
+            return
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            status, headers, cached_body = cached
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": cached_body})
+            return
+
+        start_message = None
+        body_parts = []
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body" and start_message["status"] == 200:
+                body_parts.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.cache.set(key, (200, list(start_message.get("headers", ())), b"".join(body_parts)))
+            await send(message)
+
+        await self.app(scope, replay_receive, send_wrapper)
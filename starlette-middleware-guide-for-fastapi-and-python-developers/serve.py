@@ -0,0 +1,223 @@
+import argparse
+import os
+import select
+import signal
+import socket
+import sys
+import time
+import uvicorn
+from app_config import CONFIG_FILE, config_loader
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# Define a function that opens a listening socket for the [server] host and port
+def listen_socket(host, port, ipv6=False, reuse_port=False, backlog=2048):
+    if ipv6 and host == "0.0.0.0":
+        host = "::"
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # An explicit IPPROTO_TCP matters: asyncio only sets TCP_NODELAY on accepted
+    # sockets whose proto is TCP, and without it every response waits ~40 ms for
+    # the client's delayed ACK
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+# uvicorn server that tells the launcher, through a pipe, when it is accepting connections
+class NotifyingServer(uvicorn.Server):
+    def __init__(self, config, ready_fd):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets)
+        if self.started:
+            os.write(self.ready_fd, b"1")
+
+
+# Pre-forking launcher. The master never imports the app: each worker imports it
+# after the fork and serves either the listener inherited from the master or, with
+# reuse_port, its own SO_REUSEPORT socket so the kernel balances connections. Dead
+# workers are replaced; SIGHUP replaces the workers one at a time, starting the new
+# worker before the old one drains; SIGTERM/SIGINT stop them all gracefully. When a
+# replacement cannot start, the old worker keeps serving and the launcher retries
+# after a backoff that doubles up to max_backoff seconds. Workers only add
+# throughput up to the number of CPUs; beyond that they share the same cores.
+class Launcher:
+    def __init__(self, app, host, port, workers, ipv6=False, reuse_port=False, cpu_affinity=False,
+                 graceful_timeout=30, log_level="warning", max_backoff=30):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.ipv6 = ipv6
+        self.workers = workers
+        self.reuse_port = reuse_port
+        self.cpu_affinity = cpu_affinity
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.max_backoff = max_backoff
+        self.cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        self.sock = None if reuse_port else listen_socket(host, port, ipv6)
+        self.children = {}
+        self.stopping = False
+        self.restart_requested = False
+        # (pid, index) of the workers a rolling restart has still to replace
+        self.restart_queue = []
+        # Indexes whose worker exited and could not be replaced yet
+        self.missing = set()
+        self.backoff = 0
+        self.retry_at = 0.0
+
+    def spawn(self, index, timeout=60):
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            status = 1
+            try:
+                self.run_worker(index, ready_write)
+                status = 0
+            finally:
+                os._exit(status)
+        os.close(ready_write)
+        try:
+            readable, _, _ = select.select([ready_read], [], [], timeout)
+            if not readable or not os.read(ready_read, 1):
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                raise RuntimeError(f"worker {index} did not start")
+        finally:
+            os.close(ready_read)
+        self.children[pid] = index
+        return pid
+
+    # Start a worker, or log why it could not start and back off before the next attempt
+    def try_spawn(self, index):
+        try:
+            self.spawn(index)
+        except (RuntimeError, OSError) as exc:
+            self.backoff = min(self.max_backoff, self.backoff * 2 or 1)
+            self.retry_at = time.monotonic() + self.backoff
+            print(f"Cannot start worker {index}: {exc}; retrying in {self.backoff}s", file=sys.stderr, flush=True)
+            return False
+        self.backoff = 0
+        return True
+
+    def run_worker(self, index, ready_fd):
+        # Drop the launcher's handlers inherited through fork; uvicorn installs its own
+        # for SIGTERM and SIGINT once it starts
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        if self.cpu_affinity and self.cpus:
+            os.sched_setaffinity(0, {self.cpus[index % len(self.cpus)]})
+        sock = self.sock or listen_socket(self.host, self.port, self.ipv6, reuse_port=True)
+        config = uvicorn.Config(self.app, log_level=self.log_level, access_log=False,
+                                timeout_graceful_shutdown=self.graceful_timeout)
+        NotifyingServer(config, ready_fd).run(sockets=[sock])
+
+    def stop_worker(self, pid):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while time.monotonic() < deadline:
+            if os.waitpid(pid, os.WNOHANG)[0]:
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.children.pop(pid, None)
+
+    # Replace the queued workers one at a time. Returns False when a replacement
+    # could not start: its old worker keeps serving and the rest wait for the retry.
+    def rolling_restart(self):
+        while self.restart_queue:
+            pid, index = self.restart_queue[0]
+            # A worker that exited in the meantime is replaced by respawn_missing()
+            if pid in self.children:
+                if not self.try_spawn(index):
+                    return False
+                self.stop_worker(pid)
+            self.restart_queue.pop(0)
+        return True
+
+    # Start the workers that exited; returns False if one still cannot start
+    def respawn_missing(self):
+        for index in sorted(self.missing):
+            if not self.try_spawn(index):
+                return False
+            self.missing.discard(index)
+        return True
+
+    def handle_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self.restart_requested = True
+        else:
+            self.stopping = True
+
+    def reap(self):
+        while self.children:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                return
+            index = self.children.pop(pid, None)
+            if index is not None and not self.stopping:
+                print(f"Worker {index} (pid {pid}) exited; starting a new one", file=sys.stderr)
+                self.missing.add(index)
+
+    def run(self):
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self.handle_signal)
+        for index in range(self.workers):
+            self.spawn(index)
+        scheme_host = f"[{self.host}]" if ":" in self.host else self.host
+        print(f"Serving {self.app} on http://{scheme_host}:{self.port} with {self.workers} workers", flush=True)
+        try:
+            while not self.stopping:
+                time.sleep(0.2)
+                self.reap()
+                if self.restart_requested:
+                    self.restart_requested = False
+                    self.restart_queue = list(self.children.items())
+                if time.monotonic() >= self.retry_at and self.respawn_missing() and self.restart_queue \
+                        and self.rolling_restart():
+                    print("Rolling restart finished", flush=True)
+        finally:
+            self.stopping = True
+            for pid in list(self.children):
+                self.stop_worker(pid)
+            if self.sock is not None:
+                self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a calculator app with several worker processes.")
+    parser.add_argument("app", nargs="?", default="calculator_app_fastapi:app", help="module:attribute to serve")
+    parser.add_argument("--config", default=CONFIG_FILE, help=".ini or .yaml file with a [server] section")
+    parser.add_argument("--host", help="override server.host")
+    parser.add_argument("--port", type=int, help="override server.port")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--reuse-port", action="store_true", help="one SO_REUSEPORT socket per worker")
+    parser.add_argument("--cpu-affinity", action="store_true", help="pin worker N to the N-th available CPU")
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+    server = config_loader(args.config).config.server
+    # Workers import the app by name, so make this directory importable as `uvicorn --app-dir` would
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    Launcher(args.app, args.host or server.host, args.port or server.port, args.workers,
+             ipv6=server.format == "IPv6", reuse_port=args.reuse_port, cpu_affinity=args.cpu_affinity,
+             graceful_timeout=args.graceful_timeout, log_level=args.log_level).run()
+
+
+if __name__ == "__main__":
+    main()
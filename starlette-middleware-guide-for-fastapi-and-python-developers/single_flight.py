@@ -0,0 +1,70 @@
+import asyncio
+from response_cache import calculation_key, request_key
+
+
+# Pure ASGI middleware that coalesces identical in-flight POSTs to `path`. The first
+# request for a key runs the app; requests with the same key that arrive while it
+# is running wait on its future and are sent the same status, headers and encoded
+# body. The key is forgotten as soon as the first request completes.
+class SingleFlightMiddleware:
+    def __init__(self, app, path="/calculate/", key_func=calculation_key, max_body_size=4096):
+        self.app = app
+        self.path = path
+        self.key_func = key_func
+        self.max_body_size = max_body_size
+        self.in_flight = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        key, replay_receive = await request_key(scope, receive, self.key_func, self.max_body_size)
+        if replay_receive is None:
+            return
+        if key is None:
+            await self.app(scope, replay_receive, send)
+            return
+
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                status, headers, response_body = await asyncio.shield(future)
+            except Exception:
+                # The first request failed: this one runs on its own
+                await self.app(scope, replay_receive, send)
+                return
+            await send({"type": "http.response.start", "status": status, "headers": list(headers)})
+            await send({"type": "http.response.body", "body": response_body})
+            return
+
+        future = self.in_flight[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        start_message = None
+        body_parts = []
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+                if not message.get("more_body", False) and not future.done():
+                    future.set_result((start_message["status"], list(start_message.get("headers", ())),
+                                       b"".join(body_parts)))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+        finally:
+            del self.in_flight[key]
+            if not future.done():
+                future.set_exception(RuntimeError("request did not complete"))
+                # Mark the exception as retrieved when nobody was waiting for it
+                future.exception()
+
+    def stats(self):
+        return {"in_flight": len(self.in_flight), "leaders": self.leaders, "coalesced": self.coalesced}
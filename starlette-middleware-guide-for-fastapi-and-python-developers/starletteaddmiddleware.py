@@ -1,36 +1,30 @@
 from starlette.applications import Starlette
 from starlette.requests import Request
-from starlette.responses import JSONResponse
 from starlette.routing import Route
-from starlette.middleware.cors import CORSMiddleware
+from static_cors import StaticCORSMiddleware
+from execution_policy import ExecutionPolicy
+from fast_json import FastJSONResponse, RawJSONResponse, dumps, loads
+
+
+# Encode the constant root API response once
+METADATA = dumps({"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
 
 
 # Define a function for the root API endpoint
 async def root(request: Request):
-    return JSONResponse(
-        status_code=200,
-        content={"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."},
-    )
+    return RawJSONResponse(METADATA)
+
+
+# Run cheap calculations inline and send huge-integer ones to a process pool
+execution_policy = ExecutionPolicy()
 
 
 # Define a function for the calculate API endpoint
 async def calculation(request: Request):
-    data = await request.json()
+    data = loads(await request.body())
     num1, num2, operation = data["num1"], data["num2"], data["operation"]
-    if operation == "add":
-        result = num1 + num2
-    elif operation == "subtract":
-        result = num1 - num2
-    elif operation == "multiply":
-        result = num1 * num2
-    elif operation == "divide":
-        result = num1 / num2
-    else:
-        return JSONResponse(
-            status_code=404,
-            content={"type": "FAILURE", "reason": "Not a valid operation"},
-        )
-    return JSONResponse(status_code=200, content={"type": "SUCCESS", "output": result})
+    status_code, content = await execution_policy.evaluate(operation, num1, num2)
+    return FastJSONResponse(status_code=status_code, content=content)
 
 
 # Define the API endpoints
@@ -42,7 +36,7 @@ routes = [
 # Initialize the app
 app = Starlette(routes=routes)
 
-app.add_middleware(CORSMiddleware,
+app.add_middleware(StaticCORSMiddleware,
                    allow_origins=["*"],
                    allow_methods=["GET", "POST"],
                    allow_headers=["Content-Type", "X-API-Key"],
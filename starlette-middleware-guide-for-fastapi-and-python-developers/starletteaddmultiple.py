@@ -1,60 +1,106 @@
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
+from starlette.responses import PlainTextResponse
 from starlette.routing import Route
-from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from static_cors import StaticCORSMiddleware
 from starlette.requests import Request
-import time
+from timing_middleware import TimingMiddleware
+from profiling import PROFILE_TOKEN, ProfileStore, ProfilingMiddleware, token_matches
+from tracing import RequestIDMiddleware, TraceBuffer, TraceSpan
+import metrics as prometheus
+from execution_policy import ExecutionPolicy
+from fast_json import FastJSONResponse, RawJSONResponse, dumps, loads
+
+
+# Encode the constant root API response once
+METADATA = dumps({"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
 
 
 # Define a function for the root API endpoint
 async def root(request: Request):
-    return JSONResponse(
-        status_code=200,
-        content={"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."},
-    )
+    return RawJSONResponse(METADATA)
+
+
+# Run cheap calculations inline and send huge-integer ones to a process pool
+execution_policy = ExecutionPolicy()
 
 
 # Define a function for the calculate API endpoint
 async def calculation(request: Request):
-    data = await request.json()
+    data = loads(await request.body())
     num1, num2, operation = data["num1"], data["num2"], data["operation"]
-    if operation == "add":
-        result = num1 + num2
-    elif operation == "subtract":
-        result = num1 - num2
-    elif operation == "multiply":
-        result = num1 * num2
-    elif operation == "divide":
-        result = num1 / num2
-    else:
-        return JSONResponse(
-            status_code=404,
-            content={"type": "FAILURE", "reason": "Not a valid operation"},
-        )
-    return JSONResponse(status_code=200, content={"type": "SUCCESS", "output": result})
+    status_code, content = await execution_policy.evaluate(operation, num1, num2)
+    if status_code != 200:
+        return FastJSONResponse(status_code=status_code, content=content)
+    request.state.operation = operation
+    return FastJSONResponse(status_code=200, content=content)
+
+
+metrics_store = prometheus.MetricsStore()
+trace_buffer = TraceBuffer(maxsize=1000)
+profile_store = ProfileStore()
+
+
+# Define a function for the metrics API endpoint
+async def metrics(request: Request):
+    return PlainTextResponse(metrics_store.render_prometheus() + execution_policy.render_prometheus(),
+                             media_type=prometheus.CONTENT_TYPE)
+
+
+# Define a function that reads an integer query parameter, clamped to zero or more;
+# None when the value is not an integer
+def query_limit(request, default, name="limit"):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return None
+
+
+# Define a function for the debug API endpoint listing the most recent request traces
+async def debug_traces(request: Request):
+    limit = query_limit(request, 100)
+    if limit is None:
+        return FastJSONResponse(status_code=400, content={"type": "FAILURE", "reason": "limit must be an integer"})
+    return FastJSONResponse(status_code=200, content={"traces": trace_buffer.snapshot(limit)})
+
+
+# Define a function for the debug API endpoint printing the aggregated request profiles.
+# It needs the profiling token in X-Profile and does not exist while no token is set.
+async def debug_profile(request: Request):
+    if PROFILE_TOKEN is None:
+        return PlainTextResponse("Not Found", status_code=404)
+    if not token_matches(request.headers.get("x-profile"), PROFILE_TOKEN):
+        return FastJSONResponse(status_code=403, content={"type": "FAILURE", "reason": "Invalid profiling token"})
+    limit = query_limit(request, 40)
+    if limit is None:
+        return FastJSONResponse(status_code=400, content={"type": "FAILURE", "reason": "limit must be an integer"})
+    try:
+        report = profile_store.report(request.query_params.get("sort", "cumulative"), limit)
+    except ValueError as exc:
+        return FastJSONResponse(status_code=400, content={"type": "FAILURE", "reason": str(exc)})
+    if request.query_params.get("reset") in ("1", "true"):
+        profile_store.reset()
+    return PlainTextResponse(report)
 
 
 # Define the API endpoints
 routes = [
     Route("/", root),
     Route("/calculate/", calculation, methods=["POST"]),
+    Route("/metrics", metrics),
+    Route("/debug/traces", debug_traces),
+    Route("/debug/profile", debug_profile),
 ]
 
 
-class TimingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.perf_counter()
-        response = await call_next(request)
-        duration = time.perf_counter() - start_time
-        response.headers["X-Process-Time"] = f"{duration:.4f}s"
-        return response
-
-
 # Initialize the app
 app = Starlette(routes=routes)
 
-app.add_middleware(CORSMiddleware,
+# Each TraceSpan records the time spent in the layer added right after it and below
+app.add_middleware(TraceSpan, name="router")
+app.add_middleware(StaticCORSMiddleware,
                    allow_origins=["*"],
                    allow_methods=["GET", "POST"],
                    allow_headers=["Content-Type", "X-API-Key"],
@@ -62,4 +108,11 @@ app.add_middleware(CORSMiddleware,
                    allow_credentials=False,
                    max_age=3600
                    )
-app.add_middleware(TimingMiddleware)
+app.add_middleware(TraceSpan, name="cors")
+app.add_middleware(TimingMiddleware, metrics=metrics_store)
+app.add_middleware(TraceSpan, name="timing")
+app.add_middleware(RequestIDMiddleware, traces=trace_buffer)
+# Profile requests sent with "X-Profile: <token>" once HONEYBADGER_PROFILE_TOKEN is set;
+# raise sample_rate to also profile random requests
+if PROFILE_TOKEN is not None:
+    app.add_middleware(ProfilingMiddleware, profiles=profile_store, sample_rate=0.0, token=PROFILE_TOKEN)
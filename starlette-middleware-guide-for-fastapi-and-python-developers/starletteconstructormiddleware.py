@@ -1,64 +1,63 @@
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
+from starlette.responses import PlainTextResponse
 from starlette.routing import Route
-from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from static_cors import StaticCORSMiddleware
 from starlette.requests import Request
 from starlette.middleware import Middleware
-import time
+from timing_middleware import TimingMiddleware
+import metrics as prometheus
+from execution_policy import ExecutionPolicy
+from fast_json import FastJSONResponse, RawJSONResponse, dumps, loads
+
+
+# Encode the constant root API response once
+METADATA = dumps({"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."})
 
 
 # Define a function for the root API endpoint
 async def root(request: Request):
-    return JSONResponse(
-        status_code=200,
-        content={"type": "METADATA", "output": "Welcome to Calculator by HoneyBadger."},
-    )
+    return RawJSONResponse(METADATA)
+
+
+# Run cheap calculations inline and send huge-integer ones to a process pool
+execution_policy = ExecutionPolicy()
 
 
 # Define a function for the calculate API endpoint
 async def calculation(request: Request):
-    data = await request.json()
+    data = loads(await request.body())
     num1, num2, operation = data["num1"], data["num2"], data["operation"]
-    if operation == "add":
-        result = num1 + num2
-    elif operation == "subtract":
-        result = num1 - num2
-    elif operation == "multiply":
-        result = num1 * num2
-    elif operation == "divide":
-        result = num1 / num2
-    else:
-        return JSONResponse(
-            status_code=404,
-            content={"type": "FAILURE", "reason": "Not a valid operation"},
-        )
-    return JSONResponse(status_code=200, content={"type": "SUCCESS", "output": result})
+    status_code, content = await execution_policy.evaluate(operation, num1, num2)
+    if status_code != 200:
+        return FastJSONResponse(status_code=status_code, content=content)
+    request.state.operation = operation
+    return FastJSONResponse(status_code=200, content=content)
+
+
+metrics_store = prometheus.MetricsStore()
+
+
+# Define a function for the metrics API endpoint
+async def metrics(request: Request):
+    return PlainTextResponse(metrics_store.render_prometheus() + execution_policy.render_prometheus(),
+                             media_type=prometheus.CONTENT_TYPE)
 
 
 # Define the API endpoints
 routes = [
     Route("/", root),
     Route("/calculate/", calculation, methods=["POST"]),
+    Route("/metrics", metrics),
 ]
 
 
-class TimingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.perf_counter()
-        response = await call_next(request)
-        duration = time.perf_counter() - start_time
-        response.headers["X-Process-Time"] = f"{duration:.4f}s"
-        return response
-
-
-cors_middleware = Middleware(CORSMiddleware,
+cors_middleware = Middleware(StaticCORSMiddleware,
                              allow_origins=["*"],
                              allow_methods=["GET", "POST"],
                              allow_headers=["Content-Type", "X-API-Key"],
                              expose_headers=["X-Request-ID"],
                              allow_credentials=False,
                              max_age=3600)
-timing_middleware = Middleware(TimingMiddleware)
+timing_middleware = Middleware(TimingMiddleware, metrics=metrics_store)
 # Initialize the app
 app = Starlette(routes=routes, middleware=[cors_middleware, timing_middleware])
@@ -0,0 +1,86 @@
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import PlainTextResponse
+
+# Number of distinct (method, requested headers) preflight checks remembered
+PREFLIGHT_CACHE_SIZE = 256
+
+
+# CORSMiddleware for static configurations such as allow_origins=["*"] without
+# credentials. Preflight and simple-response headers do not depend on the request
+# there, so their raw byte pairs are built once at startup: allowed preflights are
+# answered from a prebuilt response and simple responses get the pairs appended
+# without going through MutableHeaders. Other configurations behave exactly like
+# CORSMiddleware.
+class StaticCORSMiddleware(CORSMiddleware):
+    def __init__(self, app, **kwargs):
+        super().__init__(app, **kwargs)
+        self.static = self.allow_all_origins and not self.allow_credentials and not self.allow_all_headers
+        if not self.static:
+            return
+        preflight = PlainTextResponse("OK", status_code=200, headers=self.preflight_headers)
+        self.preflight_start = {"type": "http.response.start", "status": 200, "headers": preflight.raw_headers}
+        self.preflight_body = {"type": "http.response.body", "body": preflight.body}
+        self.simple_raw_headers = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                                   for name, value in self.simple_headers.items()]
+        self.preflight_checks = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.static:
+            await super().__call__(scope, receive, send)
+            return
+
+        origin = requested_method = requested_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                requested_method = value
+            elif name == b"access-control-request-headers":
+                requested_headers = value
+            elif name == b"access-control-request-private-network":
+                # Rare enough to leave to the generic implementation
+                await super().__call__(scope, receive, send)
+                return
+
+        if origin is not None and requested_method is not None and scope["method"] == "OPTIONS":
+            if self.preflight_allowed(requested_method, requested_headers):
+                await send({**self.preflight_start, "headers": list(self.preflight_start["headers"])})
+                await send(self.preflight_body)
+            else:
+                await super().__call__(scope, receive, send)
+            return
+
+        extra_headers = self.simple_raw_headers if origin is not None else ()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.extend(extra_headers)
+                add_vary_origin(headers)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    # Same method and header checks as CORSMiddleware.preflight_response, remembered
+    # per distinct request since the answer only depends on the configuration
+    def preflight_allowed(self, requested_method, requested_headers):
+        key = (requested_method, requested_headers)
+        allowed = self.preflight_checks.get(key)
+        if allowed is None:
+            allowed = requested_method.decode("latin-1") in self.allow_methods
+            if allowed and requested_headers is not None:
+                allowed = all(header.strip() in self.allow_headers
+                              for header in requested_headers.decode("latin-1").lower().split(","))
+            if len(self.preflight_checks) < PREFLIGHT_CACHE_SIZE:
+                self.preflight_checks[key] = allowed
+        return allowed
+
+
+# Add "Origin" to the Vary header, merging it into an existing one like CORSMiddleware does
+def add_vary_origin(headers):
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            headers[index] = (name, value + b", Origin")
+            return
+    headers.append((b"vary", b"Origin"))
@@ -0,0 +1,120 @@
+import inspect
+from starlette.websockets import WebSocket, WebSocketDisconnect
+from fast_json import dumps, loads
+
+INVALID_JSON = {"type": "FAILURE", "reason": "Invalid JSON"}
+LINE_TOO_LONG = {"type": "FAILURE", "reason": "Line is too long"}
+
+
+# Wrap an app's calculate_item (sync or async) as a coroutine function
+def as_async(calculate_item):
+    if inspect.iscoroutinefunction(calculate_item):
+        return calculate_item
+
+    async def calculate_item_async(item):
+        return calculate_item(item)
+
+    return calculate_item_async
+
+
+# Raw ASGI endpoint for POST /calculate/stream/. The request body is a stream of
+# newline-delimited JSON operations; each chunk is evaluated as soon as it arrives
+# and its results are sent back as NDJSON lines, in order, on the same response.
+# Only the unfinished last line is kept between chunks. A line longer than
+# max_line_size ends the stream: with a 413 if nothing has been sent yet,
+# otherwise with a final FAILURE line.
+class NDJSONCalculator:
+    def __init__(self, calculate_item, max_line_size=65536):
+        self.calculate_item = as_async(calculate_item)
+        self.max_line_size = max_line_size
+
+    async def __call__(self, scope, receive, send):
+        started = False
+        tail = []
+        tail_size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            chunk = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            # Only the new chunk is searched for newlines
+            pieces = chunk.split(b"\n")
+            if len(pieces) == 1:
+                tail.append(chunk)
+                tail_size += len(chunk)
+                lines = []
+            else:
+                tail.append(pieces[0])
+                lines = [b"".join(tail), *pieces[1:-1]]
+                tail, tail_size = [pieces[-1]], len(pieces[-1])
+            if not more_body:
+                lines.append(b"".join(tail))
+            output = []
+            too_long = tail_size > self.max_line_size
+            for line in lines:
+                if len(line) > self.max_line_size:
+                    too_long = True
+                    break
+                if line.strip():
+                    output.append(dumps(await self.evaluate(line)) + b"\n")
+            if too_long and not output and not started:
+                await send({"type": "http.response.start", "status": 413,
+                            "headers": [(b"content-type", b"application/json")]})
+                await send({"type": "http.response.body", "body": dumps(LINE_TOO_LONG)})
+                return
+            if too_long:
+                output.append(dumps(LINE_TOO_LONG) + b"\n")
+            if output:
+                if not started:
+                    await self.start(send)
+                    started = True
+                await send({"type": "http.response.body", "body": b"".join(output), "more_body": not too_long})
+            if too_long:
+                return
+        if not started:
+            await self.start(send)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def start(self, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/x-ndjson")],
+        })
+
+    async def evaluate(self, line):
+        try:
+            item = loads(line)
+        except ValueError:
+            return INVALID_JSON
+        return await self.calculate_item(item)
+
+
+# WebSocket endpoint for /calculate/ws. Every message is one operation or a list of
+# operations, and is answered with one message holding the result or list of results.
+def websocket_endpoint(calculate_item):
+    calculate_item = as_async(calculate_item)
+
+    async def websocket_calculation(websocket: WebSocket):
+        await websocket.accept()
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                try:
+                    data = loads(message.get("bytes") or message.get("text") or "")
+                except ValueError:
+                    result = INVALID_JSON
+                else:
+                    if isinstance(data, list):
+                        result = [await calculate_item(item) for item in data]
+                    else:
+                        result = await calculate_item(data)
+                await websocket.send_text(dumps(result).decode("utf-8"))
+        except WebSocketDisconnect:
+            return
+
+    return websocket_calculation
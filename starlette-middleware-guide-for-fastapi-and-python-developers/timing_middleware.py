@@ -0,0 +1,29 @@
+import time
+from metrics import operation_label, route_label
+
+
+# Pure ASGI version of the TimingMiddleware: no BaseHTTPMiddleware task/stream
+# plumbing and no response buffering, so streaming responses pass straight through.
+# When a MetricsStore is given every measurement is also recorded per route and operation.
+class TimingMiddleware:
+    def __init__(self, app, metrics=None):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                duration = time.perf_counter() - start_time
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-process-time", f"{duration:.4f}s".encode("latin-1")))
+                message = {**message, "headers": headers}
+                if self.metrics is not None:
+                    self.metrics.record(route_label(scope), operation_label(scope), duration)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
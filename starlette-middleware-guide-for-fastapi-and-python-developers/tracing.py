@@ -0,0 +1,111 @@
+import os
+import re
+import time
+from collections import deque
+
+# Incoming request IDs are reused only when they look like an ID
+VALID_REQUEST_ID = re.compile(rb"[A-Za-z0-9._:-]{1,128}")
+
+
+# Ring buffer holding the most recent finished traces
+class TraceBuffer:
+    def __init__(self, maxsize=1000):
+        self.traces = deque(maxlen=maxsize)
+
+    def add(self, trace):
+        self.traces.append(trace)
+
+    # The most recent `limit` traces, oldest first; all of them when limit is None
+    def snapshot(self, limit=None):
+        traces = list(self.traces)
+        if limit is None:
+            return traces
+        return traces[len(traces) - min(max(limit, 0), len(traces)):]
+
+
+# Assigns every HTTP request an X-Request-ID (reusing a valid incoming one), sets it
+# on the response and records a trace of the request. TraceSpan layers further down
+# add one span each; when the request is done the trace, with the self time of
+# every span, is pushed to the TraceBuffer. Add it as the outermost middleware.
+class RequestIDMiddleware:
+    def __init__(self, app, traces, header="X-Request-ID"):
+        self.app = app
+        self.traces = traces
+        self.header = header.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == self.header and VALID_REQUEST_ID.fullmatch(value):
+                request_id = value
+                break
+        if request_id is None:
+            request_id = os.urandom(16).hex().encode("latin-1")
+        start_time = time.perf_counter()
+        trace = {"spans": [], "status": None, "response_start": None}
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id.decode("latin-1")
+        state["trace"] = trace
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace["status"] = message["status"]
+                trace["response_start"] = time.perf_counter()
+                message = {**message, "headers": [*message.get("headers", ()), (self.header, request_id)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.traces.add(finish_trace(trace, state["request_id"], scope, start_time))
+
+
+# Marker placed under a middleware layer (or in front of the router). It opens a span
+# when the request reaches it and closes it on http.response.start, using the same
+# send-wrapper hook as the Tagger middleware.
+class TraceSpan:
+    def __init__(self, app, name):
+        self.app = app
+        self.name = name
+
+    async def __call__(self, scope, receive, send):
+        trace = scope.get("state", {}).get("trace") if scope["type"] == "http" else None
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+        span = [self.name, time.perf_counter(), None]
+        trace["spans"].append(span)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and span[2] is None:
+                span[2] = time.perf_counter()
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# Turn the raw spans into milliseconds relative to the start of the request. Spans
+# are nested in the order they were opened, so each span's self time is its duration
+# minus the duration of the next (inner) span.
+def finish_trace(trace, request_id, scope, start_time):
+    end_time = trace["response_start"] or time.perf_counter()
+    spans = []
+    for name, span_start, span_end in trace["spans"]:
+        spans.append({
+            "name": name,
+            "start_ms": round((span_start - start_time) * 1000, 4),
+            "duration_ms": round(((span_end or end_time) - span_start) * 1000, 4),
+        })
+    for span, inner in zip(spans, spans[1:] + [None]):
+        span["self_ms"] = round(span["duration_ms"] - (inner["duration_ms"] if inner else 0.0), 4)
+    return {
+        "request_id": request_id,
+        "method": scope["method"],
+        "path": scope["path"],
+        "status": trace["status"],
+        "duration_ms": round((end_time - start_time) * 1000, 4),
+        "spans": spans,
+    }